@@ -0,0 +1,37 @@
+"""ownership sketches
+
+Revision ID: 0002_sketches
+Revises: 0001_initial
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_sketches'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sketches',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.LargeBinary(length=16777215), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Backfill from ownerships loaded before sketches existed
+    from sqlalchemy.orm import Session
+    from steam_explorer.etl.sketches import rebuild_sketches
+
+    session = Session(bind=op.get_bind())
+    rebuild_sketches(session)
+    session.flush()
+
+
+def downgrade() -> None:
+    op.drop_table('sketches')
@@ -0,0 +1,49 @@
+"""ownership playtime history
+
+Revision ID: 0003_ownership_history
+Revises: 0002_sketches
+Create Date: 2026-10-19 00:00:00
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_ownership_history'
+down_revision = '0002_sketches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ownership_history',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('steamid', sa.String(length=32), nullable=False),
+        sa.Column('appid', sa.Integer(), nullable=False),
+        sa.Column('playtime_delta', sa.Integer(), nullable=False),
+        sa.Column('baseline', sa.Boolean(), nullable=False),
+        sa.Column('period', sa.Integer(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ownership_history_steamid_recorded_at', 'ownership_history', ['steamid', 'recorded_at'])
+    op.create_index('ix_ownership_history_period', 'ownership_history', ['period'])
+
+    # Seed one baseline per existing ownership so later deltas reconstruct correctly
+    now = datetime.utcnow()
+    op.get_bind().execute(
+        sa.text(
+            "INSERT INTO ownership_history (steamid, appid, playtime_delta, baseline, period, recorded_at) "
+            "SELECT steamid, appid, COALESCE(playtime_forever, 0), :baseline, :period, :now FROM ownerships"
+        ),
+        {"baseline": True, "period": now.year * 100 + now.month, "now": now},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ownership_history_period', table_name='ownership_history')
+    op.drop_index('ix_ownership_history_steamid_recorded_at', table_name='ownership_history')
+    op.drop_table('ownership_history')
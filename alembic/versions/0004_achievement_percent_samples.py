@@ -0,0 +1,48 @@
+"""achievement percent time series
+
+Revision ID: 0004_achievement_percent_samples
+Revises: 0003_ownership_history
+Create Date: 2026-10-19 00:00:00
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_achievement_percent_samples'
+down_revision = '0003_ownership_history'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'achievement_percent_samples',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('achievement_id', sa.Integer(), nullable=False),
+        sa.Column('percent_q', sa.SmallInteger(), nullable=False),
+        sa.Column('sampled_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['achievement_id'], ['achievements_global.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_achievement_percent_samples_achievement_id_sampled_at',
+        'achievement_percent_samples',
+        ['achievement_id', 'sampled_at'],
+    )
+
+    # Start every existing achievement's series at its current percent
+    op.get_bind().execute(
+        sa.text(
+            "INSERT INTO achievement_percent_samples (achievement_id, percent_q, sampled_at) "
+            "SELECT id, CAST(ROUND(percent * 100) AS INTEGER), :now FROM achievements_global"
+        ),
+        {"now": datetime.utcnow()},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_achievement_percent_samples_achievement_id_sampled_at', table_name='achievement_percent_samples')
+    op.drop_table('achievement_percent_samples')
@@ -0,0 +1,24 @@
+"""games content hash
+
+Revision ID: 0005_games_content_hash
+Revises: 0004_achievement_percent_samples
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_games_content_hash'
+down_revision = '0004_achievement_percent_samples'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable: existing rows get their hash on the next refresh
+    op.add_column('games', sa.Column('content_hash', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('games', 'content_hash')
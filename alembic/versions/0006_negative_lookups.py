@@ -0,0 +1,35 @@
+"""negative lookup cache
+
+Revision ID: 0006_negative_lookups
+Revises: 0005_games_content_hash
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_negative_lookups'
+down_revision = '0005_games_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'negative_lookups',
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('appid', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('reason', sa.String(length=64), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('last_checked_at', sa.DateTime(), nullable=False),
+        sa.Column('next_check_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'appid')
+    )
+    op.create_index('ix_negative_lookups_kind_next_check_at', 'negative_lookups', ['kind', 'next_check_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_negative_lookups_kind_next_check_at', table_name='negative_lookups')
+    op.drop_table('negative_lookups')
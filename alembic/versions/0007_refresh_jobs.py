@@ -0,0 +1,39 @@
+"""refresh jobs for the daemon scheduler
+
+Revision ID: 0007_refresh_jobs
+Revises: 0006_negative_lookups
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_refresh_jobs'
+down_revision = '0006_negative_lookups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'refresh_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('key', sa.String(length=32), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('failures', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(length=255), nullable=True),
+        sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('last_success_at', sa.DateTime(), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'key', name='uq_refresh_jobs_kind_key')
+    )
+    op.create_index('ix_refresh_jobs_next_run_at', 'refresh_jobs', ['next_run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_jobs_next_run_at', table_name='refresh_jobs')
+    op.drop_table('refresh_jobs')
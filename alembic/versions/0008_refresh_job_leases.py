@@ -0,0 +1,27 @@
+"""lease columns on refresh jobs for multi-worker claiming
+
+Revision ID: 0008_refresh_job_leases
+Revises: 0007_refresh_jobs
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_refresh_job_leases'
+down_revision = '0007_refresh_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_jobs', sa.Column('lease_owner', sa.String(length=64), nullable=True))
+    op.add_column('refresh_jobs', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_refresh_jobs_kind_next_run_at', 'refresh_jobs', ['kind', 'next_run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_refresh_jobs_kind_next_run_at', table_name='refresh_jobs')
+    op.drop_column('refresh_jobs', 'lease_expires_at')
+    op.drop_column('refresh_jobs', 'lease_owner')
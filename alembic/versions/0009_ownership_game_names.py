@@ -0,0 +1,59 @@
+"""ownerships.game_name with an online backfill
+
+Revision ID: 0009_ownership_game_names
+Revises: 0008_refresh_job_leases
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_ownership_game_names'
+down_revision = '0008_refresh_job_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases updated by tools/add_game_names_to_ownerships.py already have the table and the column
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+    if inspector is None or not inspector.has_table('backfill_checkpoints'):
+        op.create_table(
+            'backfill_checkpoints',
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('last_key', sa.BigInteger(), nullable=False),
+            sa.Column('rows_done', sa.BigInteger(), nullable=False),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+    # A nullable column without a default is a metadata-only change on Postgres and MySQL 8
+    if inspector is None or 'game_name' not in {c['name'] for c in inspector.get_columns('ownerships')}:
+        op.add_column('ownerships', sa.Column('game_name', sa.String(length=255), nullable=True))
+
+    ownerships = sa.table('ownerships', sa.column('id', sa.Integer), sa.column('appid', sa.Integer), sa.column('game_name', sa.String))
+    games = sa.table('games', sa.column('appid', sa.Integer), sa.column('name', sa.String))
+    name = sa.select(games.c.name).where(games.c.appid == ownerships.c.appid).scalar_subquery()
+    if context.is_offline_mode():
+        # A SQL script cannot batch; it gets the plain UPDATE
+        op.execute(ownerships.update().where(ownerships.c.game_name.is_(None)).values(game_name=name))
+        return
+
+    from steam_explorer.backfill import backfill, deferred, migration_options
+
+    if deferred():
+        # -x backfill=skip: fill later with tools/add_game_names_to_ownerships.py
+        return
+    # Batches commit on their own, so the migration's transaction is closed around them
+    with op.get_context().autocommit_block():
+        backfill(
+            op.get_bind().engine, 'ownerships.game_name', ownerships, {'game_name': name},
+            where=ownerships.c.game_name.is_(None), key=ownerships.c.id, **migration_options(),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('ownerships', 'game_name')
+    op.drop_table('backfill_checkpoints')
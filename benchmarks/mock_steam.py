@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Steam Web API and store, for offline end-to-end load tests.
+
+Serves the endpoints ``SteamClient`` uses from ``benchmarks/synthetic.py`` payloads,
+or from recorded responses when a fixtures directory has them:
+
+  Web API   /IPlayerService/GetOwnedGames/v1/                         fixtures/owned_games/<steamid>.json
+            /IPlayerService/GetRecentlyPlayedGames/v1/                fixtures/recently_played/<steamid>.json
+            /ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/  fixtures/achievements/<appid>.json
+            /ISteamApps/GetAppList/v2/                                fixtures/app_list.json
+  store     /api/appdetails                                           fixtures/appdetails/<appid>.json (one app's entry)
+
+Latency, a token-bucket rate limit (per API key on the Web API, per server on the
+store), a random 429/5xx share and payload sizes are configurable, and every
+response is deterministic for a given seed. ``/__stats`` returns request counts
+per endpoint and status as JSON.
+
+    python benchmarks/mock_steam.py --port 8765 --latency-ms 40 --rate-limit 5 --throttle-rate 0.02
+    STEAM_API_BASE_URL=http://127.0.0.1:8765 STEAM_STORE_URL=http://127.0.0.1:8766 \\
+        python tools/fetch_games.py --owned --steamid 76561197960265728 --metrics-json run.json
+
+The Web API listens on ``--port`` and the store on ``--port + 1``, so the client
+paces them as two hosts, as it does against Steam.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks import synthetic  # noqa: E402
+
+OWNED_GAMES = "/IPlayerService/GetOwnedGames/v1/"
+RECENTLY_PLAYED = "/IPlayerService/GetRecentlyPlayedGames/v1/"
+ACHIEVEMENTS = "/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"
+APP_LIST = "/ISteamApps/GetAppList/v2/"
+APPDETAILS = "/api/appdetails"
+KEYED = (OWNED_GAMES, RECENTLY_PLAYED)
+
+
+@dataclass
+class MockConfig:
+    seed: int = 0
+    apps: int = 10_000                 # catalog size
+    library_size: int = 200            # mean owned-games library size
+    detail_scale: float = 1.0          # length multiplier for full appdetails descriptions
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_limit: float = 0.0            # requests/second per key (Web API) or per server (store); 0 = unlimited
+    burst: float = 5.0
+    throttle_rate: float = 0.0         # share of requests answered 429 regardless of rate
+    error_rate: float = 0.0            # share answered 503
+    retry_after: Optional[int] = 1     # Retry-After seconds on 429s; None omits the header
+    keys: Tuple[str, ...] = ()         # accepted API keys; empty accepts any
+    fixtures: Optional[str] = None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class MockSteam:
+    """Payloads, limits and counters shared by the Web API and store listeners."""
+
+    def __init__(self, config: MockConfig) -> None:
+        self.config = config
+        self.catalog = synthetic.app_ids(config.apps, config.seed)
+        self._catalog_set = set(self.catalog)
+        self._lock = threading.Lock()
+        self._rng = random.Random(f"{config.seed}:faults")
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, status: int) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def fault(self, bucket: str) -> Tuple[Optional[int], Dict[str, str]]:
+        """(status, headers) when this request should fail, else (None, {})."""
+        cfg = self.config
+        with self._lock:
+            roll = self._rng.random()
+            limited = False
+            if cfg.rate_limit > 0:
+                limiter = self._buckets.get(bucket)
+                if limiter is None:
+                    limiter = self._buckets[bucket] = TokenBucket(cfg.rate_limit, cfg.burst)
+                limited = not limiter.take()
+        if limited or roll < cfg.throttle_rate:
+            return 429, ({"Retry-After": str(cfg.retry_after)} if cfg.retry_after is not None else {})
+        if roll < cfg.throttle_rate + cfg.error_rate:
+            return 503, {}
+        return None, {}
+
+    def _fixture(self, *parts: str) -> Optional[bytes]:
+        if not self.config.fixtures:
+            return None
+        path = os.path.join(self.config.fixtures, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _user(self, steamid: str) -> int:
+        try:
+            return max(0, int(steamid) - 76561197960265728)
+        except ValueError:
+            return abs(hash(steamid)) % 1_000_000
+
+    def owned_games(self, steamid: str, include_appinfo: bool) -> Any:
+        recorded = self._fixture("owned_games", f"{steamid}.json")
+        if recorded is not None:
+            return recorded
+        rng = random.Random(f"{self.config.seed}:library:{steamid}")
+        size = synthetic.library_size(rng, self.config.library_size)
+        return synthetic.owned_games(self._user(steamid), self.catalog, size, self.config.seed, include_appinfo)
+
+    def recently_played(self, steamid: str, count: int) -> Any:
+        recorded = self._fixture("recently_played", f"{steamid}.json")
+        if recorded is not None:
+            return recorded
+        owned = self.owned_games(steamid, True)
+        if isinstance(owned, bytes):
+            owned = json.loads(owned)
+        games = [g for g in owned.get("response", {}).get("games", []) if g.get("playtime_2weeks")]
+        games.sort(key=lambda g: -g["playtime_2weeks"])
+        if count:
+            games = games[:count]
+        return {"response": {"total_count": len(games), "games": games}}
+
+    def achievements(self, appid: int) -> Tuple[int, Any]:
+        recorded = self._fixture("achievements", f"{appid}.json")
+        if recorded is not None:
+            return 200, recorded
+        if appid not in self._catalog_set:
+            return 403, {}
+        count = synthetic.achievement_count(appid, self.config.seed)
+        return 200, synthetic.global_achievements(appid, count, self.config.seed)
+
+    def app_list(self) -> Any:
+        recorded = self._fixture("app_list.json")
+        return recorded if recorded is not None else synthetic.app_list(self.catalog, self.config.seed)
+
+    def appdetails(self, appids: List[int], filters: Optional[str]) -> Any:
+        profile = {"basic": "basic", "price_overview": "price"}.get(filters or "", "full")
+        response: Dict[str, Any] = {}
+        for appid in appids:
+            recorded = self._fixture("appdetails", f"{appid}.json")
+            if recorded is not None:
+                response[str(appid)] = json.loads(recorded)
+            elif appid in self._catalog_set:
+                response.update(synthetic.appdetails([appid], self.config.seed, profile, self.config.detail_scale))
+            else:
+                response[str(appid)] = {"success": False}
+        return response
+
+    def route(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if path == OWNED_GAMES:
+            return 200, self.owned_games(query.get("steamid", ""), query.get("include_appinfo", "1") != "0")
+        if path == RECENTLY_PLAYED:
+            return 200, self.recently_played(query.get("steamid", ""), int(query.get("count") or 0))
+        if path == ACHIEVEMENTS:
+            return self.achievements(int(query.get("gameid") or 0))
+        if path == APP_LIST:
+            return 200, self.app_list()
+        if path == APPDETAILS:
+            appids = [int(a) for a in query.get("appids", "").split(",") if a.strip()]
+            return 200, self.appdetails(appids, query.get("filters"))
+        return 404, {}
+
+    def handler(self, store: bool):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                path = parts.path if parts.path.endswith("/") or parts.path == APPDETAILS else parts.path + "/"
+                if parts.path == "/__stats":
+                    with mock._lock:
+                        self._send(200, json.dumps(mock.stats).encode())
+                    return
+                cfg = mock.config
+                if cfg.latency_ms or cfg.jitter_ms:
+                    time.sleep(max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000.0)
+                if path in KEYED and cfg.keys and query.get("key") not in cfg.keys:
+                    self._finish(path, 403, b"<html><body>Forbidden</body></html>")
+                    return
+                bucket = "store" if store else (query.get("key") or "anonymous")
+                status, headers = mock.fault(bucket)
+                if status is not None:
+                    self._finish(path, status, b"", headers)
+                    return
+                status, body = mock.route(path, query)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body, separators=(",", ":")).encode("utf-8")
+                self._finish(path, status, body)
+
+            def _finish(self, path: str, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+                mock.record(path, status)
+                self._send(status, body, headers)
+
+            def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0, store: bool = False) -> ThreadingHTTPServer:
+        """Start one listener (Web API, or store with ``store=True``) on a daemon thread."""
+        server = ThreadingHTTPServer((host, port), self.handler(store))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="mock-steam-store" if store else "mock-steam-api", daemon=True).start()
+        return server
+
+
+def url_of(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve synthetic or recorded Steam API responses locally")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Web API port; the store listens on port + 1 (default 8765)")
+    parser.add_argument("--seed", type=int, default=0, help="Payload seed (default 0)")
+    parser.add_argument("--apps", type=int, default=10_000, help="Catalog size (default 10000)")
+    parser.add_argument("--library-size", type=int, default=200, help="Mean owned-games library size (default 200)")
+    parser.add_argument("--detail-scale", type=float, default=1.0, help="Multiplier for full appdetails payload size (default 1)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request (default 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency (default 0)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests/second per API key (store: per server) before 429s; 0 = off")
+    parser.add_argument("--burst", type=float, default=5.0, help="Token bucket size for --rate-limit (default 5)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered 429 at random (default 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 503 at random (default 0)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429s; negative omits it (default 1)")
+    parser.add_argument("--keys", default="", help="Comma-separated accepted API keys (default: accept any)")
+    parser.add_argument("--fixtures", default="", help="Directory of recorded responses that take precedence over generated ones")
+    args = parser.parse_args(argv)
+
+    mock = MockSteam(MockConfig(
+        seed=args.seed, apps=args.apps, library_size=args.library_size, detail_scale=args.detail_scale,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit, burst=args.burst,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        keys=tuple(k.strip() for k in args.keys.split(",") if k.strip()), fixtures=args.fixtures or None,
+    ))
+    api = mock.serve(args.host, args.port)
+    store = mock.serve(args.host, args.port + 1, store=True)
+    print(f"Mock Steam Web API on {url_of(api)}, store on {url_of(store)} ({len(mock.catalog)} apps)")
+    print(f"  export STEAM_API_BASE_URL={url_of(api)} STEAM_STORE_URL={url_of(store)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.shutdown()
+        store.shutdown()
+        print(json.dumps(mock.stats, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
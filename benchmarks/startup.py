@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for every entry point.
+
+For each script this measures, over several fresh interpreters:
+  * import time: the sum of top-level imports reported by ``python -X importtime``
+  * time to first output: wall time from spawn until the first byte on stdout/stderr
+
+Every entry point is reported, but by default only the import totals of the
+entry points that defer their heavy imports (``GATED_ENTRY_POINTS``) are
+compared with ``benchmarks/startup_baseline.json``: those totals are small and
+stable between runs, while eager tools and time-to-first-output swing with disk
+cache and machine load. ``--check-first-output`` adds the wall-clock metric
+(with its own, larger slack) and ``--all`` gates every entry point.
+
+The numbers are absolute milliseconds, so the baseline is only meaningful on
+the machine that wrote it. Regenerate it locally before comparing:
+
+    python benchmarks/startup.py --update-baseline   # once per machine, and after intentional changes
+    python benchmarks/startup.py
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(project_root, "benchmarks", "startup_baseline.json")
+
+# Script -> arguments that reach the first output without network access.
+# Interactive tools get EOF on stdin, so they print their prompt/menu and stop.
+ENTRY_POINTS: Dict[str, List[str]] = {
+    "steam_manager.py": [],
+    "scripts/fetch_and_load.py": ["--help"],
+    "tools/fetch_games.py": ["--help"],
+    "tools/refresh_daemon.py": ["--help"],
+    "tools/init_db.py": [],
+    "tools/test_connection.py": [],
+    "tools/view_data.py": [],
+    "tools/database_explorer.py": [],
+    "tools/find_game_ids.py": [],
+    "tools/fetch_all_owned_games.py": [],
+    "tools/create_ownership_view.py": [],
+    "tools/add_game_names_to_ownerships.py": [],
+}
+
+# Entry points that load requests/SQLAlchemy only after argument parsing; their import totals are gated
+GATED_ENTRY_POINTS = (
+    "steam_manager.py",
+    "scripts/fetch_and_load.py",
+    "tools/fetch_games.py",
+    "tools/refresh_daemon.py",
+    "tools/find_game_ids.py",
+)
+
+INTERPRETER_MODULES = frozenset({"site"})
+
+
+def _env(workdir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("STEAM_API_KEY", "benchmark")
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    env["PYTHONUNBUFFERED"] = "1"
+    # scripts/ modules rely on the project root being importable
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [project_root, env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def import_time_ms(script: str, args: List[str], env: Dict[str, str], cwd: str) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(project_root, script), *args],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        env=env, cwd=cwd, timeout=60,
+    )
+    total_us = 0
+    for line in proc.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or parts[1].strip() == "cumulative":
+            continue
+        name = parts[2]
+        # Top-level imports have exactly one space after the bar; nested ones are indented.
+        # ``site`` is interpreter startup (.pth hooks of the environment), not the entry point's cost.
+        if name.startswith(" ") and not name.startswith("  ") and name.strip() not in INTERPRETER_MODULES:
+            total_us += int(parts[1])
+    return total_us / 1000.0
+
+
+def first_output_ms(script: str, args: List[str], env: Dict[str, str], cwd: str) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(project_root, script), *args],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        env=env, cwd=cwd,
+    )
+    try:
+        proc.stdout.read(1)
+        return (time.perf_counter() - started) * 1000.0
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def measure(repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _env(workdir)
+        # Tools that read tables need a schema to reach their first line of output
+        subprocess.run([sys.executable, os.path.join(project_root, "tools", "init_db.py")],
+                       env=env, cwd=workdir, capture_output=True, timeout=60)
+        for script, args in ENTRY_POINTS.items():
+            imports = min(import_time_ms(script, args, env, workdir) for _ in range(repeat))
+            first = min(first_output_ms(script, args, env, workdir) for _ in range(repeat))
+            results[script] = {"import_ms": round(imports, 1), "first_output_ms": round(first, 1)}
+            print(f"{script:<42} imports {imports:8.1f} ms   first output {first:8.1f} ms")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float, slack_ms: float, first_output_slack_ms: Optional[float] = None,
+            scripts: Optional[Iterable[str]] = None) -> List[Tuple[str, str, float, float]]:
+    """Regressions among ``scripts`` (default: all); first output is only checked when its slack is given."""
+    slacks = {"import_ms": slack_ms}
+    if first_output_slack_ms is not None:
+        slacks["first_output_ms"] = first_output_slack_ms
+    selected = set(results if scripts is None else scripts)
+    regressions = []
+    for script, metrics in results.items():
+        base = baseline.get(script)
+        if not base or script not in selected:
+            continue
+        for metric, slack in slacks.items():
+            if metric not in metrics or metric not in base:
+                continue
+            limit = base[metric] * (1 + threshold) + slack
+            if metrics[metric] > limit:
+                regressions.append((script, metric, metrics[metric], base[metric]))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time and time to first output per entry point")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per entry point; the fastest is kept (default 5)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default 0.25)")
+    parser.add_argument("--slack-ms", type=float, default=20.0, help="Absolute noise allowance for import time in ms (default 20)")
+    parser.add_argument("--check-first-output", action="store_true", help="Also gate time to first output")
+    parser.add_argument("--first-output-slack-ms", type=float, default=150.0, help="Absolute noise allowance for first output in ms (default 150)")
+    parser.add_argument("--all", action="store_true", help="Gate every entry point, not only the deferred-import ones")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--output", default="", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(max(1, args.repeat))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline first")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(
+        results, baseline, args.threshold, args.slack_ms,
+        first_output_slack_ms=args.first_output_slack_ms if args.check_first_output else None,
+        scripts=None if args.all else GATED_ENTRY_POINTS,
+    )
+    for script, metric, value, base in regressions:
+        print(f"REGRESSION {script} {metric}: {value:.1f} ms (baseline {base:.1f} ms)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
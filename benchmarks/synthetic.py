@@ -0,0 +1,182 @@
+"""Seeded generator of realistic Steam API payloads.
+
+Everything is derived from one ``random.Random(seed)`` per stream, so the same seed
+and scale give byte-identical payloads on every machine. Shapes follow the real
+endpoints closely enough for the transforms and the client to treat them as the
+real thing:
+
+  * ``app_list``            ISteamApps/GetAppList
+  * ``appdetails``          store/api/appdetails (``basic`` or ``full`` payloads, ~3% success=false)
+  * ``global_achievements`` ISteamUserStats/GetGlobalAchievementPercentagesForApp
+  * ``owned_games``         IPlayerService/GetOwnedGames, long-tail library sizes and playtime
+
+Large scales are produced lazily (``iter_*``) so a million-row run never holds
+every payload in memory at once.
+"""
+
+import math
+import random
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+_ADJECTIVES = (
+    "Dark", "Lost", "Eternal", "Crimson", "Silent", "Hollow", "Iron", "Neon", "Ancient", "Broken",
+    "Frozen", "Hidden", "Last", "Wild", "Golden", "Shattered", "Infinite", "Forgotten", "Arcane", "Stellar",
+)
+_NOUNS = (
+    "Kingdom", "Frontier", "Legacy", "Horizon", "Dungeon", "Odyssey", "Empire", "Protocol", "Tactics", "Valley",
+    "Chronicles", "Outpost", "Station", "Colony", "Arena", "Harbor", "Requiem", "Garden", "Circuit", "Saga",
+)
+_SUFFIXES = ("", "", "", " II", " III", ": Remastered", " Online", " VR", " Deluxe Edition", " - Soundtrack")
+_TYPES = (("game", 0.78), ("dlc", 0.14), ("demo", 0.04), ("music", 0.03), ("video", 0.01))
+_FILLER = (
+    "Explore a vast world full of secrets. Build, craft and survive with friends in co-op or go it alone. "
+    "Every choice matters as the story branches across dozens of endings. "
+)
+
+
+def _rng(seed: int, stream: str) -> random.Random:
+    return random.Random(f"{seed}:{stream}")
+
+
+def app_ids(count: int, seed: int = 0) -> List[int]:
+    """Distinct, sorted appids; real ones are mostly multiples of 10."""
+    rng = _rng(seed, "appids")
+    return sorted(value * 10 for value in rng.sample(range(1, max(count * 3, 1000)), count))
+
+
+def app_name(appid: int, seed: int = 0) -> str:
+    rng = _rng(seed, f"name:{appid}")
+    return f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)}{rng.choice(_SUFFIXES)}"
+
+
+def app_list(appids: Sequence[int], seed: int = 0) -> Dict[str, Any]:
+    return {"applist": {"apps": [{"appid": appid, "name": app_name(appid, seed)} for appid in appids]}}
+
+
+def _app_type(rng: random.Random) -> str:
+    roll = rng.random()
+    for name, share in _TYPES:
+        if roll < share:
+            return name
+        roll -= share
+    return "game"
+
+
+def appdetails(appids: Sequence[int], seed: int = 0, profile: str = "full", detail_scale: float = 1.0) -> Dict[str, Any]:
+    """A store appdetails response for ``appids``; ``basic`` drops the bulky fields like the filter does.
+
+    ``detail_scale`` multiplies the length of ``detailed_description`` in full payloads.
+    """
+    response: Dict[str, Any] = {}
+    for appid in appids:
+        rng = _rng(seed, f"details:{appid}")
+        if rng.random() < 0.03:
+            response[str(appid)] = {"success": False}
+            continue
+        is_free = rng.random() < 0.12
+        data: Dict[str, Any] = {
+            "type": _app_type(rng),
+            "name": app_name(appid, seed),
+            "steam_appid": appid,
+            "is_free": is_free,
+        }
+        if profile == "full":
+            data["short_description"] = _FILLER[: rng.randint(80, len(_FILLER))]
+            data["detailed_description"] = _FILLER * max(1, int(rng.randint(5, 40) * detail_scale))
+            data["categories"] = [{"id": i, "description": f"Category {i}"} for i in rng.sample(range(1, 60), rng.randint(1, 8))]
+            data["genres"] = [{"id": str(i), "description": f"Genre {i}"} for i in rng.sample(range(1, 40), rng.randint(1, 4))]
+            data["screenshots"] = [
+                {"id": i, "path_full": f"https://cdn.example/steam/apps/{appid}/ss_{i}.jpg"} for i in range(rng.randint(3, 15))
+            ]
+            if not is_free:
+                cents = rng.choice((499, 999, 1499, 1999, 2999, 3999, 5999, 6999))
+                data["price_overview"] = {"currency": "USD", "initial": cents, "final": cents, "discount_percent": 0}
+        elif profile == "price" and not is_free:
+            data = {"price_overview": {"currency": "USD", "initial": 999, "final": 999, "discount_percent": 0}}
+        response[str(appid)] = {"success": True, "data": data}
+    return response
+
+
+def achievement_count(appid: int, seed: int = 0, mean: float = 10.0) -> int:
+    """Roughly a third of apps have none; the rest follow a long tail around ``mean * 1.5``."""
+    rng = _rng(seed, f"achcount:{appid}")
+    if rng.random() < 1 / 3:
+        return 0
+    return min(5000, max(1, int(rng.expovariate(1 / (mean * 1.5)))))
+
+
+def global_achievements(appid: int, count: int, seed: int = 0) -> Dict[str, Any]:
+    """Percentages decay from common unlocks to a few rare ones, as on real apps."""
+    rng = _rng(seed, f"ach:{appid}")
+    achievements = []
+    for i in range(count):
+        percent = 100.0 * math.exp(-4.0 * (i + rng.random()) / max(count, 1)) * rng.uniform(0.6, 1.0)
+        achievements.append({"name": f"ACH_{appid}_{i}", "percent": round(percent, 6)})
+    return {"achievementpercentages": {"achievements": achievements}}
+
+
+def steamid(index: int) -> str:
+    return str(76561197960265728 + index)
+
+
+def library_size(rng: random.Random, mean: int) -> int:
+    # Lognormal: most libraries are modest, a few collectors own thousands
+    return max(1, min(mean * 40, int(rng.lognormvariate(math.log(mean) - 0.5, 1.0))))
+
+
+def playtime_minutes(rng: random.Random) -> int:
+    # ~40% never launched; the rest Pareto-distributed up to a few thousand hours
+    if rng.random() < 0.4:
+        return 0
+    return min(300_000, int(rng.paretovariate(1.1) * 20))
+
+
+def owned_games(user: int, catalog: Sequence[int], size: int, seed: int = 0, include_appinfo: bool = True) -> Dict[str, Any]:
+    rng = _rng(seed, f"owned:{user}")
+    # Popular apps (low catalog index) are owned far more often than the tail
+    target = min(size, len(catalog))
+    picked = set()
+    for _ in range(target * 3):
+        if len(picked) >= target:
+            break
+        picked.add(catalog[min(len(catalog) - 1, int(rng.expovariate(8.0 / len(catalog))))])
+    if len(picked) < target:
+        # Huge libraries reach into the tail; fill uniformly instead of waiting on rare draws
+        remaining = [appid for appid in catalog if appid not in picked]
+        picked.update(rng.sample(remaining, target - len(picked)))
+    games = []
+    for appid in sorted(picked):
+        game: Dict[str, Any] = {"appid": appid, "playtime_forever": playtime_minutes(rng)}
+        if game["playtime_forever"] and rng.random() < 0.1:
+            game["playtime_2weeks"] = min(game["playtime_forever"], rng.randint(1, 1200))
+        if include_appinfo:
+            game["name"] = app_name(appid, seed)
+            game["img_icon_url"] = f"{rng.getrandbits(160):040x}"
+            game["has_community_visible_stats"] = rng.random() < 0.6
+        games.append(game)
+    return {"response": {"game_count": len(games), "games": games}}
+
+
+def iter_owned_games(rows: int, catalog: Sequence[int], seed: int = 0, mean_library: int = 200,
+                     include_appinfo: bool = True) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(steamid, response) per user until about ``rows`` ownership rows have been produced."""
+    rng = _rng(seed, "libraries")
+    produced = 0
+    user = 0
+    while produced < rows:
+        size = min(library_size(rng, mean_library), rows - produced)
+        response = owned_games(user, catalog, size, seed, include_appinfo)
+        produced += len(response["response"]["games"])
+        yield steamid(user), response
+        user += 1
+
+
+def iter_achievements(rows: int, appids: Sequence[int], seed: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(appid, response) per app until about ``rows`` achievement rows have been produced."""
+    produced = 0
+    for appid in appids:
+        if produced >= rows:
+            return
+        count = min(achievement_count(appid, seed), rows - produced)
+        produced += count
+        yield appid, global_achievements(appid, count, seed)
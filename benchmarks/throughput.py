@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for the ETL path on synthetic data.
+
+Generates seeded payloads (``benchmarks/synthetic.py``) at each requested scale
+and times, per database backend:
+
+  * transforms:  ``transform_appdetails_to_games``, ``transform_global_achievements``, ``transform_owned_games``
+  * upserts:     ``upsert_games`` (new rows, then unchanged rows), ``upsert_achievements``, ``upsert_ownerships``
+  * bulk ingest: ``bulk_upsert_ownerships`` staging and merge, timed separately
+  * name sync:   lean ownership naming from the games table, and the
+                 ``update_ownership_names`` backfill of ``tools/fetch_all_owned_games.py``
+  * queries:     the summary/explorer queries of ``tools/database_explorer.py`` and ``tools/view_data.py``
+
+A scale is the number of ownership and achievement rows; the catalog has a tenth
+as many apps. Payload generation is never inside a timed section.
+
+Results are written as JSON and compared with ``benchmarks/throughput_baseline.json``:
+the run fails when any throughput falls more than ``--threshold`` below the
+baseline. Like the startup baseline, the numbers only mean something on the
+machine that wrote them:
+
+    python benchmarks/throughput.py --update-baseline        # once per machine (1k, SQLite)
+    python benchmarks/throughput.py                          # compare
+    python benchmarks/throughput.py --scale 1k,100k,1m --database-url postgresql+psycopg2://.../bench
+
+``--database-url`` should point at a scratch database: the tables are created
+before and dropped after the run. SQLite always runs on a temporary file.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks import synthetic  # noqa: E402
+
+BASELINE_PATH = os.path.join(project_root, "benchmarks", "throughput_baseline.json")
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SEED = 20240501
+# Rows per commit during loads; one transaction per payload would measure fsync, not the pipeline
+COMMIT_EVERY = 2_000
+
+
+class Timings:
+    def __init__(self) -> None:
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, items: int, seconds: float) -> None:
+        entry = self.results.setdefault(name, {"items": 0, "seconds": 0.0})
+        entry["items"] += items
+        entry["seconds"] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, name: str, items: int = 1):
+        started = time.perf_counter()
+        yield
+        self.add(name, items, time.perf_counter() - started)
+
+    def finish(self) -> Dict[str, Dict[str, float]]:
+        for entry in self.results.values():
+            entry["seconds"] = round(entry["seconds"], 4)
+            entry["per_second"] = round(entry["items"] / entry["seconds"], 1) if entry["seconds"] else 0.0
+        return self.results
+
+
+def _load_tool(name: str):
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", os.path.join(project_root, "tools", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _use_database(database_url: str) -> None:
+    # The tools read DATABASE_URL through the cached settings object
+    from steam_explorer import config
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("STEAM_API_KEY", "benchmark")
+    config._settings = None
+
+
+def _chunked_commits(SessionLocal, work: Iterable[Tuple[int, Callable[[Any], None]]]) -> None:
+    """Run ``(rows, fn(session))`` units, committing every COMMIT_EVERY rows."""
+    session = SessionLocal()
+    pending = 0
+    try:
+        for rows, fn in work:
+            fn(session)
+            pending += rows
+            if pending >= COMMIT_EVERY:
+                session.commit()
+                session.expunge_all()
+                pending = 0
+        session.commit()
+    finally:
+        session.close()
+
+
+def run_backend(database_url: str, rows: int, seed: int = SEED) -> Dict[str, Dict[str, float]]:
+    from steam_explorer.db import get_engine, get_sessionmaker
+    from steam_explorer.etl.pipeline import (
+        transform_appdetails_to_games,
+        transform_global_achievements,
+        transform_owned_games,
+        upsert_achievements,
+        upsert_games,
+        upsert_ownerships,
+    )
+    from steam_explorer.models import Base, Ownership
+
+    engine = get_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = get_sessionmaker(database_url)
+    timings = Timings()
+    catalog = synthetic.app_ids(max(100, rows // 10), seed)
+
+    try:
+        # Games: appdetails arrive in batches of 50
+        payloads = [synthetic.appdetails(catalog[i:i + 50], seed, profile="basic") for i in range(0, len(catalog), 50)]
+
+        def load_games(name: str, time_transform: bool = True):
+            for payload in payloads:
+                with timings.timed("transform_appdetails", len(payload)) if time_transform else contextlib.nullcontext():
+                    games = transform_appdetails_to_games(payload)
+
+                def fn(session, games=games):
+                    with timings.timed(name, len(games)):
+                        upsert_games(session, games)
+                yield len(games), fn
+
+        _chunked_commits(SessionLocal, load_games("upsert_games_new"))
+        # Same content again: every row should be skipped by the content hash
+        _chunked_commits(SessionLocal, load_games("upsert_games_unchanged", time_transform=False))
+
+        def load_achievements():
+            for appid, payload in synthetic.iter_achievements(rows, catalog, seed):
+                count = len(payload["achievementpercentages"]["achievements"])
+                with timings.timed("transform_achievements", count):
+                    achievements = transform_global_achievements(appid, payload)
+
+                def fn(session, achievements=achievements):
+                    with timings.timed("upsert_achievements", len(achievements)):
+                        upsert_achievements(session, achievements)
+                yield len(achievements), fn
+
+        _chunked_commits(SessionLocal, load_achievements())
+
+        def load_ownerships():
+            for steamid, payload in synthetic.iter_owned_games(rows, catalog, seed):
+                games = payload["response"]["games"]
+                with timings.timed("transform_owned_games", len(games)):
+                    ownerships = transform_owned_games(steamid, payload)
+
+                def fn(session, ownerships=ownerships):
+                    with timings.timed("upsert_ownerships", len(ownerships)):
+                        upsert_ownerships(session, ownerships)
+                yield len(ownerships), fn
+
+        _chunked_commits(SessionLocal, load_ownerships())
+
+        # The same volume again through the staging table and set-based merge (new users)
+        from steam_explorer import bulk
+        from steam_explorer.etl.bulk_ingest import bulk_upsert_ownerships
+
+        replay = [row for steamid, payload in synthetic.iter_owned_games(rows, catalog, seed + 2)
+                  for row in transform_owned_games(steamid, payload)]
+        bulk_engine = bulk.bulk_engine(database_url)
+        with bulk_engine.begin() as conn:
+            result = bulk_upsert_ownerships(conn, replay)
+        bulk_engine.dispose()
+        timings.add("bulk_stage_ownerships", result.staged, result.stage_seconds)
+        timings.add("bulk_merge_ownerships", result.staged, result.merge_seconds)
+
+        # Name sync: lean responses named from the games table ...
+        with SessionLocal() as session:
+            for steamid, payload in synthetic.iter_owned_games(max(1, rows // 10), catalog, seed + 1, include_appinfo=False):
+                with timings.timed("name_lookup", len(payload["response"]["games"])):
+                    transform_owned_games(steamid, payload, session=session)
+
+        # ... and the backfill over ownerships that lost their names
+        with SessionLocal.begin() as session:
+            ids = [row_id for (row_id,) in session.query(Ownership.id).order_by(Ownership.id).limit(max(1, rows // 10))]
+            for i in range(0, len(ids), 500):
+                session.query(Ownership).filter(Ownership.id.in_(ids[i:i + 500])).update(
+                    {Ownership.game_name: None}, synchronize_session=False
+                )
+        _use_database(database_url)
+        fetch_tool = _load_tool("fetch_all_owned_games")
+        with contextlib.redirect_stdout(io.StringIO()), timings.timed("name_backfill", len(ids)):
+            fetch_tool.update_ownership_names()
+
+        explorer = _load_tool("database_explorer")
+        view_data = _load_tool("view_data")
+        with contextlib.redirect_stdout(io.StringIO()):
+            with SessionLocal() as session:
+                for query in ("show_summary", "show_owned_games", "show_games", "show_achievements", "show_top_playtime"):
+                    with timings.timed(f"query_{query[len('show_'):]}"):
+                        getattr(explorer, query)(session)
+            with timings.timed("query_view_data"):
+                view_data.main()
+    finally:
+        if not database_url.startswith("sqlite"):
+            Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+    return timings.finish()
+
+
+def _backend_name(database_url: str) -> str:
+    return database_url.split(":", 1)[0].split("+", 1)[0]
+
+
+def _reachable(database_url: str) -> bool:
+    from sqlalchemy import create_engine, text
+
+    try:
+        engine = create_engine(database_url)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        engine.dispose()
+        return True
+    except Exception as exc:
+        print(f"Skipping {_backend_name(database_url)}: {exc.__class__.__name__}: {str(exc).splitlines()[0]}")
+        return False
+
+
+def measure(scales: List[str], database_urls: List[str], seed: int = SEED) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """``{"<backend>/<scale>": {benchmark: {items, seconds, per_second}}}``"""
+    # Progress logging from the pipeline would dominate the small scales
+    import logging
+    logging.getLogger("steam_explorer").setLevel(logging.WARNING)
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        backends = [f"sqlite:///{os.path.join(workdir, 'throughput.db')}"]
+        backends += [url for url in database_urls if _reachable(url)]
+        for database_url in backends:
+            for scale in scales:
+                key = f"{_backend_name(database_url)}/{scale}"
+                print(f"== {key}")
+                results[key] = run_backend(database_url, SCALES[scale], seed)
+                for name, entry in results[key].items():
+                    print(f"   {name:<28} {entry['items']:>9} items {entry['seconds']:>9.3f} s {entry['per_second']:>12.1f} /s")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]], baseline: Dict[str, Dict[str, Dict[str, float]]],
+            threshold: float, min_seconds: float) -> List[Tuple[str, str, float, float]]:
+    """Benchmarks whose throughput fell more than ``threshold`` below the baseline.
+
+    Timings shorter than ``min_seconds`` in both runs are too noisy to gate and are skipped.
+    """
+    regressions = []
+    for key, benchmarks in results.items():
+        for name, entry in benchmarks.items():
+            base = baseline.get(key, {}).get(name)
+            if not base or not base.get("per_second"):
+                continue
+            if entry["seconds"] < min_seconds and base["seconds"] < min_seconds:
+                continue
+            if entry["per_second"] < base["per_second"] * (1 - threshold):
+                regressions.append((key, name, entry["per_second"], base["per_second"]))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure ETL throughput on seeded synthetic Steam data")
+    parser.add_argument("--scale", default="1k", help=f"Comma-separated scales from {', '.join(SCALES)} (default 1k)")
+    parser.add_argument("--database-url", action="append", default=[],
+                        help="Also benchmark this (scratch!) Postgres/MySQL database; repeatable. Unreachable ones are skipped")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"Generator seed (default {SEED})")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed relative throughput drop (default 0.3)")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Ignore timings shorter than this when comparing (default 0.05)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument("--update-baseline", action="store_true", help="Merge results into the baseline instead of comparing")
+    parser.add_argument("--output", default="", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip().lower() for s in args.scale.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    results = measure(scales, args.database_url, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not baseline:
+        print("No baseline found; run with --update-baseline first")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    for key, name, value, base in regressions:
+        print(f"REGRESSION {key} {name}: {value:.1f}/s (baseline {base:.1f}/s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
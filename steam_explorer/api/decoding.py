@@ -0,0 +1,193 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import codecs
+import json
+import time
+
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+Decoder = Callable[[bytes], Any]
+
+# Tried in order when no decoder is named; all but "json" are optional dependencies
+DECODER_PREFERENCE = ("orjson", "msgspec", "json")
+
+
+def _load_decoder(name: str) -> Decoder:
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+        return msgspec.json.decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"Unknown JSON decoder: {name}")
+
+
+_decoders: Dict[Optional[str], Tuple[str, Decoder]] = {}
+
+
+def get_decoder(name: Optional[str] = None) -> Tuple[str, Decoder]:
+    """(name, loads) for ``name``, or the fastest installed decoder when ``name`` is None."""
+    cached = _decoders.get(name)
+    if cached is not None:
+        return cached
+    for candidate in ([name] if name else DECODER_PREFERENCE):
+        try:
+            decoder = (candidate, _load_decoder(candidate))
+            break
+        except ImportError:
+            if name:
+                raise
+    logger.debug(f"Using {decoder[0]} for JSON decoding")
+    _decoders[name] = decoder
+    return decoder
+
+
+class DecodeStats:
+    """Time spent waiting on the network vs turning bytes into objects."""
+
+    def __init__(self) -> None:
+        self.network_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.bytes = 0
+        self.items = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "network_seconds": round(self.network_seconds, 4),
+            "decode_seconds": round(self.decode_seconds, 4),
+            "bytes": self.bytes,
+            "items": self.items,
+        }
+
+
+_WHITESPACE = " \t\r\n"
+
+
+def _string_end(buf: str, start: int) -> int:
+    """Index just past the string starting at ``buf[start] == '"'``, or -1 if incomplete."""
+    i = start + 1
+    while True:
+        i = buf.find('"', i)
+        if i < 0:
+            return -1
+        backslashes = 0
+        j = i - 1
+        while buf[j] == "\\":
+            backslashes += 1
+            j -= 1
+        if backslashes % 2 == 0:
+            return i + 1
+        i += 1
+
+
+def iter_json_array(
+    chunks: Iterable[bytes],
+    path: Sequence[str],
+    stats: Optional[DecodeStats] = None,
+) -> Iterator[Any]:
+    """Yield the elements of the array at ``path`` (object keys) as they arrive.
+
+    Only the bytes of one element at a time are held besides the unread tail, so a
+    multi-megabyte ``{"response": {"games": [...]}}`` starts flowing into transforms
+    after the first chunk. Yields nothing if the path is absent.
+    """
+    stats = stats or DecodeStats()
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    source = iter(chunks)
+    buf = ""
+    pos = 0
+    exhausted = False
+
+    def more() -> bool:
+        nonlocal buf, pos, exhausted
+        if exhausted:
+            return False
+        started = time.perf_counter()
+        chunk = next(source, None)
+        stats.network_seconds += time.perf_counter() - started
+        if chunk is None:
+            exhausted = True
+            buf = buf[pos:] + text.decode(b"", final=True)
+        else:
+            stats.bytes += len(chunk)
+            buf = buf[pos:] + text.decode(chunk)
+        pos = 0
+        return True
+
+    # Phase 1: walk the document structure until the array at ``path`` opens
+    target = list(path)
+    keys: List[Optional[str]] = []   # key under which each open container sits
+    kinds: List[str] = []            # "{" or "[" per open container
+    pending_key: Optional[str] = None
+    expecting_key = False
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if not more():
+                return
+            continue
+        ch = buf[pos]
+        if ch == '"':
+            end = _string_end(buf, pos)
+            if end < 0:
+                if not more():
+                    return
+                continue
+            if expecting_key:
+                pending_key = json.loads(buf[pos:end])
+                expecting_key = False
+            pos = end
+        elif ch in "{[":
+            if ch == "[" and kinds and kinds[-1] == "{" and keys[1:] + [pending_key] == target:
+                pos += 1
+                break
+            keys.append(pending_key if kinds and kinds[-1] == "{" else None)
+            kinds.append(ch)
+            pending_key = None
+            expecting_key = ch == "{"
+            pos += 1
+        elif ch in "}]":
+            keys.pop()
+            kinds.pop()
+            if not kinds:
+                return
+            pos += 1
+        elif ch == ",":
+            expecting_key = kinds[-1] == "{"
+            pos += 1
+        else:
+            # ':' or a scalar value; scalars end at the next delimiter
+            pos += 1
+
+    # Phase 2: decode one element at a time
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buf):
+            if not more():
+                raise ValueError("JSON array ended unexpectedly")
+            continue
+        if buf[pos] == "]":
+            return
+        started = time.perf_counter()
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            complete = end < len(buf) or exhausted
+        except json.JSONDecodeError:
+            complete = False
+        stats.decode_seconds += time.perf_counter() - started
+        if not complete:
+            # Element (or a trailing number) is cut off at the chunk boundary
+            if not more():
+                raise ValueError("JSON array ended unexpectedly")
+            continue
+        pos = end
+        stats.items += 1
+        yield item
@@ -0,0 +1,120 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+import time
+
+from .. import metrics
+from ..logging_utils import get_logger
+from .rate_control import AimdRateLimiter
+
+
+logger = get_logger(__name__)
+
+THROTTLE_REST_SECONDS = 60.0       # first rest after a 429, doubling per consecutive 429
+THROTTLE_REST_MAX_SECONDS = 900.0
+FORBIDDEN_REST_SECONDS = 3600.0    # 403: key revoked, wrong domain or over its daily quota
+
+
+@dataclass
+class KeyState:
+    key: str
+    limiter: AimdRateLimiter = field(repr=False)
+    requests: int = 0
+    throttled: int = 0
+    forbidden: int = 0
+    consecutive_throttles: int = 0
+    rest_until: float = 0.0
+
+    @property
+    def label(self) -> str:
+        # Never log a whole key
+        return f"...{self.key[-4:]}"
+
+
+class KeyPool:
+    """Web API keys with per-key pacing; each request goes to the key that can send soonest.
+
+    Every key has its own adaptive (AIMD) rate starting at ``requests_per_second``,
+    so aggregate throughput grows with the number of keys. A 429 halves the key's
+    rate and rests it with doubling back-off (or for ``Retry-After``), a 403 rests
+    it for an hour; ``report`` feeds those results back after each request.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        requests_per_second: float = 2.0,
+        max_rps: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        unique = list(dict.fromkeys(k for k in keys if k))
+        if not unique:
+            raise ValueError("KeyPool needs at least one API key")
+        self.keys: List[KeyState] = [
+            KeyState(key, AimdRateLimiter(f"API key ...{key[-4:]}", requests_per_second, max_rps=max_rps, clock=clock))
+            for key in unique
+        ]
+        self._clock = clock
+        self._sleep = sleep
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def set_requests_per_second(self, requests_per_second: float) -> None:
+        for state in self.keys:
+            state.limiter.set_rate(requests_per_second)
+
+    def _ready_at(self, state: KeyState) -> float:
+        return max(state.limiter.ready_at(), state.rest_until)
+
+    def acquire(self) -> KeyState:
+        """Wait for the least-loaded usable key and charge one request to it."""
+        state = min(self.keys, key=lambda s: (self._ready_at(s), s.requests))
+        wait = self._ready_at(state) - self._clock()
+        if wait > 0:
+            if state.rest_until > state.limiter.ready_at():
+                logger.info(f"All API keys are resting; waiting {wait:.1f}s for key {state.label}")
+            metrics.inc("steam_ratelimit_sleep_seconds_total", wait, host="api_keys", reason="key")
+            self._sleep(wait)
+        state.requests += 1
+        state.limiter.charge()
+        return state
+
+    def report(self, state: KeyState, status_code: int, retry_after: Optional[float] = None) -> None:
+        now = self._clock()
+        if status_code == 429:
+            state.throttled += 1
+            state.consecutive_throttles += 1
+            rest = min(THROTTLE_REST_SECONDS * 2 ** (state.consecutive_throttles - 1), THROTTLE_REST_MAX_SECONDS)
+            rest = max(rest, retry_after or 0.0)
+            state.rest_until = now + rest
+            state.limiter.on_throttle()
+            logger.warning(f"API key {state.label} throttled (429); resting {rest:.0f}s")
+        elif status_code == 403:
+            state.forbidden += 1
+            state.rest_until = now + FORBIDDEN_REST_SECONDS
+            logger.warning(f"API key {state.label} forbidden (403); resting {FORBIDDEN_REST_SECONDS:.0f}s")
+        elif status_code >= 500:
+            state.limiter.on_throttle()
+        elif status_code < 400:
+            state.consecutive_throttles = 0
+            state.limiter.on_success()
+
+    def healthy(self) -> int:
+        now = self._clock()
+        return sum(1 for s in self.keys if s.rest_until <= now)
+
+    def stats(self) -> List[Dict[str, object]]:
+        now = self._clock()
+        return [
+            {
+                "key": s.label,
+                "requests": s.requests,
+                "rps": round(s.limiter.rate, 2),
+                "throttled": s.throttled,
+                "forbidden": s.forbidden,
+                "resting_for": round(max(0.0, s.rest_until - now), 1),
+            }
+            for s in self.keys
+        ]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Optional, Tuple
+import time
+
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+RATE_LOG_INTERVAL_SECONDS = 30.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class AimdRateLimiter:
+    """Pacing whose rate follows additive-increase / multiplicative-decrease.
+
+    Every success adds ``increase`` rps per second of sending at the current rate
+    (so the ramp is the same at any rate); a throttle or server error multiplies
+    the rate by ``decrease`` and may pause sending (e.g. for ``Retry-After``). The
+    rate settles just under what the server sustains instead of a fixed guess.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float = 2.0,
+        min_rps: float = 0.05,
+        max_rps: float = 10.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.min_rps = min_rps
+        self.max_rps = max(min_rps, max_rps)
+        self.increase = increase
+        self.decrease = decrease
+        self.rate = self._clamp(requests_per_second)
+        self.next_allowed_at = 0.0
+        self.pause_until = 0.0
+        self.history: Deque[Tuple[float, float]] = deque(maxlen=1000)
+        self._clock = clock
+        self._last_logged_at = 0.0
+        self._last_logged_rate = self.rate
+
+    def _clamp(self, rate: float) -> float:
+        return min(self.max_rps, max(self.min_rps, rate))
+
+    def set_rate(self, requests_per_second: float) -> None:
+        self.rate = self._clamp(requests_per_second)
+        self._record(force=True)
+
+    def ready_at(self) -> float:
+        return max(self.next_allowed_at, self.pause_until)
+
+    def charge(self) -> None:
+        """Account for one request sent now."""
+        self.next_allowed_at = self._clock() + 1.0 / self.rate
+
+    def on_success(self) -> None:
+        if self.rate < self.max_rps:
+            self.rate = self._clamp(self.rate + self.increase / self.rate)
+            self._record()
+
+    def on_throttle(self, pause: Optional[float] = None) -> None:
+        self.rate = self._clamp(self.rate * self.decrease)
+        if pause:
+            self.pause_until = max(self.pause_until, self._clock() + pause)
+        self._record(force=True)
+
+    def _record(self, force: bool = False) -> None:
+        now = self._clock()
+        self.history.append((now, self.rate))
+        if force or now - self._last_logged_at >= RATE_LOG_INTERVAL_SECONDS:
+            if abs(self.rate - self._last_logged_rate) >= 0.01:
+                logger.info(f"{self.name} rate {self._last_logged_rate:.2f} -> {self.rate:.2f} rps")
+                self._last_logged_rate = self.rate
+            self._last_logged_at = now
+
+
+class CircuitBreaker:
+    """Stops sending to a host after ``threshold`` consecutive failures.
+
+    While open, ``delay`` reports how long to wait; after the cooldown one probe
+    request goes through (half-open). A failed probe reopens the circuit with a
+    doubled cooldown, up to ``max_cooldown``; any success closes it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = 5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0
+        self._cooldown = cooldown
+        self._clock = clock
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    def delay(self) -> float:
+        if not self.is_open:
+            return 0.0
+        return max(0.0, self.open_until - self._clock())
+
+    def record_success(self) -> None:
+        if self.is_open:
+            logger.info(f"{self.name} circuit closed")
+        self.failures = 0
+        self._cooldown = self.base_cooldown
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures == self.threshold:
+            self._open()
+        elif self.failures > self.threshold:
+            # The half-open probe failed
+            self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+            self._open()
+
+    def _open(self) -> None:
+        self.opened += 1
+        self.open_until = self._clock() + self._cooldown
+        logger.warning(f"{self.name} circuit open after {self.failures} consecutive failures; pausing {self._cooldown:.0f}s")
@@ -1,91 +1,309 @@
 from __future__ import annotations
-from typing import Any, Dict, Iterable, Mapping, List
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, Iterator, Mapping, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
 import time
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
+from .. import metrics
 from ..logging_utils import get_logger
+from .decoding import DecodeStats, get_decoder, iter_json_array
+from .key_pool import KeyPool
+from .rate_control import AimdRateLimiter, CircuitBreaker, parse_retry_after
+
+if TYPE_CHECKING:
+    import requests
+
+
+API_URL = "https://api.steampowered.com"
+STORE_URL = "https://store.steampowered.com"
+
+# Store appdetails fetch profiles: name -> (``filters=`` value, top-level ``data`` fields returned).
+# "full" sends no filter and returns everything (descriptions, screenshots, movies, ...).
+APPDETAILS_PROFILES: Dict[str, Tuple[Optional[str], FrozenSet[str]]] = {
+    "basic": ("basic", frozenset({
+        "type", "name", "steam_appid", "required_age", "is_free", "dlc",
+        "short_description", "supported_languages", "header_image", "website",
+    })),
+    "price": ("price_overview", frozenset({"price_overview"})),
+    "full": (None, frozenset()),
+}
+
+
+def appdetails_profile_for(fields: Iterable[str]) -> str:
+    """Smallest fetch profile that returns every field in ``fields``; "full" if none does."""
+    needed = set(fields)
+    candidates = [
+        (len(provided), name)
+        for name, (filters, provided) in APPDETAILS_PROFILES.items()
+        if filters is not None and needed <= provided
+    ]
+    return min(candidates)[1] if candidates else "full"
+
+
+class HostControl:
+    """Adaptive rate and circuit breaker for one host."""
+
+    def __init__(self, host: str, requests_per_second: float, max_rps: float) -> None:
+        self.limiter = AimdRateLimiter(host, requests_per_second, max_rps=max_rps)
+        self.breaker = CircuitBreaker(host)
 
 
 class SteamClient:
-    def __init__(self, api_key: str, timeout_seconds: int = 20, requests_per_second: float = 2.0) -> None:
-        self.api_key = api_key
-        self.base_url = "https://api.steampowered.com"
+    """Steam Web API and store client.
+
+    Every request goes through ``_request``, which paces it per host with an AIMD
+    rate (starting at ``requests_per_second``), backs off on 429/5xx honoring
+    ``Retry-After``, and pauses a host whose circuit breaker opened. Keyed Web API
+    calls rotate through ``api_key`` plus any ``api_keys``, each key with its own
+    adaptive rate; keyless endpoints share their host's rate.
+
+    Bodies are decoded with ``decoder`` ("orjson", "msgspec", "json"; default: the
+    fastest installed). ``iter_owned_games``/``iter_app_list`` parse big arrays
+    incrementally. ``decode_stats`` splits network from decode time.
+
+    ``base_url`` and ``store_url`` replace the Web API and store hosts, e.g. with the
+    local stand-in of ``benchmarks/mock_steam.py``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout_seconds: int = 20,
+        requests_per_second: float = 2.0,
+        api_keys: Optional[Sequence[str]] = None,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        max_rps: float = 10.0,
+        decoder: Optional[str] = None,
+        base_url: Optional[str] = None,
+        store_url: Optional[str] = None,
+    ) -> None:
+        self.key_pool = KeyPool([api_key, *(api_keys or [])], requests_per_second=requests_per_second, max_rps=max_rps)
+        self.api_key = self.key_pool.keys[0].key
+        self.base_url = (base_url or API_URL).rstrip("/")
+        self.store_url = (store_url or STORE_URL).rstrip("/")
         self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_rps = max_rps
+        self.requests_per_second = requests_per_second
         self.logger = get_logger(self.__class__.__name__)
-        self.session = self._build_session()
-        self.min_interval = 1.0 / max(0.1, requests_per_second)
-        self._last_request_ts = 0.0
+        self._session: Optional[requests.Session] = None
+        self._hosts: Dict[str, HostControl] = {}
+        self.decoder_name = decoder
+        self.decode_stats = DecodeStats()
+
+    def set_requests_per_second(self, requests_per_second: float) -> None:
+        """Reset the starting rate of every host and key; AIMD adapts from there."""
+        self.requests_per_second = requests_per_second
+        for control in self._hosts.values():
+            control.limiter.set_rate(requests_per_second)
+        self.key_pool.set_requests_per_second(requests_per_second)
+
+    @property
+    def session(self) -> requests.Session:
+        # requests/urllib3 are imported on first use so importing this module stays cheap
+        if self._session is None:
+            self._session = self._build_session()
+        return self._session
 
     def _build_session(self) -> requests.Session:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
         session = requests.Session()
-        retry = Retry(
-            total=5,
-            backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"],
-            raise_on_status=False,
-        )
+        # Only connection-level retries here; status codes are handled by _request
+        retry = Retry(total=3, connect=3, read=2, status=0, backoff_factor=0.5, allowed_methods=["GET"])
         adapter = HTTPAdapter(max_retries=retry)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         return session
 
-    def _respect_rate_limit(self) -> None:
-        now = time.time()
-        elapsed = now - self._last_request_ts
-        if elapsed < self.min_interval:
-            sleep_for = self.min_interval - elapsed
-            time.sleep(sleep_for)
-        self._last_request_ts = time.time()
-
-    def _get(self, path: str, params: Mapping[str, Any]) -> Dict[str, Any]:
-        url = f"{self.base_url}/{path}"
-        self._respect_rate_limit()
-        self.logger.debug(f"GET {url} params={dict(params)}")
-        response = self.session.get(url, params=params, timeout=self.timeout_seconds)
-        self.logger.debug(f"Response status={response.status_code}")
-        response.raise_for_status()
-        return response.json()
+    def _host(self, url: str) -> HostControl:
+        host = urlsplit(url).netloc
+        control = self._hosts.get(host)
+        if control is None:
+            control = self._hosts[host] = HostControl(host, self.requests_per_second, self.max_rps)
+        return control
+
+    def _wait(self, ready_at: float, host: str) -> None:
+        delay = ready_at - time.monotonic()
+        if delay > 0:
+            metrics.inc("steam_ratelimit_sleep_seconds_total", delay, host=host, reason="rate")
+            time.sleep(delay)
+
+    def _request(self, url: str, params: Mapping[str, Any], keyed: bool = False, stream: bool = False) -> requests.Response:
+        """GET ``url`` with pacing, retries on 429/5xx and key rotation for keyed calls.
+
+        With ``stream`` the body is left unread for ``iter_content``.
+        """
+        control = self._host(url)
+        attempt = 0
+        while True:
+            pause = control.breaker.delay()
+            if pause > 0:
+                self.logger.info(f"Circuit open for {control.limiter.name}; waiting {pause:.0f}s")
+                metrics.inc("steam_ratelimit_sleep_seconds_total", pause, host=control.limiter.name, reason="circuit")
+                time.sleep(pause)
+
+            key_state = None
+            send_params = dict(params)
+            if keyed:
+                key_state = self.key_pool.acquire()
+                send_params["key"] = key_state.key
+                self.logger.debug("GET %s key=%s params=%s", url, key_state.label, params)
+            else:
+                self._wait(control.limiter.ready_at(), control.limiter.name)
+                control.limiter.charge()
+                self.logger.debug("GET %s params=%s", url, params)
+
+            started = time.perf_counter()
+            if stream:
+                response = self.session.get(url, params=send_params, timeout=self.timeout_seconds, stream=True)
+            else:
+                response = self.session.get(url, params=send_params, timeout=self.timeout_seconds)
+            elapsed = time.perf_counter() - started
+            self.decode_stats.network_seconds += elapsed
+            status = response.status_code
+            self.logger.debug("Response status=%s", status)
+            metrics.inc("steam_requests_total", host=control.limiter.name, status=status)
+            metrics.observe("steam_request_seconds", elapsed, host=control.limiter.name)
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if status in (429, 503) else None
+            if key_state is not None:
+                self.key_pool.report(key_state, status, retry_after)
+
+            if status == 429 or status >= 500:
+                if status >= 500 or key_state is None:
+                    # A 429 on one key says nothing about the host's health
+                    control.breaker.record_failure()
+                if key_state is None:
+                    control.limiter.on_throttle(retry_after or self.backoff_factor * (2 ** attempt))
+                attempt += 1
+                if attempt > self.max_retries:
+                    response.raise_for_status()
+                metrics.inc("steam_retries_total", host=control.limiter.name, status=status)
+                self.logger.debug("Retrying %s after %s (attempt %d/%d)", url, status, attempt, self.max_retries)
+                continue
+            if status == 403 and key_state is not None and attempt < len(self.key_pool) - 1 and self.key_pool.healthy():
+                # This key is rejected; another key may not be
+                attempt += 1
+                continue
+
+            control.breaker.record_success()
+            if key_state is None:
+                control.limiter.on_success()
+            response.raise_for_status()
+            return response
+
+    def _decode(self, response: requests.Response) -> Any:
+        started = time.perf_counter()
+        body = response.content
+        read_at = time.perf_counter()
+        name, loads = get_decoder(self.decoder_name)
+        data = loads(body)
+        done = time.perf_counter()
+        self.decode_stats.network_seconds += read_at - started
+        self.decode_stats.decode_seconds += done - read_at
+        self.decode_stats.bytes += len(body)
+        metrics.observe("steam_decode_seconds", done - read_at, decoder=name)
+        metrics.inc("steam_response_bytes_total", len(body))
+        self.logger.debug("Decoded %d bytes with %s in %.1f ms", len(body), name, (done - read_at) * 1000)
+        return data
+
+    def _get(self, path: str, params: Mapping[str, Any], keyed: bool = False) -> Dict[str, Any]:
+        return self._decode(self._request(f"{self.base_url}/{path}", params, keyed=keyed))
+
+    def _iter_array(self, path: str, params: Mapping[str, Any], array_path: Sequence[str], keyed: bool = False,
+                    chunk_size: int = 65536) -> Iterator[Dict[str, Any]]:
+        response = self._request(f"{self.base_url}/{path}", params, keyed=keyed, stream=True)
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size), array_path, stats=self.decode_stats)
+        finally:
+            response.close()
+
+    def rate_stats(self) -> Dict[str, Any]:
+        """Current adaptive rates and breaker state per host, and per-key usage."""
+        return {
+            "hosts": {
+                host: {"rps": round(c.limiter.rate, 2), "circuit_open": c.breaker.is_open, "opened": c.breaker.opened}
+                for host, c in self._hosts.items()
+            },
+            "keys": self.key_pool.stats(),
+            "decode": self.decode_stats.as_dict(),
+        }
 
     def get_owned_games(self, steamid: str, include_appinfo: bool = True, include_played_free_games: bool = True) -> Dict[str, Any]:
         params = {
-            "key": self.api_key,
             "steamid": steamid,
             "include_appinfo": 1 if include_appinfo else 0,
             "include_played_free_games": 1 if include_played_free_games else 0,
             "format": "json",
         }
         self.logger.info(f"Fetching owned games for steamid={steamid}")
-        return self._get("IPlayerService/GetOwnedGames/v1/", params)
+        return self._get("IPlayerService/GetOwnedGames/v1/", params, keyed=True)
+
+    def iter_owned_games(self, steamid: str, include_appinfo: bool = True, include_played_free_games: bool = True) -> Iterator[Dict[str, Any]]:
+        """Owned game rows parsed one at a time as the response streams in; feed to ``transform_owned_games``."""
+        params = {
+            "steamid": steamid,
+            "include_appinfo": 1 if include_appinfo else 0,
+            "include_played_free_games": 1 if include_played_free_games else 0,
+            "format": "json",
+        }
+        self.logger.info(f"Streaming owned games for steamid={steamid}")
+        return self._iter_array("IPlayerService/GetOwnedGames/v1/", params, ("response", "games"), keyed=True)
+
+    def iter_app_list(self) -> Iterator[Dict[str, Any]]:
+        """Every ``{"appid", "name"}`` in the Steam catalog (ISteamApps/GetAppList), streamed."""
+        self.logger.info("Streaming the Steam app list")
+        return self._iter_array("ISteamApps/GetAppList/v2/", {"format": "json"}, ("applist", "apps"))
+
+    def get_recently_played_games(self, steamid: str, count: int = 0) -> Dict[str, Any]:
+        """Games played in the last two weeks (``count=0``: all of them); same row shape as owned games."""
+        params = {"steamid": steamid, "count": count, "format": "json"}
+        self.logger.info(f"Fetching recently played games for steamid={steamid}")
+        return self._get("IPlayerService/GetRecentlyPlayedGames/v1/", params, keyed=True)
 
     def get_global_achievements_for_app(self, appid: int) -> Dict[str, Any]:
         params = {"gameid": appid, "format": "json"}
-        url = f"{self.base_url}/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"
-        self._respect_rate_limit()
         self.logger.info(f"Fetching global achievements for appid={appid}")
-        response = self.session.get(url, params=params, timeout=self.timeout_seconds)
-        self.logger.debug(f"Response status={response.status_code}")
-        response.raise_for_status()
-        return response.json()
+        return self._get("ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/", params)
 
-    def get_app_details(self, appids: Iterable[int], batch_size: int = 50) -> Dict[str, Any]:
+    def get_app_details(self, appids: Iterable[int], batch_size: int = 50, profile: str = "full") -> Dict[str, Any]:
+        """Store appdetails keyed by appid string; ``profile`` (see ``APPDETAILS_PROFILES``) trims the payload."""
+        filters, _fields = APPDETAILS_PROFILES[profile]
         # Store API supports many IDs but we batch for stability
         results: Dict[str, Any] = {}
         appid_list: List[int] = list(appids)
         for i in range(0, len(appid_list), batch_size):
             chunk = appid_list[i:i+batch_size]
-            id_list = ",".join(str(a) for a in chunk)
-            self._respect_rate_limit()
-            self.logger.info(f"Fetching appdetails batch size={len(chunk)} range={i}-{i+len(chunk)-1}")
-            response = self.session.get(
-                "https://store.steampowered.com/api/appdetails",
-                params={"appids": id_list},
-                timeout=self.timeout_seconds,
-            )
-            self.logger.debug(f"Response status={response.status_code}")
-            response.raise_for_status()
-            batch_json = response.json()
+            params = {"appids": ",".join(str(a) for a in chunk)}
+            if filters:
+                params["filters"] = filters
+            self.logger.info(f"Fetching appdetails batch size={len(chunk)} range={i}-{i+len(chunk)-1} profile={profile}")
+            batch_json = self._decode(self._request(f"{self.store_url}/api/appdetails", params))
             results.update(batch_json)
         return results
+
+
+_shared_clients: Dict[Tuple[str, ...], SteamClient] = {}
+
+
+def get_shared_client(
+    api_key: str,
+    requests_per_second: float = 2.0,
+    api_keys: Optional[Sequence[str]] = None,
+    base_url: Optional[str] = None,
+    store_url: Optional[str] = None,
+) -> SteamClient:
+    """Process-wide client per API key set and hosts, so repeated in-process runs keep one HTTP session."""
+    pool_key = (*dict.fromkeys([api_key, *(api_keys or [])]), base_url or "", store_url or "")
+    client = _shared_clients.get(pool_key)
+    if client is None:
+        client = _shared_clients[pool_key] = SteamClient(
+            api_key=api_key, requests_per_second=requests_per_second, api_keys=api_keys,
+            base_url=base_url, store_url=store_url,
+        )
+    else:
+        client.set_requests_per_second(requests_per_second)
+    return client
@@ -0,0 +1,167 @@
+"""Online backfills: fill a column in small keyset-ordered batches instead of one big UPDATE.
+
+Each batch updates at most ``batch_size`` rows and commits together with its checkpoint
+in ``backfill_checkpoints``. Row locks and undo/WAL stay small, other writers run in
+between batches, and an interrupted backfill continues after the last committed
+batch. Progress and an ETA are logged while it runs.
+
+From an Alembic migration, run it outside the migration transaction::
+
+    with op.get_context().autocommit_block():
+        backfill(op.get_bind().engine, "ownerships.game_name", table, values, where=..., **migration_options())
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+import time
+
+from . import metrics
+from .logging_utils import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Engine
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BackfillResult:
+    name: str
+    rows: int
+    batches: int
+    seconds: float
+    resumed_from: Optional[int] = None
+    already_done: bool = False
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def migration_options() -> Dict[str, Any]:
+    """Backfill settings from ``alembic -x``: ``backfill_batch_size``, ``backfill_rps`` and ``backfill_restart``."""
+    from alembic import context
+
+    x = context.get_x_argument(as_dictionary=True)
+    return {
+        "batch_size": int(x.get("backfill_batch_size", 1000)),
+        "rows_per_second": float(x.get("backfill_rps", 0)),
+        "restart": x.get("backfill_restart", "").lower() in ("1", "true", "yes"),
+    }
+
+
+def deferred() -> bool:
+    """True for ``alembic -x backfill=skip``: the schema change runs now, the backfill later via its tool."""
+    from alembic import context
+
+    return context.get_x_argument(as_dictionary=True).get("backfill", "").lower() == "skip"
+
+
+def _checkpoint(conn, name: str) -> Optional[Any]:
+    from .models import BackfillCheckpoint
+
+    table = BackfillCheckpoint.__table__
+    return conn.execute(table.select().where(table.c.name == name)).first()
+
+
+def _save_checkpoint(conn, name: str, last_key: int, rows: int, finished: bool = False) -> None:
+    from .models import BackfillCheckpoint
+
+    table = BackfillCheckpoint.__table__
+    now = datetime.utcnow()
+    values = {"last_key": last_key, "rows_done": rows, "updated_at": now, "finished_at": now if finished else None}
+    if conn.execute(table.update().where(table.c.name == name).values(**values)).rowcount == 0:
+        conn.execute(table.insert().values(name=name, **values))
+
+
+def backfill(
+    engine: Engine,
+    name: str,
+    table: Table,
+    values: Dict[str, Any],
+    where: Optional[Any] = None,
+    key: Optional[Any] = None,
+    batch_size: int = 1000,
+    rows_per_second: float = 0.0,
+    restart: bool = False,
+    report_every: float = 10.0,
+) -> BackfillResult:
+    """Apply ``UPDATE table SET values WHERE where`` in batches of ``batch_size`` primary keys.
+
+    ``name`` identifies the checkpoint; a finished backfill is not run again unless
+    ``restart``. ``where`` selects rows that still need the change (it also keeps a
+    rerun cheap); ``values`` may hold correlated subqueries. ``rows_per_second``
+    (0 = unthrottled) paces batches so replicas and other writers keep up.
+    Batches follow ``key``, an indexed integer column; by default the table's single-column primary key.
+    """
+    from sqlalchemy import func, select, true
+
+    if key is None:
+        (key,) = table.primary_key.columns
+    pending = true() if where is None else where
+
+    with engine.begin() as conn:
+        saved = _checkpoint(conn, name)
+    if saved is not None and saved.finished_at is not None and not restart:
+        logger.info("backfill %s: already finished (%d rows)", name, saved.rows_done)
+        return BackfillResult(name, 0, 0, 0.0, already_done=True)
+    resumed_from = saved.last_key if saved is not None and not restart else None
+    last_key = resumed_from
+    done = saved.rows_done if resumed_from is not None else 0
+
+    def remaining_query():
+        query = select(func.count()).select_from(table).where(pending)
+        return query if last_key is None else query.where(key > last_key)
+
+    with engine.connect() as conn:
+        total = done + conn.execute(remaining_query()).scalar_one()
+    if resumed_from is not None:
+        logger.info("backfill %s: resuming after %s=%s, %d of ~%d rows done", name, key.name, resumed_from, done, total)
+    else:
+        logger.info("backfill %s: ~%d rows in batches of %d", name, total, batch_size)
+
+    started = last_report = time.monotonic()
+    rows = batches = 0
+    while True:
+        batch_started = time.monotonic()
+        with engine.begin() as conn:
+            keys = select(key).where(pending).order_by(key).limit(batch_size)
+            if last_key is not None:
+                keys = keys.where(key > last_key)
+            batch = conn.execute(keys).scalars().all()
+            if not batch:
+                _save_checkpoint(conn, name, last_key or 0, done, finished=True)
+                break
+            # Bounded by the key range, so the update only touches (and locks) this batch
+            updated = conn.execute(
+                table.update().where(key >= batch[0], key <= batch[-1], pending).values(**values)
+            ).rowcount
+            last_key = batch[-1]
+            rows += updated
+            done += updated
+            batches += 1
+            _save_checkpoint(conn, name, last_key, done)
+        metrics.inc("backfill_rows_total", updated, backfill=name)
+
+        now = time.monotonic()
+        if now - last_report >= report_every:
+            rate = rows / (now - started) if now > started else 0.0
+            eta = format_eta((total - done) / rate) if rate else "?"
+            logger.info("backfill %s: %d/%d rows (%.1f%%), %.0f rows/s, ETA %s",
+                        name, done, total, 100.0 * done / max(1, total), rate, eta)
+            last_report = now
+        if rows_per_second > 0:
+            # Pace to the target rate: a batch of n rows takes at least n / rows_per_second
+            time.sleep(max(0.0, len(batch) / rows_per_second - (now - batch_started)))
+
+    elapsed = time.monotonic() - started
+    logger.info("backfill %s: finished, %d rows in %d batches (%.1fs)", name, rows, batches, elapsed)
+    return BackfillResult(name, rows, batches, elapsed, resumed_from=resumed_from)
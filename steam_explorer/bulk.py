@@ -0,0 +1,260 @@
+"""Bulk row movement: keyset-ordered reads, the fastest insert path per dialect, and table checksums.
+
+``insert_rows`` uses ``COPY ... FROM STDIN`` on Postgres, ``LOAD DATA LOCAL INFILE`` on MySQL
+(falling back to multi-row ``INSERT`` when the server or client does not allow it),
+``executemany`` on SQLite and multi-row ``INSERT`` elsewhere. Engines that should use
+``LOAD DATA LOCAL`` come from ``bulk_engine``; the shared ``get_engine`` engines never
+enable ``local_infile``.
+"""
+from __future__ import annotations
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import tempfile
+
+from .logging_utils import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Connection, Engine
+
+
+logger = get_logger(__name__)
+
+# Postgres and MySQL cap bind parameters per statement (65535); stay well below
+MAX_PARAMS = 30000
+CHECKSUM_MOD = 2 ** 64
+
+_bulk_engines: Dict[str, Engine] = {}
+# MySQL servers/clients that refused LOAD DATA LOCAL once are not asked again
+_no_local_infile: set = set()
+
+
+def bulk_engine(database_url: str) -> Engine:
+    """Engine for bulk loads; MySQL connections allow ``LOAD DATA LOCAL INFILE``."""
+    from sqlalchemy import create_engine
+
+    engine = _bulk_engines.get(database_url)
+    if engine is None:
+        connect_args = {"local_infile": True} if database_url.startswith("mysql") else {}
+        engine = _bulk_engines[database_url] = create_engine(database_url, future=True, connect_args=connect_args)
+    return engine
+
+
+def key_columns(table: Table) -> List[Any]:
+    keys = list(table.primary_key.columns)
+    if not keys:
+        raise ValueError(f"{table.name} has no primary key to page by")
+    return keys
+
+
+def iter_chunks(
+    conn: Connection,
+    table: Table,
+    columns: Sequence[Any],
+    chunk_size: int = 10000,
+    after: Optional[Sequence[Any]] = None,
+) -> Iterator[List[Tuple[Any, ...]]]:
+    """``columns`` of ``table`` in primary-key order, ``chunk_size`` rows at a time, starting after key ``after``.
+
+    The key columns must be among ``columns``; each chunk is one indexed range query.
+    """
+    from sqlalchemy import select, tuple_
+
+    keys = key_columns(table)
+    positions = [list(columns).index(key) for key in keys]
+    last = list(after) if after is not None else None
+    while True:
+        query = select(*columns).order_by(*keys).limit(chunk_size)
+        if last is not None:
+            query = query.where(keys[0] > last[0] if len(keys) == 1 else tuple_(*keys) > tuple_(*last))
+        rows = [tuple(row) for row in conn.execute(query)]
+        if not rows:
+            return
+        yield rows
+        last = [rows[-1][i] for i in positions]
+        if len(rows) < chunk_size:
+            return
+
+
+def _canonical(value: Any) -> str:
+    # Values as every backend returns them: MySQL FLOAT is single precision and
+    # DATETIME drops microseconds, SQLite has no booleans
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return format(value, ".6g")
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0).isoformat(" ")
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
+
+def row_digest(row: Sequence[Any]) -> int:
+    canonical = "\x1f".join(map(_canonical, row)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(canonical, digest_size=8).digest(), "big")
+
+
+def table_checksum(conn: Connection, table: Table, columns: Sequence[Any], chunk_size: int = 10000) -> Tuple[int, int]:
+    """``(row count, checksum)`` of ``columns``; the checksum is a sum of row digests, so row order does not matter."""
+    count = checksum = 0
+    for chunk in iter_chunks(conn, table, columns, chunk_size):
+        count += len(chunk)
+        checksum = (checksum + sum(map(row_digest, chunk))) % CHECKSUM_MOD
+    return count, checksum
+
+
+def _escape_text(value: Any, dialect: str) -> str:
+    """One field in Postgres COPY text format / MySQL LOAD DATA default format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return ("t" if value else "f") if dialect == "postgresql" else ("1" if value else "0")
+    if isinstance(value, datetime):
+        if dialect == "mysql":
+            # DATETIME rounds fractional seconds; drop them like the checksum does
+            value = value.replace(microsecond=0)
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex input; MySQL gets hex too and UNHEX()es it in the LOAD DATA SET clause
+        return ("\\\\x" if dialect == "postgresql" else "") + bytes(value).hex()
+    if isinstance(value, float):
+        return repr(value)
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def _text_lines(rows: Sequence[Sequence[Any]], dialect: str) -> Iterator[str]:
+    for row in rows:
+        yield "\t".join(_escape_text(value, dialect) for value in row) + "\n"
+
+
+def _is_binary(column: Any) -> bool:
+    from sqlalchemy import LargeBinary
+
+    return isinstance(column.type, LargeBinary)
+
+
+def _copy_postgres(conn: Connection, table: Table, columns: Sequence[Any], rows: Sequence[Sequence[Any]]) -> None:
+    statement = f'COPY {_quoted(conn, table)} ({", ".join(_quote(conn, c.name) for c in columns)}) FROM STDIN'
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy"):
+            # psycopg 3
+            with cursor.copy(statement) as copy:
+                for line in _text_lines(rows, "postgresql"):
+                    copy.write(line)
+        else:
+            # psycopg2
+            import io
+
+            cursor.copy_expert(statement, io.StringIO("".join(_text_lines(rows, "postgresql"))))
+    finally:
+        cursor.close()
+
+
+def _load_data_mysql(conn: Connection, table: Table, columns: Sequence[Any], rows: Sequence[Sequence[Any]]) -> None:
+    targets, assignments = [], []
+    for column in columns:
+        name = _quote(conn, column.name)
+        if _is_binary(column):
+            targets.append(f"@{column.name}")
+            assignments.append(f"{name} = UNHEX(@{column.name})")
+        else:
+            targets.append(name)
+    fd, path = tempfile.mkstemp(suffix=".tsv", prefix=f"{table.name}-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as out:
+            out.writelines(_text_lines(rows, "mysql"))
+        statement = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {_quoted(conn, table)} CHARACTER SET utf8mb4 ({', '.join(targets)})"
+            + (f" SET {', '.join(assignments)}" if assignments else "")
+        )
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(statement, (path,))
+        finally:
+            cursor.close()
+    finally:
+        os.unlink(path)
+
+
+def _multi_row_insert(conn: Connection, table: Table, columns: Sequence[Any], rows: Sequence[Sequence[Any]]) -> None:
+    names = [column.name for column in columns]
+    per_statement = max(1, min(1000, MAX_PARAMS // max(1, len(names))))
+    for i in range(0, len(rows), per_statement):
+        conn.execute(table.insert().values([dict(zip(names, row)) for row in rows[i:i + per_statement]]))
+
+
+def insert_rows(conn: Connection, table: Table, columns: Sequence[Any], rows: Sequence[Sequence[Any]]) -> str:
+    """Insert ``rows`` (tuples in ``columns`` order) with the fastest path for the dialect; returns the path used."""
+    if not rows:
+        return "none"
+    dialect = conn.dialect.name
+    if dialect == "postgresql" and conn.dialect.driver in ("psycopg", "psycopg2"):
+        _copy_postgres(conn, table, columns, rows)
+        return "copy"
+    if dialect == "mysql" and conn.engine.url.render_as_string() not in _no_local_infile:
+        # A savepoint keeps the transaction usable if the server refuses the load
+        savepoint = conn.begin_nested()
+        try:
+            _load_data_mysql(conn, table, columns, rows)
+        except Exception as exc:
+            # Raised by the driver's own cursor: local_infile off on the server (1148, 3948) or client (2068)
+            savepoint.rollback()
+            if not exc.args or exc.args[0] not in (1148, 2068, 3948):
+                raise
+            _no_local_infile.add(conn.engine.url.render_as_string())
+            logger.warning("LOAD DATA LOCAL INFILE is disabled (%s); using multi-row INSERT", exc)
+        else:
+            savepoint.commit()
+            return "load_data"
+    if dialect == "sqlite":
+        names = [column.name for column in columns]
+        conn.execute(table.insert(), [dict(zip(names, row)) for row in rows])
+        return "executemany"
+    _multi_row_insert(conn, table, columns, rows)
+    return "insert"
+
+
+def reset_sequences(conn: Connection, table: Table) -> None:
+    """Move a Postgres serial/identity sequence past the copied ids; other backends track this themselves."""
+    from sqlalchemy import text
+
+    if conn.dialect.name != "postgresql":
+        return
+    keys = list(table.primary_key.columns)
+    for column in keys:
+        # Only single-column integer keys get a sequence; pg_get_serial_sequence is NULL otherwise
+        if len(keys) == 1 and column.autoincrement is not False and _is_integer(column):
+            conn.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence(:table, :column), COALESCE((SELECT MAX({_quote(conn, column.name)}) FROM {_quoted(conn, table)}), 0) + 1, false)"
+                ),
+                {"table": table.name, "column": column.name},
+            )
+
+
+def _is_integer(column: Any) -> bool:
+    from sqlalchemy import Integer
+
+    return isinstance(column.type, Integer)
+
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _quoted(conn: Connection, table: Table) -> str:
+    return conn.dialect.identifier_preparer.format_table(table)
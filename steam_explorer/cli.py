@@ -0,0 +1,51 @@
+"""Command-line options shared by the tools, so their flags and help text cannot drift apart.
+
+Kept free of database and HTTP imports: tools build their parsers before any of that
+loads, which keeps ``--help`` fast.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+import argparse
+
+if TYPE_CHECKING:
+    from .db import CommitPolicy
+
+
+def add_run_options(parser: argparse.ArgumentParser, scope: str = "the run") -> None:
+    """``--metrics-json`` and ``--profile``; ``scope`` names what they cover, e.g. "the daemon"."""
+    parser.add_argument("--metrics-json", type=str, default="", help=f"Write request, row and timing counters to this JSON file when {scope} ends")
+    parser.add_argument("--profile", type=str, default="", metavar="REPORT",
+                        help=f"Profile {scope} (cProfile, tracemalloc, SQL timings with N+1 detection) and write a report to this file")
+
+
+def add_commit_options(parser: argparse.ArgumentParser, per_batch: bool = True, scope: str = "") -> None:
+    """``--commit-rows``/``--commit-seconds`` (and ``--commit-per-batch``) for ``commit_policy``.
+
+    ``scope`` prefixes the help when the policy only covers part of a tool's work, e.g. "Name sync".
+    """
+    def help_text(text: str) -> str:
+        return f"{scope}: {text}" if scope else text[0].upper() + text[1:]
+
+    parser.add_argument("--commit-rows", type=int, default=1000, help=help_text("commit after this many rows (0 = no row limit; default 1000)"))
+    parser.add_argument("--commit-seconds", type=float, default=5.0, help=help_text("commit once a transaction is this old (0 = no time limit; default 5)"))
+    if per_batch:
+        parser.add_argument("--commit-per-batch", action="store_true",
+                            help=help_text("commit after every batch: each app's achievements, each chunk of games or ownerships"))
+
+
+def commit_policy(args: argparse.Namespace) -> CommitPolicy:
+    from .db import CommitPolicy
+
+    return CommitPolicy(rows=args.commit_rows, seconds=args.commit_seconds, per_batch=getattr(args, "commit_per_batch", False))
+
+
+@contextmanager
+def running(args: argparse.Namespace) -> Iterator[None]:
+    """Set up logging and profile the block when ``--profile`` was given; wraps each tool's work."""
+    from .logging_utils import setup_logging
+    from .profiling import profiled
+
+    setup_logging()
+    with profiled(args.profile):
+        yield
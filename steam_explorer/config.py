@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -15,6 +15,11 @@ class Settings:
     steam_api_key: str
     database_url: str = "sqlite:///steam.db"
     steam_user_id64: Optional[str] = None
+    # Every configured Web API key, steam_api_key first; the client rotates through them
+    steam_api_keys: List[str] = field(default_factory=list)
+    # Host overrides, e.g. a local mock server for load tests; None means the real Steam hosts
+    steam_api_base_url: Optional[str] = None
+    steam_store_url: Optional[str] = None
 
 
 _settings: Optional[Settings] = None
@@ -24,13 +29,19 @@ def get_settings() -> Settings:
     global _settings
     if _settings is None:
         steam_api_key = os.getenv("STEAM_API_KEY", "").strip()
+        extra_keys = [k.strip() for k in os.getenv("STEAM_API_KEYS", "").split(",") if k.strip()]
+        if not steam_api_key and extra_keys:
+            steam_api_key = extra_keys[0]
         if not steam_api_key:
-            raise RuntimeError("STEAM_API_KEY is required. Set it in environment or .env.")
+            raise RuntimeError("STEAM_API_KEY (or STEAM_API_KEYS) is required. Set it in environment or .env.")
         database_url = os.getenv("DATABASE_URL", "sqlite:///steam.db").strip()
         steam_user_id64 = os.getenv("STEAM_USER_ID64")
         _settings = Settings(
             steam_api_key=steam_api_key,
             database_url=database_url,
             steam_user_id64=steam_user_id64.strip() if steam_user_id64 else None,
+            steam_api_keys=list(dict.fromkeys([steam_api_key, *extra_keys])),
+            steam_api_base_url=os.getenv("STEAM_API_BASE_URL", "").strip() or None,
+            steam_store_url=os.getenv("STEAM_STORE_URL", "").strip() or None,
         )
     return _settings
@@ -1,5 +1,9 @@
-from typing import Generator
-from sqlalchemy import create_engine
+from dataclasses import dataclass
+from typing import Dict, Generator, Iterator, Sequence, TypeVar
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
 
@@ -7,13 +11,53 @@ class Base(DeclarativeBase):
     pass
 
 
+T = TypeVar("T")
+
+
+# One engine (and connection pool) per URL for the life of the process, so
+# in-process callers such as steam_manager.py reuse warm connections.
+_engines: Dict[str, Engine] = {}
+_sessionmakers: Dict[str, sessionmaker] = {}
+
+
 def get_engine(database_url: str):
-    return create_engine(database_url, future=True)
+    engine = _engines.get(database_url)
+    if engine is None:
+        engine = _engines[database_url] = create_engine(database_url, future=True)
+    return engine
 
 
 def get_sessionmaker(database_url: str):
-    engine = get_engine(database_url)
-    return sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+    factory = _sessionmakers.get(database_url)
+    if factory is None:
+        engine = get_engine(database_url)
+        factory = _sessionmakers[database_url] = sessionmaker(
+            bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True
+        )
+        _time_commits(factory)
+    return factory
+
+
+def _time_commits(factory: sessionmaker) -> None:
+    """Feed commit latency (flush included) into the ``db_commit_seconds`` histogram."""
+    from . import metrics
+
+    @event.listens_for(factory, "before_commit")
+    def _before_commit(session: Session) -> None:
+        session.info["commit_started"] = time.perf_counter()
+
+    @event.listens_for(factory, "after_commit")
+    def _after_commit(session: Session) -> None:
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            metrics.observe("db_commit_seconds", time.perf_counter() - started)
+
+
+def dispose_engines() -> None:
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+    _sessionmakers.clear()
 
 
 def get_session(database_url: str) -> Generator[Session, None, None]:
@@ -23,3 +67,70 @@ def get_session(database_url: str) -> Generator[Session, None, None]:
         yield session
     finally:
         session.close()
+
+
+@dataclass
+class CommitPolicy:
+    """When a long load commits: after ``rows`` rows, once the transaction is ``seconds`` old,
+    or at every batch boundary (``per_batch``). A zero limit is off; all off means one commit at the end.
+    """
+    rows: int = 1000
+    seconds: float = 5.0
+    per_batch: bool = False
+
+    def due(self, rows: int, elapsed: float) -> bool:
+        return (
+            self.per_batch
+            or (self.rows > 0 and rows >= self.rows)
+            or (self.seconds > 0 and elapsed >= self.seconds)
+        )
+
+    def chunks(self, rows: Sequence[T]) -> Iterator[Sequence[T]]:
+        """``rows`` in slices of at most ``self.rows``, so one big batch is not one big transaction."""
+        size = self.rows if self.rows > 0 else max(1, len(rows))
+        for i in range(0, len(rows), size):
+            yield rows[i:i + size]
+
+
+class ChunkedSession:
+    """A session that commits according to a ``CommitPolicy``.
+
+    Callers do their work through ``.session`` and call ``checkpoint(rows)`` wherever a
+    commit is safe. Each commit also expunges the session, so the identity map and the
+    database write lock only ever cover one chunk. Leaving the block commits the rest,
+    or rolls back the open chunk on error; earlier chunks stay committed.
+    """
+
+    def __init__(self, factory: sessionmaker, policy: CommitPolicy) -> None:
+        self.session: Session = factory()
+        self.policy = policy
+        self.commits = 0
+        self._rows = 0
+        self._started = time.monotonic()
+
+    def __enter__(self) -> "ChunkedSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+
+    def checkpoint(self, rows: int = 0) -> bool:
+        """Count ``rows`` towards the open chunk and commit it if the policy says so."""
+        self._rows += rows
+        if self.policy.due(self._rows, time.monotonic() - self._started):
+            self.commit()
+            return True
+        return False
+
+    def commit(self) -> None:
+        self.session.commit()
+        self.session.expunge_all()
+        self.commits += 1
+        self._rows = 0
+        self._started = time.monotonic()
@@ -0,0 +1,242 @@
+"""Copy every table from one database to another (typically SQLite to MySQL/Postgres).
+
+The target schema comes from ``alembic upgrade head``. Tables are streamed in primary-key
+order, ``chunk_size`` rows per committed target transaction, with independent tables
+copied in parallel (a table starts once the tables it references are done). Progress is
+saved to a JSON state file after every chunk, so an interrupted copy resumes where it
+stopped. Each table is then verified by row count and checksum on both sides.
+"""
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from . import bulk
+from .logging_utils import get_logger
+
+if TYPE_CHECKING:
+    from sqlalchemy import Table
+    from sqlalchemy.engine import Engine
+
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CopyError(RuntimeError):
+    pass
+
+
+@dataclass
+class TableResult:
+    table: str
+    rows: int = 0
+    seconds: float = 0.0
+    path: str = ""
+    source_count: Optional[int] = None
+    target_count: Optional[int] = None
+    checksum_ok: Optional[bool] = None
+
+    @property
+    def verified(self) -> bool:
+        return self.checksum_ok is True and self.source_count == self.target_count
+
+
+@dataclass
+class CopyState:
+    """Per-table progress (last copied key, rows, done), persisted after every chunk."""
+
+    path: str
+    source: str
+    target: str
+    tables: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def load(cls, path: str, source: str, target: str) -> Optional["CopyState"]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("source") != source or data.get("target") != target:
+            raise CopyError(f"{path} belongs to another copy ({data.get('source')} -> {data.get('target')}); use --restart or another --state")
+        return cls(path, source, target, data.get("tables", {}))
+
+    def table(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.tables.get(name, {}))
+
+    def update(self, name: str, **values: Any) -> None:
+        with self._lock:
+            self.tables.setdefault(name, {}).update(values)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"source": self.source, "target": self.target, "tables": self.tables}, f, indent=2, default=str)
+            os.replace(tmp, self.path)
+
+
+def safe_url(engine: Engine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+def upgrade_schema(database_url: str) -> None:
+    """``alembic upgrade head`` against ``database_url``, in a child process so its logging setup stays out of ours."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    result = subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise CopyError(f"alembic upgrade head failed:\n{result.stderr.strip()}")
+
+
+def copied_columns(source: Engine, target: Engine, table: Table) -> List[Any]:
+    """Columns present on both sides; older SQLite files may predate some of them."""
+    from sqlalchemy import inspect
+
+    present = {c["name"] for c in inspect(source).get_columns(table.name)} & {c["name"] for c in inspect(target).get_columns(table.name)}
+    columns = [column for column in table.columns if column.name in present]
+    missing = [key.name for key in bulk.key_columns(table) if key.name not in present]
+    if missing:
+        raise CopyError(f"{table.name}: key columns {missing} missing on one side")
+    return columns
+
+
+def copy_table(
+    source: Engine,
+    target: Engine,
+    table: Table,
+    state: CopyState,
+    chunk_size: int = 10000,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> TableResult:
+    """Stream one table into the (empty or partially copied) target table; resumes from ``state``."""
+    from sqlalchemy import tuple_
+
+    saved = state.table(table.name)
+    result = TableResult(table.name, rows=saved.get("rows", 0))
+    if saved.get("done"):
+        return result
+    columns = copied_columns(source, target, table)
+    keys = bulk.key_columns(table)
+    positions = [columns.index(key) for key in keys]
+    after = saved.get("last_key")
+    # After a crash the chunk following the saved key may already be committed on the target
+    resumed = after is not None
+
+    started = time.perf_counter()
+    with source.connect() as src:
+        for chunk in bulk.iter_chunks(src, table, columns, chunk_size, after=after):
+            with target.begin() as dst:
+                if resumed:
+                    if len(keys) == 1:
+                        already = keys[0].in_([row[positions[0]] for row in chunk])
+                    else:
+                        already = tuple_(*keys).in_([tuple(row[i] for i in positions) for row in chunk])
+                    dst.execute(table.delete().where(already))
+                    resumed = False
+                result.path = bulk.insert_rows(dst, table, columns, chunk)
+            result.rows += len(chunk)
+            state.update(table.name, last_key=[chunk[-1][i] for i in positions], rows=result.rows)
+            if progress is not None:
+                progress(table.name, result.rows)
+    with target.begin() as dst:
+        bulk.reset_sequences(dst, table)
+    result.seconds = time.perf_counter() - started
+    state.update(table.name, done=True)
+    return result
+
+
+def verify_table(source: Engine, target: Engine, table: Table, result: TableResult, chunk_size: int = 10000) -> TableResult:
+    columns = copied_columns(source, target, table)
+    with source.connect() as src:
+        result.source_count, source_sum = bulk.table_checksum(src, table, columns, chunk_size)
+    with target.connect() as dst:
+        result.target_count, target_sum = bulk.table_checksum(dst, table, columns, chunk_size)
+    result.checksum_ok = source_sum == target_sum
+    return result
+
+
+def _target_rows(target: Engine, tables: List[Table]) -> Dict[str, int]:
+    from sqlalchemy import func, inspect, select
+
+    existing = set(inspect(target).get_table_names())
+    with target.connect() as conn:
+        return {t.name: conn.execute(select(func.count()).select_from(t)).scalar_one() for t in tables if t.name in existing}
+
+
+def _run_in_order(tables: List[Table], workers: int, work: Callable[[Table], TableResult]) -> Dict[str, TableResult]:
+    """Run ``work`` per table on ``workers`` threads; a table waits for the tables its foreign keys reference."""
+    names = {t.name for t in tables}
+    depends = {t.name: {fk.column.table.name for fk in t.foreign_keys} & names - {t.name} for t in tables}
+    results: Dict[str, TableResult] = {}
+    waiting = list(tables)
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while waiting or running:
+            for table in [t for t in waiting if depends[t.name] <= set(results)]:
+                waiting.remove(table)
+                running[pool.submit(work, table)] = table.name
+            if not running:
+                raise CopyError(f"foreign key cycle between {[t.name for t in waiting]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def copy_database(
+    source: Engine,
+    target: Engine,
+    state_path: str,
+    tables: Optional[List[str]] = None,
+    workers: int = 4,
+    chunk_size: int = 10000,
+    restart: bool = False,
+    replace: bool = False,
+    verify: bool = True,
+    progress: Optional[Callable[[str, int], None]] = None,
+) -> List[TableResult]:
+    """Copy ``source`` into ``target`` (migrated with Alembic first) and verify it; see the module docstring.
+
+    A fresh copy refuses a target that already holds data unless ``replace``.
+    """
+    from sqlalchemy import inspect
+    from .models import Base
+
+    chosen: Set[str] = set(tables) if tables else set()
+    source_tables = set(inspect(source).get_table_names())
+    selected = [t for t in Base.metadata.sorted_tables if t.name in source_tables and (not chosen or t.name in chosen)]
+    unknown = chosen - {t.name for t in selected}
+    if unknown:
+        raise CopyError(f"unknown or missing tables: {', '.join(sorted(unknown))}")
+
+    state = None if restart else CopyState.load(state_path, safe_url(source), safe_url(target))
+    if state is None:
+        occupied = {name: rows for name, rows in _target_rows(target, selected).items() if rows}
+        if occupied and not replace:
+            raise CopyError(f"target already has data ({', '.join(f'{n}={r}' for n, r in sorted(occupied.items()))}); pass --replace to overwrite it")
+        upgrade_schema(target.url.render_as_string(hide_password=False))
+        # Migrations may seed rows (empty sketches, finished backfills); the copy brings the real ones
+        with target.begin() as conn:
+            for table in reversed(selected):
+                conn.execute(table.delete())
+        state = CopyState(state_path, safe_url(source), safe_url(target))
+        logger.info("Copying %d tables from %s to %s", len(selected), safe_url(source), safe_url(target))
+    else:
+        logger.info("Resuming copy from %s", state_path)
+
+    if target.dialect.name == "sqlite":
+        # One writer at a time; parallel chunks would only wait on the database lock
+        workers = 1
+    results = _run_in_order(selected, workers, lambda table: copy_table(source, target, table, state, chunk_size, progress))
+    if verify:
+        results = _run_in_order(selected, workers, lambda table: verify_table(source, target, table, results[table.name], chunk_size))
+    return [results[t.name] for t in selected]
@@ -0,0 +1,224 @@
+"""Bulk ingest for big ownership loads (initial roster imports, replays of raw payloads).
+
+Rows are first streamed into a temporary staging table with the fastest path the
+backend has (``COPY`` on Postgres, ``LOAD DATA LOCAL INFILE`` on MySQL, ``executemany``
+on SQLite; see ``steam_explorer.bulk``), then merged into ``ownerships`` with one
+set-based upsert. The two phases are timed separately. Results match ``upsert_ownerships``:
+a missing name keeps the stored one (or comes from ``games``), unchanged rows are not
+rewritten, and playtime history is appended set-based. Sketches are not updated;
+run ``tools/rebuild_sketches.py`` after a bulk load.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Optional
+import time
+
+from .. import bulk, metrics
+from ..logging_utils import get_logger
+from .records import OwnershipRecord
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+
+
+logger = get_logger(__name__)
+
+STAGING_TABLE = "ownerships_staging"
+LATEST_TABLE = "ownerships_staging_latest"
+INCOMING_TABLE = "ownerships_incoming"
+
+
+@dataclass
+class BulkIngestResult:
+    staged: int = 0
+    # Rows inserted or changed; MySQL reports its affected-rows count (2 per update)
+    written: int = 0
+    history_rows: int = 0
+    stage_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    path: str = ""
+
+
+def _temporary_tables():
+    """Staged rows in arrival order, the last ``seq`` per key, and the deduplicated rows to merge."""
+    from sqlalchemy import Column, Integer, MetaData, PrimaryKeyConstraint, String, Table
+
+    metadata = MetaData()
+    staging = Table(
+        STAGING_TABLE, metadata,
+        Column("seq", Integer, primary_key=True, autoincrement=False),
+        Column("steamid", String(32), nullable=False),
+        Column("appid", Integer, nullable=False),
+        Column("game_name", String(255), nullable=True),
+        Column("playtime_forever", Integer, nullable=True),
+        prefixes=["TEMPORARY"],
+    )
+    latest = Table(
+        LATEST_TABLE, metadata,
+        Column("seq", Integer, primary_key=True, autoincrement=False),
+        prefixes=["TEMPORARY"],
+    )
+    incoming = Table(
+        INCOMING_TABLE, metadata,
+        Column("steamid", String(32), nullable=False),
+        Column("appid", Integer, nullable=False),
+        Column("game_name", String(255), nullable=True),
+        Column("playtime_forever", Integer, nullable=True),
+        PrimaryKeyConstraint("steamid", "appid"),
+        prefixes=["TEMPORARY"],
+    )
+    return staging, latest, incoming
+
+
+def _deduplicate(conn: Connection, staging, latest, incoming) -> None:
+    """Fill ``incoming`` with one row per (steamid, appid), the last staged one winning, names filled from ``games``.
+
+    Goes through ``latest`` because MySQL cannot open a TEMPORARY table twice in one
+    statement, so staging cannot be joined to an aggregate over itself.
+    """
+    from sqlalchemy import func, select
+    from ..models import Game
+
+    games = Game.__table__
+    conn.execute(latest.insert().from_select(
+        ["seq"], select(func.max(staging.c.seq)).group_by(staging.c.steamid, staging.c.appid),
+    ))
+    name = func.coalesce(staging.c.game_name, select(games.c.name).where(games.c.appid == staging.c.appid).scalar_subquery())
+    conn.execute(incoming.insert().from_select(
+        ["steamid", "appid", "game_name", "playtime_forever"],
+        select(staging.c.steamid, staging.c.appid, name, staging.c.playtime_forever)
+        .select_from(staging.join(latest, staging.c.seq == latest.c.seq)),
+    ))
+    if conn.dialect.name in ("postgresql", "sqlite"):
+        # Temporary tables get no statistics otherwise (autovacuum skips them on Postgres), and
+        # the planner then drives the history joins from the whole ownerships table
+        conn.exec_driver_sql(f"ANALYZE {conn.dialect.identifier_preparer.format_table(incoming)}")
+
+
+def _record_history(conn: Connection, incoming, at: datetime) -> int:
+    """``record_playtime_change`` for the whole batch in three INSERT ... SELECTs, run before the merge."""
+    from sqlalchemy import Boolean, DateTime, Integer, and_, exists, func, literal, select
+    from ..models import Ownership, OwnershipHistory
+    from .history import period_for
+
+    owned = Ownership.__table__
+    history = OwnershipHistory.__table__
+    matches = and_(owned.c.steamid == incoming.c.steamid, owned.c.appid == incoming.c.appid)
+    current = func.coalesce(incoming.c.playtime_forever, 0)
+    previous = func.coalesce(owned.c.playtime_forever, 0)
+    constants = [literal(period_for(at), Integer), literal(at, DateTime)]
+    columns = ["steamid", "appid", "playtime_delta", "baseline", "period", "recorded_at"]
+
+    statements = [
+        # Rows that predate history tracking get their previous total as a baseline first
+        select(owned.c.steamid, owned.c.appid, previous, literal(True, Boolean), *constants)
+        .select_from(incoming.join(owned, matches))
+        .where(~exists().where(history.c.steamid == owned.c.steamid, history.c.appid == owned.c.appid)),
+        # First sighting: the whole playtime is a baseline
+        select(incoming.c.steamid, incoming.c.appid, current, literal(True, Boolean), *constants)
+        .select_from(incoming.outerjoin(owned, matches))
+        .where(owned.c.id.is_(None)),
+        # Known rows: the change, if any
+        select(incoming.c.steamid, incoming.c.appid, current - previous, literal(False, Boolean), *constants)
+        .select_from(incoming.join(owned, matches))
+        .where(current != previous),
+    ]
+    return sum(conn.execute(history.insert().from_select(columns, statement)).rowcount for statement in statements)
+
+
+def _merge(conn: Connection, incoming, at: datetime) -> int:
+    from sqlalchemy import DateTime, func, literal, or_, select, true
+    from ..models import Ownership
+
+    owned = Ownership.__table__
+    columns = ["steamid", "appid", "game_name", "playtime_forever", "created_at"]
+    rows = select(
+        incoming.c.steamid, incoming.c.appid, incoming.c.game_name, incoming.c.playtime_forever, literal(at, DateTime),
+    )
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        # SQLite needs a WHERE on INSERT ... SELECT ... ON CONFLICT to parse it
+        statement = insert(owned).from_select(columns, rows.where(true()))
+        name = func.coalesce(statement.excluded.game_name, owned.c.game_name)
+        statement = statement.on_conflict_do_update(
+            index_elements=["steamid", "appid"],
+            set_={"playtime_forever": statement.excluded.playtime_forever, "game_name": name},
+            where=or_(
+                owned.c.playtime_forever.is_distinct_from(statement.excluded.playtime_forever),
+                owned.c.game_name.is_distinct_from(name),
+            ),
+        )
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(owned).from_select(columns, rows)
+        statement = statement.on_duplicate_key_update(
+            playtime_forever=statement.inserted.playtime_forever,
+            game_name=func.coalesce(statement.inserted.game_name, owned.c.game_name),
+        )
+    else:
+        raise ValueError(f"bulk ingest does not support {dialect}; use upsert_ownerships")
+    return conn.execute(statement).rowcount
+
+
+def bulk_upsert_ownerships(
+    conn: Connection,
+    ownerships: Iterable[OwnershipRecord],
+    chunk_size: int = 50000,
+    record_history: bool = True,
+    at: Optional[datetime] = None,
+) -> BulkIngestResult:
+    """Stage ``ownerships`` (records or ORM objects, streamed) and merge them into ``ownerships``.
+
+    Runs on the caller's connection and transaction; the staging table is dropped afterwards.
+    For MySQL, pass a connection from ``steam_explorer.bulk.bulk_engine`` so ``LOAD DATA LOCAL`` is allowed.
+    """
+    from sqlalchemy import Index
+
+    at = at or datetime.utcnow()
+    result = BulkIngestResult()
+    staging, latest, incoming = _temporary_tables()
+    tables = [staging, latest, incoming]
+    for table in tables:
+        table.create(conn)
+    try:
+        started = time.perf_counter()
+        columns = list(staging.columns)
+        rows = (
+            (seq, o.steamid, o.appid, o.game_name, o.playtime_forever)
+            for seq, o in enumerate((o for o in ownerships if o.steamid and o.appid), 1)
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            result.path = bulk.insert_rows(conn, staging, columns, chunk)
+            result.staged += len(chunk)
+        # Indexed after loading, which is cheaper than maintaining it row by row
+        Index(f"ix_{STAGING_TABLE}_key", staging.c.steamid, staging.c.appid).create(conn)
+        result.stage_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _deduplicate(conn, staging, latest, incoming)
+        if record_history:
+            result.history_rows = _record_history(conn, incoming, at)
+        result.written = _merge(conn, incoming, at)
+        result.merge_seconds = time.perf_counter() - started
+    finally:
+        for table in reversed(tables):
+            table.drop(conn)
+
+    metrics.observe("etl_bulk_stage_seconds", result.stage_seconds, table="ownerships")
+    metrics.observe("etl_bulk_merge_seconds", result.merge_seconds, table="ownerships")
+    metrics.inc("etl_rows_written_total", result.written, table="ownerships")
+    logger.info(
+        "Bulk ingested %d ownership rows via %s: staged in %.2fs, merged in %.2fs (%d written, %d history rows)",
+        result.staged, result.path or "-", result.stage_seconds, result.merge_seconds, result.written, result.history_rows,
+    )
+    return result
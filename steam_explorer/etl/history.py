@@ -0,0 +1,106 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import OwnershipHistory
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def period_for(at: datetime) -> int:
+    """Partition key for a timestamp, e.g. 202610."""
+    return at.year * 100 + at.month
+
+
+def history_appids(session: Session, steamid: str) -> Set[int]:
+    """Apps that already have history for this user (i.e. a baseline to apply deltas to)."""
+    rows = session.query(OwnershipHistory.appid).filter(OwnershipHistory.steamid == steamid).distinct().all()
+    return {appid for (appid,) in rows}
+
+
+def record_playtime_change(
+    session: Session,
+    steamid: str,
+    appid: int,
+    previous: Optional[int],
+    current: Optional[int],
+    at: Optional[datetime] = None,
+    has_history: bool = True,
+) -> bool:
+    """Append a delta row if playtime changed. ``previous=None`` means first sighting (a baseline row).
+
+    ``has_history=False`` marks a row that predates history tracking: its previous value is
+    written as a baseline first so reconstruction starts from the right total.
+    """
+    at = at or datetime.utcnow()
+    current_value = current or 0
+    if previous is not None and not has_history:
+        session.add(OwnershipHistory(
+            steamid=steamid, appid=appid, playtime_delta=previous or 0,
+            baseline=True, period=period_for(at), recorded_at=at,
+        ))
+    if previous is None:
+        session.add(OwnershipHistory(
+            steamid=steamid, appid=appid, playtime_delta=current_value,
+            baseline=True, period=period_for(at), recorded_at=at,
+        ))
+        return True
+    delta = current_value - (previous or 0)
+    if delta == 0:
+        return False
+    session.add(OwnershipHistory(
+        steamid=steamid, appid=appid, playtime_delta=delta,
+        baseline=False, period=period_for(at), recorded_at=at,
+    ))
+    return True
+
+
+def library_at(session: Session, steamid: str, at: datetime) -> Dict[int, int]:
+    """Reconstruct a user's library (appid -> playtime_forever) as of ``at``."""
+    rows = session.query(OwnershipHistory.appid, func.sum(OwnershipHistory.playtime_delta)).filter(
+        OwnershipHistory.steamid == steamid,
+        OwnershipHistory.recorded_at <= at,
+    ).group_by(OwnershipHistory.appid).all()
+    return {appid: int(total or 0) for appid, total in rows}
+
+
+def playtime_gained(session: Session, steamid: str, start: datetime, end: datetime) -> Dict[int, int]:
+    """Playtime gained per app in the window ``(start, end]``; baseline rows are not gains."""
+    rows = session.query(OwnershipHistory.appid, func.sum(OwnershipHistory.playtime_delta)).filter(
+        OwnershipHistory.steamid == steamid,
+        OwnershipHistory.baseline.is_(False),
+        OwnershipHistory.recorded_at > start,
+        OwnershipHistory.recorded_at <= end,
+        OwnershipHistory.period >= period_for(start),
+        OwnershipHistory.period <= period_for(end),
+    ).group_by(OwnershipHistory.appid).all()
+    return {appid: int(total) for appid, total in rows if total}
+
+
+def compact_history(session: Session, before: datetime) -> int:
+    """Fold all rows older than ``before`` into one baseline row per (steamid, appid).
+
+    Reconstruction at or after ``before`` is unchanged; returns the number of rows removed.
+    """
+    totals = session.query(
+        OwnershipHistory.steamid,
+        OwnershipHistory.appid,
+        func.sum(OwnershipHistory.playtime_delta),
+        func.max(OwnershipHistory.recorded_at),
+        func.count(OwnershipHistory.id),
+    ).filter(OwnershipHistory.recorded_at < before).group_by(OwnershipHistory.steamid, OwnershipHistory.appid).all()
+    if not totals:
+        return 0
+    removed = session.query(OwnershipHistory).filter(OwnershipHistory.recorded_at < before).delete(synchronize_session=False)
+    for steamid, appid, total, last_at, _count in totals:
+        session.add(OwnershipHistory(
+            steamid=steamid, appid=appid, playtime_delta=int(total or 0),
+            baseline=True, period=period_for(last_at), recorded_at=last_at,
+        ))
+    logger.info(f"Compacted {removed} history rows into {len(totals)} baselines before {before.isoformat()}")
+    return removed - len(totals)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import NegativeLookup
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+APPDETAILS = "appdetails"
+ACHIEVEMENTS = "achievements"
+
+# kind -> (first retry delay, maximum delay); the delay doubles on every repeated miss
+BACKOFF: Dict[str, Tuple[timedelta, timedelta]] = {
+    APPDETAILS: (timedelta(days=7), timedelta(days=180)),
+    ACHIEVEMENTS: (timedelta(days=30), timedelta(days=365)),
+}
+
+
+def next_check_delay(kind: str, failures: int) -> timedelta:
+    base, cap = BACKOFF[kind]
+    return min(base * (2 ** max(0, failures - 1)), cap)
+
+
+def record_negative(session: Session, kind: str, appid: int, reason: str, now: Optional[datetime] = None) -> NegativeLookup:
+    now = now or datetime.utcnow()
+    row = session.get(NegativeLookup, (kind, appid))
+    if row is None:
+        row = NegativeLookup(kind=kind, appid=appid, reason=reason, failures=1, first_seen_at=now)
+        session.add(row)
+    else:
+        row.failures += 1
+        row.reason = reason
+    row.last_checked_at = now
+    row.next_check_at = now + next_check_delay(kind, row.failures)
+    logger.debug("Negative %s lookup for appid=%s (%s), next check %s", kind, appid, reason, row.next_check_at)
+    return row
+
+
+def clear_negative(session: Session, kind: str, appids: Iterable[int]) -> int:
+    appid_list = list(appids)
+    if not appid_list:
+        return 0
+    return session.query(NegativeLookup).filter(
+        NegativeLookup.kind == kind,
+        NegativeLookup.appid.in_(appid_list),
+    ).delete()
+
+
+def next_check_at(session: Session, kind: str, appid: int) -> Optional[datetime]:
+    """When a negative-cached appid is due again; ``None`` if it has no negative entry."""
+    # Sessions do not autoflush, and a miss recorded in this transaction may still be pending
+    session.flush()
+    row = session.get(NegativeLookup, (kind, appid))
+    return row.next_check_at if row is not None else None
+
+
+def suppressed_appids(session: Session, kind: str, now: Optional[datetime] = None) -> Set[int]:
+    """Appids whose negative result has not expired yet."""
+    now = now or datetime.utcnow()
+    rows = session.query(NegativeLookup.appid).filter(
+        NegativeLookup.kind == kind,
+        NegativeLookup.next_check_at > now,
+    ).all()
+    return {appid for (appid,) in rows}
+
+
+def filter_due(session: Session, kind: str, appids: Iterable[int], now: Optional[datetime] = None) -> List[int]:
+    """Drop appids that are still inside their negative-cache backoff window, preserving order."""
+    suppressed = suppressed_appids(session, kind, now)
+    return [appid for appid in appids if appid not in suppressed]
+
+
+def appdetails_misses(requested: Iterable[int], appdetails: Mapping[str, object]) -> List[int]:
+    """Requested appids the store did not return data for (``success: false`` or absent)."""
+    misses: List[int] = []
+    for appid in requested:
+        payload = appdetails.get(str(appid))
+        if not isinstance(payload, dict) or not payload.get("success"):
+            misses.append(appid)
+    return misses
@@ -1,114 +1,247 @@
 from __future__ import annotations
-from typing import Iterable, List
-from sqlalchemy.orm import Session
-from ..models import Game, AchievementGlobal, Ownership
-from ..logging_utils import get_logger
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, TypeVar, Union
+from itertools import compress, repeat
+import functools
+import hashlib
+import json
+import time
+from .. import metrics
+from ..logging_utils import BatchLog, get_logger
+from .records import (
+    INVALID,
+    AchievementRecord,
+    GameRecord,
+    OwnershipRecord,
+    as_model,
+    clamp_negative,
+    float_column,
+    int_column,
+    to_models,
+    truncate,
+)
+
+# SQLAlchemy and the models are imported inside the functions that need them,
+# so importing this module (e.g. for CLI --help) does not load the ORM.
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+    from ..models import Game, AchievementGlobal, Ownership
+    from .sketches import OwnershipSketches
 
 
 logger = get_logger(__name__)
 
 
-def transform_appdetails_to_games(appdetails: dict) -> List[Game]:
-    games: List[Game] = []
-    for appid_str, payload in appdetails.items():
-        try:
-            appid = int(appid_str)
-        except ValueError:
-            logger.warning(f"Skipping invalid appid key: {appid_str}")
-            continue
-        if not isinstance(payload, dict) or not payload.get("success"):
-            logger.debug(f"No data/success=false for appid={appid}")
-            continue
-        data = payload.get("data") or {}
-        name = (data.get("name") or f"App {appid}").strip()
-        if not name:
-            logger.warning(f"Skipping appid={appid} due to empty name")
-            continue
-        game_type = data.get("type")
-        is_free = data.get("is_free")
-        games.append(Game(appid=appid, name=name[:255], type=(game_type[:64] if game_type else None), is_free=bool(is_free) if is_free is not None else None))
+# appdetails ``data`` fields transform_appdetails_to_games reads; fetch with
+# ``appdetails_profile_for(GAME_FIELDS)`` to download nothing else
+GAME_FIELDS = ("name", "type", "is_free")
+
+F = TypeVar("F", bound=Callable[..., int])
+
+
+def _count_rows(transform: str, seen: int, kept: int) -> None:
+    metrics.inc("etl_rows_total", kept, transform=transform, outcome="ok")
+    metrics.inc("etl_rows_total", seen - kept, transform=transform, outcome="skipped")
+
+
+def timed_upsert(table: str) -> Callable[[F], F]:
+    """Record an upsert's latency and the rows it returns as written, labelled by table."""
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> int:
+            started = time.perf_counter()
+            written = func(*args, **kwargs)
+            metrics.observe("etl_upsert_seconds", time.perf_counter() - started, table=table)
+            metrics.inc("etl_rows_written_total", written, table=table)
+            return written
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+def transform_appdetails_to_games(appdetails: dict, as_models: bool = False) -> Union[List[GameRecord], List[Game]]:
+    """``GameRecord`` rows from an appdetails mapping; ``as_models=True`` returns ``Game`` objects."""
+    payloads = list(appdetails.values())
+    appids = int_column(list(appdetails))
+    datas = [(p.get("data") or {}) if isinstance(p, dict) and p.get("success") else None for p in payloads]
+    names = [(d.get("name") or f"App {a}").strip() if d is not None else None for a, d in zip(appids, datas)]
+    valid = [a is not INVALID and d is not None and bool(n) for a, d, n in zip(appids, datas, names)]
+
+    log = BatchLog(logger)
+    if not all(valid):
+        for key, appid, data in zip(appdetails, appids, datas):
+            if appid is INVALID:
+                log.skip("invalid_appid", "Skipping invalid appid key: %s", key)
+            elif data is None:
+                log.skip("no_data", "No data/success=false for appid=%s", appid)
+        for appid, data, name in zip(appids, datas, names):
+            if appid is not INVALID and data is not None and not name:
+                log.skip("empty_name", "Skipping appid=%s due to empty name", appid)
+
+    types = truncate([d.get("type") if d else None for d in datas], 64)
+    frees = [None if f is None else bool(f) for f in (d.get("is_free") if d else None for d in datas)]
+    games = list(map(GameRecord._make, compress(zip(appids, truncate(names, 255), types, frees), valid)))
+    _count_rows("appdetails", len(payloads), len(games))
+    log.summary("appdetails")
     logger.info(f"Transformed {len(games)} games from appdetails")
-    return games
+    return to_models(games) if as_models else games
 
 
-def transform_global_achievements(appid: int, response: dict) -> List[AchievementGlobal]:
-    achievements: List[AchievementGlobal] = []
+def transform_global_achievements(appid: int, response: dict, as_models: bool = False) -> Union[List[AchievementRecord], List[AchievementGlobal]]:
+    """``AchievementRecord`` rows with a 0-100 percent; ``as_models=True`` returns ``AchievementGlobal`` objects."""
     data = (response or {}).get("achievementpercentages", {}).get("achievements", [])
-    for item in data:
-        name = item.get("name")
-        percent = item.get("percent")
-        if name is None or percent is None:
-            logger.debug("Skipping achievement with missing name/percent")
-            continue
-        try:
-            p = float(percent)
-            if p < 0 or p > 100:
-                logger.debug(f"Skipping achievement percent out of range: {p}")
-                continue
-        except (TypeError, ValueError):
-            logger.debug(f"Skipping achievement due to non-numeric percent: {percent}")
-            continue
-        achievements.append(AchievementGlobal(appid=appid, name=str(name)[:255], percent=p))
+    names = [item.get("name") for item in data]
+    raw_percents = [item.get("percent") for item in data]
+    percents = float_column(raw_percents)
+    valid = [n is not None and p is not None and p is not INVALID and not (p < 0 or p > 100) for n, p in zip(names, percents)]
+
+    log = BatchLog(logger)
+    if not all(valid):
+        for name, raw, p in zip(names, raw_percents, percents):
+            if name is None or p is None:
+                log.skip("missing_field", "Skipping achievement with missing name/percent")
+            elif p is INVALID:
+                log.skip("non_numeric", "Skipping achievement due to non-numeric percent: %r", raw)
+            elif p < 0 or p > 100:
+                log.skip("out_of_range", "Skipping achievement percent out of range: %s", p)
+
+    names = [str(n)[:255] if n is not None else None for n in names]
+    achievements = list(map(AchievementRecord._make, compress(zip(repeat(appid), names, percents), valid)))
+    _count_rows("achievements", len(data), len(achievements))
+    log.summary(f"achievements for appid={appid}")
     logger.info(f"Transformed {len(achievements)} global achievements for appid={appid}")
-    return achievements
+    return to_models(achievements) if as_models else achievements
 
 
-def transform_owned_games(steamid: str, response: dict) -> List[Ownership]:
-    ownerships: List[Ownership] = []
-    games = (response or {}).get("response", {}).get("games", [])
-    for g in games:
-        appid = g.get("appid")
-        if appid is None:
-            logger.debug("Skipping owned game with missing appid")
-            continue
-        playtime = g.get("playtime_forever")
-        game_name = g.get("name")  # Steam API includes game name in owned games response
-        try:
-            appid_int = int(appid)
-        except (TypeError, ValueError):
-            logger.debug(f"Skipping owned game with non-integer appid: {appid}")
-            continue
-        pt = None
-        if playtime is not None:
-            try:
-                pt = int(playtime)
-                if pt < 0:
-                    logger.debug(f"Clamping negative playtime to 0 for appid={appid_int}")
-                    pt = 0
-            except (TypeError, ValueError):
-                logger.debug(f"Ignoring non-integer playtime for appid={appid_int}")
-        
-        # Use game name from API if available, otherwise leave as None
-        name_to_use = game_name[:255] if game_name else None
-        ownerships.append(Ownership(steamid=steamid, appid=appid_int, game_name=name_to_use, playtime_forever=pt))
+def game_names(session: Session, appids: Iterable[int], chunk_size: int = 500) -> Dict[int, str]:
+    """Names from the local ``games`` table for the given appids, in chunked IN queries."""
+    from ..models import Game
+
+    appid_list = sorted(set(appids))
+    names: Dict[int, str] = {}
+    for i in range(0, len(appid_list), chunk_size):
+        chunk = appid_list[i:i + chunk_size]
+        names.update(session.query(Game.appid, Game.name).filter(Game.appid.in_(chunk)).all())
+    return names
+
+
+def transform_owned_games(
+    steamid: str,
+    response: Union[dict, Iterable[dict]],
+    session: Optional[Session] = None,
+    as_models: bool = False,
+) -> Union[List[OwnershipRecord], List[Ownership]]:
+    """``OwnershipRecord`` rows from a GetOwnedGames response, or from its game rows as they stream in.
+
+    Rows without a name (``include_appinfo=0`` responses) are named from the local
+    ``games`` table when ``session`` is given; apps missing there keep ``game_name=None``.
+    ``as_models=True`` returns ``Ownership`` objects instead.
+    """
+    if isinstance(response, dict) or response is None:
+        games = (response or {}).get("response", {}).get("games", [])
+    else:
+        games = list(response)
+    appids = int_column([g.get("appid") for g in games])
+    playtimes = int_column([g.get("playtime_forever") for g in games])
+    # Steam API includes game name in owned games response unless include_appinfo=0
+    names = truncate([g.get("name") for g in games], 255)
+    valid = [a is not None and a is not INVALID for a in appids]
+
+    log = BatchLog(logger)
+    if not all(valid):
+        for g, appid in zip(games, appids):
+            if appid is None:
+                log.skip("missing_appid", "Skipping owned game with missing appid")
+            elif appid is INVALID:
+                log.skip("invalid_appid", "Skipping owned game with non-integer appid: %r", g.get("appid"))
+    if log.debug_enabled:
+        for appid, pt in zip(appids, playtimes):
+            if pt is INVALID:
+                log.debug("invalid_playtime", "Ignoring non-integer playtime for appid=%s", appid)
+            elif pt is not None and pt < 0:
+                log.debug("negative_playtime", "Clamping negative playtime to 0 for appid=%s", appid)
+    playtimes = [None if pt is INVALID else pt for pt in clamp_negative(playtimes)]
+
+    ownerships = list(map(OwnershipRecord._make, compress(zip(repeat(steamid), appids, names, playtimes), valid)))
+    unnamed = [o.appid for o in ownerships if o.game_name is None]
+    if session is not None and unnamed:
+        known = game_names(session, unnamed)
+        ownerships = [o._replace(game_name=known.get(o.appid)) if o.game_name is None else o for o in ownerships]
+        logger.info(f"Resolved {len(known)} names from the games table, {len(unnamed) - len(known)} unknown")
+    _count_rows("owned_games", len(games), len(ownerships))
+    log.summary(f"owned games for steamid={steamid}")
     logger.info(f"Transformed {len(ownerships)} ownership rows for steamid={steamid}")
-    return ownerships
+    return to_models(ownerships) if as_models else ownerships
 
 
-def upsert_games(session: Session, games: Iterable[Game]) -> int:
-    count = 0
+def game_content_hash(game: Union[GameRecord, Game]) -> str:
+    """Stable digest of the fields we load from appdetails; equal hash means nothing to write."""
+    canonical = json.dumps([game.name, game.type, game.is_free], separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _existing_game_hashes(session: Session, appids: List[int], chunk_size: int = 500) -> Dict[int, Optional[str]]:
+    from ..models import Game
+
+    hashes: Dict[int, Optional[str]] = {}
+    for i in range(0, len(appids), chunk_size):
+        chunk = appids[i:i + chunk_size]
+        hashes.update(session.query(Game.appid, Game.content_hash).filter(Game.appid.in_(chunk)).all())
+    return hashes
+
+
+@timed_upsert("games")
+def upsert_games(session: Session, games: Iterable[Union[GameRecord, Game]]) -> int:
+    """Upsert games, skipping rows whose content hash matches the stored one. Returns rows written."""
+    from ..models import Game
+
+    valid: List[Union[GameRecord, Game]] = []
+    log = BatchLog(logger)
     for game in games:
         if not game.appid or not game.name:
-            logger.debug(f"Skipping invalid game row: {game}")
+            log.skip("invalid_row", "Skipping invalid game row: %s", game)
             continue
-        existing = session.get(Game, game.appid)
-        if existing:
+        valid.append(game)
+
+    known = _existing_game_hashes(session, [g.appid for g in valid])
+    changed = unchanged = 0
+    for game in valid:
+        digest = game_content_hash(game)
+        if game.appid in known:
+            if known[game.appid] == digest:
+                unchanged += 1
+                continue
+            existing = session.get(Game, game.appid)
             existing.name = game.name
             existing.type = game.type
             existing.is_free = game.is_free
+            existing.content_hash = digest
         else:
-            session.add(game)
-        count += 1
-    logger.info(f"Upserted {count} games")
-    return count
+            model = as_model(game)
+            model.content_hash = digest
+            session.add(model)
+        known[game.appid] = digest
+        changed += 1
+    log.summary("games upsert")
+    logger.info(f"Upserted {changed} games ({unchanged} unchanged)")
+    return changed
 
 
-def upsert_achievements(session: Session, achievements: Iterable[AchievementGlobal]) -> int:
-    """Upsert achievements, updating existing ones or inserting new ones"""
+@timed_upsert("achievements_global")
+def upsert_achievements(session: Session, achievements: Iterable[Union[AchievementRecord, AchievementGlobal]], record_series: bool = True) -> int:
+    """Upsert achievements, updating existing ones or inserting new ones.
+
+    With ``record_series``, changed percents are appended to ``achievement_percent_samples``.
+    Returns rows written; rows whose percent is unchanged are skipped.
+    """
+    from ..models import AchievementGlobal
+    from .timeseries import record_percent_sample
+
     count = 0
+    unchanged = 0
+    added: List[AchievementGlobal] = []
+    log = BatchLog(logger)
     for achievement in achievements:
         if not achievement.appid or not achievement.name:
-            logger.debug(f"Skipping invalid achievement row: {achievement}")
+            log.skip("invalid_row", "Skipping invalid achievement row: %s", achievement)
             continue
         
         # Check if achievement already exists
@@ -116,26 +249,58 @@ def upsert_achievements(session: Session, achievements: Iterable[AchievementGlob
             AchievementGlobal.appid == achievement.appid,
             AchievementGlobal.name == achievement.name
         ).first()
-        
+
+        if record_series and existing:
+            record_percent_sample(session, existing.id, previous=existing.percent, current=achievement.percent)
+
+        if existing and existing.percent == achievement.percent:
+            unchanged += 1
+            continue
         if existing:
             # Update existing achievement
             existing.percent = achievement.percent
-            logger.debug(f"Updated achievement {achievement.name} for appid {achievement.appid}")
+            log.debug("updated", "Updated achievement %s for appid %s", achievement.name, achievement.appid)
         else:
             # Insert new achievement
-            session.add(achievement)
-            logger.debug(f"Added new achievement {achievement.name} for appid {achievement.appid}")
+            model = as_model(achievement)
+            session.add(model)
+            added.append(model)
+            log.debug("added", "Added new achievement %s for appid %s", achievement.name, achievement.appid)
         count += 1
-    
-    logger.info(f"Upserted {count} achievements")
+
+    if record_series and added:
+        # Samples reference the achievement id, which new rows only get on flush
+        session.flush()
+        for achievement in added:
+            record_percent_sample(session, achievement.id, previous=None, current=achievement.percent)
+
+    log.summary("achievements upsert")
+    logger.info(f"Upserted {count} achievements ({unchanged} unchanged)")
     return count
 
-def upsert_ownerships(session: Session, ownerships: Iterable[Ownership]) -> int:
-    """Upsert ownerships, updating existing ones or inserting new ones"""
+@timed_upsert("ownerships")
+def upsert_ownerships(
+    session: Session,
+    ownerships: Iterable[Union[OwnershipRecord, Ownership]],
+    sketches: Optional[OwnershipSketches] = None,
+    record_history: bool = True,
+) -> int:
+    """Upsert ownerships, updating existing ones or inserting new ones.
+
+    When ``sketches`` is given, each row's playtime delta is fed into it.
+    With ``record_history``, playtime changes are appended to ``ownership_history``.
+    Returns rows written; rows with unchanged playtime and name are skipped.
+    """
+    from ..models import Ownership
+    from .history import history_appids, record_playtime_change
+
+    known_history: Dict[str, set] = {}
     count = 0
+    unchanged = 0
+    log = BatchLog(logger)
     for ownership in ownerships:
         if not ownership.steamid or not ownership.appid:
-            logger.debug(f"Skipping invalid ownership row: {ownership}")
+            log.skip("invalid_row", "Skipping invalid ownership row: %s", ownership)
             continue
         
         # Check if ownership already exists
@@ -144,18 +309,47 @@ def upsert_ownerships(session: Session, ownerships: Iterable[Ownership]) -> int:
             Ownership.appid == ownership.appid
         ).first()
         
+        if sketches is not None:
+            previous = (existing.playtime_forever or 0) if existing else 0
+            sketches.observe(
+                ownership.steamid,
+                ownership.appid,
+                playtime_delta=(ownership.playtime_forever or 0) - previous,
+                new_owner=existing is None,
+            )
+
+        if record_history:
+            if existing and ownership.steamid not in known_history:
+                known_history[ownership.steamid] = history_appids(session, ownership.steamid)
+            record_playtime_change(
+                session,
+                ownership.steamid,
+                ownership.appid,
+                previous=(existing.playtime_forever or 0) if existing else None,
+                current=ownership.playtime_forever,
+                has_history=existing is None or ownership.appid in known_history[ownership.steamid],
+            )
+
+        game_name = ownership.game_name
+        if existing and game_name is None:
+            # No name in the response and none in games yet: keep what we have
+            game_name = existing.game_name
+        if existing and existing.playtime_forever == ownership.playtime_forever and existing.game_name == game_name:
+            unchanged += 1
+            continue
         if existing:
             # Update existing ownership
             existing.playtime_forever = ownership.playtime_forever
-            existing.game_name = ownership.game_name
-            logger.debug(f"Updated ownership for steamid {ownership.steamid}, appid {ownership.appid}")
+            existing.game_name = game_name
+            log.debug("updated", "Updated ownership for steamid %s, appid %s", ownership.steamid, ownership.appid)
         else:
             # Insert new ownership
-            session.add(ownership)
-            logger.debug(f"Added new ownership for steamid {ownership.steamid}, appid {ownership.appid}")
+            session.add(as_model(ownership))
+            log.debug("added", "Added new ownership for steamid %s, appid %s", ownership.steamid, ownership.appid)
         count += 1
-    
-    logger.info(f"Upserted {count} ownerships")
+
+    log.summary("ownerships upsert")
+    logger.info(f"Upserted {count} ownerships ({unchanged} unchanged)")
     return count
 
 def insert_ignore_conflicts(session: Session, rows: Iterable[object]) -> int:
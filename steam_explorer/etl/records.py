@@ -0,0 +1,104 @@
+"""Compact row records produced by the transforms.
+
+A record is a plain tuple with named fields: no per-instance ``__dict__`` and no
+SQLAlchemy instance state, so a transform over a large response costs one small
+tuple per row. The upserts take records (or ORM objects) directly; ``to_model``
+builds the ORM object only when a caller needs one.
+
+Validation runs column by column over a whole batch (``int_column``,
+``clamp_negative``, ``truncate``) instead of row by row with try/except.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterable, List, NamedTuple, Optional, Sequence
+
+if TYPE_CHECKING:
+    from ..models import Game, AchievementGlobal, Ownership
+
+
+# Placeholder in a coerced column for a value that was present but not an integer
+INVALID = object()
+
+
+class GameRecord(NamedTuple):
+    appid: int
+    name: str
+    type: Optional[str]
+    is_free: Optional[bool]
+
+    def to_model(self) -> Game:
+        from ..models import Game
+
+        return Game(appid=self.appid, name=self.name, type=self.type, is_free=self.is_free)
+
+
+class AchievementRecord(NamedTuple):
+    appid: int
+    name: str
+    percent: float
+
+    def to_model(self) -> AchievementGlobal:
+        from ..models import AchievementGlobal
+
+        return AchievementGlobal(appid=self.appid, name=self.name, percent=self.percent)
+
+
+class OwnershipRecord(NamedTuple):
+    steamid: str
+    appid: int
+    game_name: Optional[str]
+    playtime_forever: Optional[int]
+
+    def to_model(self) -> Ownership:
+        from ..models import Ownership
+
+        return Ownership(steamid=self.steamid, appid=self.appid, game_name=self.game_name, playtime_forever=self.playtime_forever)
+
+
+def as_model(row):
+    """The ORM object for a record; an ORM instance passes through unchanged."""
+    return row.to_model() if isinstance(row, tuple) else row
+
+
+def to_models(records: Iterable) -> list:
+    return [as_model(row) for row in records]
+
+
+def int_column(values: Iterable[object]) -> List[object]:
+    """``values`` as ints; ``None`` stays ``None`` and non-integers become ``INVALID``."""
+    out: List[object] = []
+    append = out.append
+    for value in values:
+        # ints (the common case) skip the conversion and its exception handling
+        if type(value) is int or value is None:
+            append(value)
+            continue
+        try:
+            append(int(value))  # type: ignore[call-overload]
+        except (TypeError, ValueError):
+            append(INVALID)
+    return out
+
+
+def float_column(values: Iterable[object]) -> List[object]:
+    """``values`` as floats; ``None`` stays ``None`` and non-numbers become ``INVALID``."""
+    out: List[object] = []
+    append = out.append
+    for value in values:
+        if type(value) is float or value is None:
+            append(value)
+            continue
+        try:
+            append(float(value))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            append(INVALID)
+    return out
+
+
+def clamp_negative(values: Sequence[object]) -> List[object]:
+    """Negative ints replaced by 0; ``None`` and ``INVALID`` unchanged."""
+    return [0 if type(v) is int and v < 0 else v for v in values]
+
+
+def truncate(values: Iterable[Optional[str]], length: int) -> List[Optional[str]]:
+    """Strings cut to ``length``; empty strings become ``None``."""
+    return [v[:length] if v else None for v in values]
@@ -0,0 +1,330 @@
+from __future__ import annotations
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import math
+import struct
+import zlib
+
+from sqlalchemy.orm import Session
+
+from ..models import Ownership, Sketch
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def _hash64(value: object, seed: int = 0) -> int:
+    # Stable across processes (unlike hash()), so persisted sketches stay mergeable
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8, salt=seed.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+class HyperLogLog:
+    """Distinct-count estimator; relative error is about 1.04 / sqrt(2 ** precision)."""
+
+    def __init__(self, precision: int = 11, registers: Optional[bytearray] = None) -> None:
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+        self._cached: Optional[int] = None
+
+    def add(self, value: object) -> bool:
+        x = _hash64(value)
+        idx = x & (self.m - 1)
+        w = x >> self.precision
+        rank = (64 - self.precision) - w.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+            self._cached = None
+            return True
+        return False
+
+    def count(self) -> int:
+        if self._cached is not None:
+            return self._cached
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        total = 0.0
+        zeros = 0
+        for r in self.registers:
+            total += 2.0 ** -r
+            if r == 0:
+                zeros += 1
+        estimate = alpha * m * m / total
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        self._cached = int(round(estimate))
+        return self._cached
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        regs = self.registers
+        for i, r in enumerate(other.registers):
+            if r > regs[i]:
+                regs[i] = r
+        self._cached = None
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(precision=data[0], registers=bytearray(data[1:]))
+
+
+class CountMinSketch:
+    """Frequency estimator that never under-counts; over-count is bounded by total * e / width."""
+
+    _HEADER = struct.Struct("<II")
+
+    def __init__(self, width: int = 1024, depth: int = 4, table: Optional[array] = None) -> None:
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else array("q", bytes(8 * width * depth))
+
+    @classmethod
+    def for_error(cls, epsilon: float, delta: float) -> "CountMinSketch":
+        """Size so estimates exceed the truth by at most ``epsilon * total`` with probability ``1 - delta``."""
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1.0 / delta)))
+
+    def total(self) -> int:
+        return sum(self.table[:self.width])
+
+    def error_bound(self) -> float:
+        return math.e / self.width * self.total()
+
+    def _cells(self, key: object) -> Iterable[int]:
+        for row in range(self.depth):
+            yield row * self.width + _hash64(key, seed=row + 1) % self.width
+
+    def add(self, key: object, amount: int = 1) -> None:
+        for cell in self._cells(key):
+            self.table[cell] += amount
+
+    def estimate(self, key: object) -> int:
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge CountMinSketches with different dimensions")
+        table = self.table
+        for i, v in enumerate(other.table):
+            if v:
+                table[i] += v
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self.width, self.depth) + self.table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        width, depth = cls._HEADER.unpack_from(data)
+        table = array("q")
+        table.frombytes(data[cls._HEADER.size:])
+        return cls(width=width, depth=depth, table=table)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in fixed memory; each count over-estimates by at most its recorded error."""
+
+    def __init__(self, capacity: int = 200) -> None:
+        self.capacity = capacity
+        self.counts: Dict[int, List[int]] = {}  # key -> [count, error]
+
+    def add(self, key: int, amount: int = 1) -> None:
+        if amount <= 0:
+            return
+        entry = self.counts.get(key)
+        if entry is not None:
+            entry[0] += amount
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = [amount, 0]
+        else:
+            victim = min(self.counts, key=lambda k: self.counts[k][0])
+            floor = self.counts.pop(victim)[0]
+            self.counts[key] = [floor + amount, floor]
+
+    def top(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [(key, count, error) for key, (count, error) in ranked[:n]]
+
+    def _floor(self) -> int:
+        # Any key not tracked here may have been seen up to this many times
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(count for count, _error in self.counts.values())
+
+    def merge(self, other: "SpaceSaving") -> None:
+        mine_floor, other_floor = self._floor(), other._floor()
+        combined: Dict[int, List[int]] = {}
+        for key in set(self.counts) | set(other.counts):
+            count_a, error_a = self.counts.get(key, (mine_floor, mine_floor))
+            count_b, error_b = other.counts.get(key, (other_floor, other_floor))
+            combined[key] = [count_a + count_b, error_a + error_b]
+        ranked = sorted(combined.items(), key=lambda kv: kv[1][0], reverse=True)
+        self.counts = dict(ranked[: self.capacity])
+
+    def to_bytes(self) -> bytes:
+        payload = {"capacity": self.capacity, "counts": [[k, c, e] for k, (c, e) in self.counts.items()]}
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        payload = json.loads(data.decode("utf-8"))
+        sketch = cls(capacity=payload["capacity"])
+        sketch.counts = {int(k): [c, e] for k, c, e in payload["counts"]}
+        return sketch
+
+
+class OwnershipSketches:
+    """Per-app owner HLLs plus playtime/owner heavy hitters, fed with ownership deltas."""
+
+    OWNERS_PREFIX = "hll:owners:"
+    PLAYTIME_CMS = "cms:playtime"
+    PLAYTIME_TOP = "ss:playtime"
+    OWNERS_TOP = "ss:owners"
+
+    def __init__(self, precision: int = 11, playtime_epsilon: float = 1e-4, playtime_delta: float = 0.01) -> None:
+        self.precision = precision
+        self.owners: Dict[int, HyperLogLog] = {}
+        # Over-count per app is at most epsilon * total playtime across all apps
+        self.playtime = CountMinSketch.for_error(playtime_epsilon, playtime_delta)
+        self.top_playtime = SpaceSaving()
+        self.top_owners = SpaceSaving()
+
+    def observe(self, steamid: str, appid: int, playtime_delta: int = 0, new_owner: bool = False) -> None:
+        """Record one ownership change. Deltas (not totals) keep re-ingested users from double counting."""
+        hll = self.owners.get(appid)
+        if hll is None:
+            hll = self.owners[appid] = HyperLogLog(self.precision)
+        hll.add(steamid)
+        if new_owner:
+            self.top_owners.add(appid, 1)
+        if playtime_delta > 0:
+            self.playtime.add(appid, playtime_delta)
+            self.top_playtime.add(appid, playtime_delta)
+
+    def estimate_owners(self, appid: int) -> int:
+        hll = self.owners.get(appid)
+        return hll.count() if hll else 0
+
+    def estimate_playtime(self, appid: int) -> int:
+        return self.playtime.estimate(appid)
+
+    def playtime_error_bound(self) -> float:
+        return self.playtime.error_bound()
+
+    def top_apps_by_playtime(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        return self.top_playtime.top(n)
+
+    def top_apps_by_owners(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        return self.top_owners.top(n)
+
+    def merge(self, other: "OwnershipSketches") -> None:
+        for appid, hll in other.owners.items():
+            mine = self.owners.get(appid)
+            if mine is None:
+                self.owners[appid] = HyperLogLog.from_bytes(hll.to_bytes())
+            else:
+                mine.merge(hll)
+        self.playtime.merge(other.playtime)
+        self.top_playtime.merge(other.top_playtime)
+        self.top_owners.merge(other.top_owners)
+
+    def to_payloads(self) -> Dict[str, bytes]:
+        payloads = {f"{self.OWNERS_PREFIX}{appid}": hll.to_bytes() for appid, hll in self.owners.items()}
+        payloads[self.PLAYTIME_CMS] = self.playtime.to_bytes()
+        payloads[self.PLAYTIME_TOP] = self.top_playtime.to_bytes()
+        payloads[self.OWNERS_TOP] = self.top_owners.to_bytes()
+        return payloads
+
+    @classmethod
+    def from_payloads(cls, payloads: Dict[str, bytes]) -> "OwnershipSketches":
+        sketches = cls()
+        for name, data in payloads.items():
+            if name.startswith(cls.OWNERS_PREFIX):
+                hll = HyperLogLog.from_bytes(data)
+                sketches.owners[int(name[len(cls.OWNERS_PREFIX):])] = hll
+                sketches.precision = hll.precision
+            elif name == cls.PLAYTIME_CMS:
+                sketches.playtime = CountMinSketch.from_bytes(data)
+            elif name == cls.PLAYTIME_TOP:
+                sketches.top_playtime = SpaceSaving.from_bytes(data)
+            elif name == cls.OWNERS_TOP:
+                sketches.top_owners = SpaceSaving.from_bytes(data)
+        return sketches
+
+
+def load_sketches(session: Session, appids: Optional[Iterable[int]] = None) -> OwnershipSketches:
+    """Load persisted sketches; pass ``appids`` to load only those apps' owner HLLs."""
+    query = session.query(Sketch.name, Sketch.payload)
+    if appids is not None:
+        names = [OwnershipSketches.PLAYTIME_CMS, OwnershipSketches.PLAYTIME_TOP, OwnershipSketches.OWNERS_TOP]
+        names.extend(f"{OwnershipSketches.OWNERS_PREFIX}{appid}" for appid in appids)
+        query = query.filter(Sketch.name.in_(names))
+    rows = query.all()
+    return OwnershipSketches.from_payloads({name: zlib.decompress(payload) for name, payload in rows})
+
+
+def _touched_names(sketches: OwnershipSketches) -> List[str]:
+    names = [OwnershipSketches.PLAYTIME_CMS, OwnershipSketches.PLAYTIME_TOP, OwnershipSketches.OWNERS_TOP]
+    names.extend(f"{OwnershipSketches.OWNERS_PREFIX}{appid}" for appid in sketches.owners)
+    return names
+
+
+def save_sketches(session: Session, sketches: OwnershipSketches, chunk_size: int = 500) -> int:
+    """Merge this run's sketches into the persisted ones, so separate ingestion runs combine.
+
+    Only the rows this run touched (its apps' HLLs plus the global summaries) are read and written.
+    """
+    names = _touched_names(sketches)
+    existing: Dict[str, Sketch] = {}
+    for i in range(0, len(names), chunk_size):
+        for row in session.query(Sketch).filter(Sketch.name.in_(names[i:i + chunk_size])):
+            existing[row.name] = row
+    stored = OwnershipSketches.from_payloads({name: zlib.decompress(row.payload) for name, row in existing.items()})
+    stored.merge(sketches)
+
+    count = 0
+    for name, data in stored.to_payloads().items():
+        payload = zlib.compress(data)
+        row = existing.get(name)
+        if row is None:
+            session.add(Sketch(name=name, payload=payload))
+        elif row.payload != payload:
+            row.payload = payload
+        else:
+            continue
+        count += 1
+    logger.info(f"Saved {count} sketch rows ({len(sketches.owners)} apps touched)")
+    return count
+
+
+def rebuild_sketches(session: Session, chunk_size: int = 5000) -> int:
+    """Replace all sketches with ones built from the current ownerships table (keyset-paged).
+
+    Used to backfill ownerships that were loaded before sketches existed or without them.
+    Returns the number of ownership rows observed.
+    """
+    sketches = OwnershipSketches()
+    last_id = 0
+    observed = 0
+    while True:
+        rows = session.query(Ownership.id, Ownership.steamid, Ownership.appid, Ownership.playtime_forever).filter(
+            Ownership.id > last_id
+        ).order_by(Ownership.id).limit(chunk_size).all()
+        if not rows:
+            break
+        for row_id, steamid, appid, playtime in rows:
+            sketches.observe(steamid, appid, playtime_delta=playtime or 0, new_owner=True)
+        observed += len(rows)
+        last_id = rows[-1][0]
+    session.query(Sketch).delete()
+    save_sketches(session, sketches)
+    logger.info(f"Rebuilt sketches from {observed} ownership rows")
+    return observed
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import AchievementGlobal, AchievementPercentSample
+from ..logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+PERCENT_SCALE = 100  # store percent * 100, i.e. 0.01% resolution
+
+# (age in days, bucket size in days): samples older than the age keep one point per bucket
+DEFAULT_RETENTION: Sequence[Tuple[int, int]] = ((90, 7), (365, 30))
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def quantize_percent(percent: float) -> int:
+    return int(round(float(percent) * PERCENT_SCALE))
+
+
+def record_percent_sample(
+    session: Session,
+    achievement_id: int,
+    previous: Optional[float],
+    current: float,
+    at: Optional[datetime] = None,
+) -> bool:
+    """Append a sample unless the quantized value equals ``previous`` (None means first sighting)."""
+    q = quantize_percent(current)
+    if previous is not None and quantize_percent(previous) == q:
+        return False
+    session.add(AchievementPercentSample(achievement_id=achievement_id, percent_q=q, sampled_at=at or datetime.utcnow()))
+    return True
+
+
+def achievement_series(
+    session: Session,
+    appid: int,
+    name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Tuple[datetime, float]]:
+    """(sampled_at, percent) points for one achievement, oldest first."""
+    query = session.query(AchievementPercentSample.sampled_at, AchievementPercentSample.percent_q).join(
+        AchievementGlobal, AchievementGlobal.id == AchievementPercentSample.achievement_id,
+    ).filter(
+        AchievementGlobal.appid == appid,
+        AchievementGlobal.name == name,
+    )
+    if start is not None:
+        query = query.filter(AchievementPercentSample.sampled_at >= start)
+    if end is not None:
+        query = query.filter(AchievementPercentSample.sampled_at <= end)
+    rows = query.order_by(AchievementPercentSample.sampled_at).all()
+    return [(sampled_at, q / PERCENT_SCALE) for sampled_at, q in rows]
+
+
+def downsample_samples(
+    session: Session,
+    retention: Sequence[Tuple[int, int]] = DEFAULT_RETENTION,
+    now: Optional[datetime] = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Thin old samples to the last point per bucket, per the retention tiers. Returns rows deleted."""
+    now = now or datetime.utcnow()
+    deleted = 0
+    for age_days, bucket_days in retention:
+        cutoff = now - timedelta(days=age_days)
+        rows = session.query(
+            AchievementPercentSample.id,
+            AchievementPercentSample.achievement_id,
+            AchievementPercentSample.sampled_at,
+        ).filter(AchievementPercentSample.sampled_at < cutoff).order_by(
+            AchievementPercentSample.achievement_id,
+            AchievementPercentSample.sampled_at,
+        ).yield_per(chunk_size)
+
+        doomed: List[int] = []
+        previous_key = None
+        previous_id = None
+        for row_id, achievement_id, sampled_at in rows:
+            key = (achievement_id, (sampled_at - _EPOCH).days // bucket_days)
+            if key == previous_key:
+                # A later point in the same bucket supersedes the earlier one
+                doomed.append(previous_id)
+            previous_key, previous_id = key, row_id
+        for i in range(0, len(doomed), chunk_size):
+            chunk = doomed[i:i + chunk_size]
+            deleted += session.query(AchievementPercentSample).filter(
+                AchievementPercentSample.id.in_(chunk)
+            ).delete(synchronize_session=False)
+    logger.info(f"Downsampled achievement series, removed {deleted} samples")
+    return deleted
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    shift = result = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_series(points: Iterable[Tuple[datetime, float]]) -> bytes:
+    """Delta + zigzag varint encoding of (timestamp, percent) points for compact transfer/charting."""
+    out = bytearray()
+    prev_ts = prev_q = 0
+    for sampled_at, percent in points:
+        ts = int((sampled_at - _EPOCH).total_seconds())
+        q = quantize_percent(percent)
+        _write_varint(out, _zigzag(ts - prev_ts))
+        _write_varint(out, _zigzag(q - prev_q))
+        prev_ts, prev_q = ts, q
+    return bytes(out)
+
+
+def decode_series(data: bytes) -> List[Tuple[datetime, float]]:
+    points: List[Tuple[datetime, float]] = []
+    pos = ts = q = 0
+    while pos < len(data):
+        d_ts, pos = _read_varint(data, pos)
+        d_q, pos = _read_varint(data, pos)
+        ts += _unzigzag(d_ts)
+        q += _unzigzag(d_q)
+        points.append((_EPOCH + timedelta(seconds=ts), q / PERCENT_SCALE))
+    return points
@@ -1,25 +1,102 @@
+import atexit
 import logging
 import os
-from typing import Optional
+from collections import Counter
+from typing import Any, Optional
 
 
+# True once setup_logging() ran; until then get_logger() installs a plain synchronous handler
 _LOGGING_CONFIGURED = False
+_default_handler: Optional[logging.Handler] = None
+_listener: Optional["logging.handlers.QueueListener"] = None
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+
+def _level(level: Optional[str] = None) -> int:
+    env_level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    return getattr(logging, env_level, logging.INFO)
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
 
 
 def setup_logging(level: Optional[str] = None) -> None:
-    global _LOGGING_CONFIGURED
+    """Root logging through a QueueHandler; a background QueueListener does the formatting and I/O.
+
+    Callers never block on a slow terminal or pipe. ``LOG_QUEUE=0`` writes synchronously instead.
+    Entry points call this after parsing arguments: ``logging.handlers`` is a noticeable import.
+    Like ``logging.basicConfig``, this leaves logging alone when the host application (e.g.
+    Alembic's ``fileConfig``) already configured the root logger.
+    """
+    global _LOGGING_CONFIGURED, _default_handler, _listener
     if _LOGGING_CONFIGURED:
         return
-    env_level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
-    numeric_level = getattr(logging, env_level, logging.INFO)
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    )
+    root = logging.getLogger()
+    if _default_handler is not None:
+        root.removeHandler(_default_handler)
+        _default_handler = None
     _LOGGING_CONFIGURED = True
+    if root.handlers:
+        return
+    root.setLevel(_level(level))
+    if os.getenv("LOG_QUEUE", "1").strip().lower() in ("0", "false", "no"):
+        root.addHandler(_stream_handler())
+    else:
+        from logging.handlers import QueueHandler, QueueListener
+        from queue import SimpleQueue
+
+        records: "SimpleQueue[logging.LogRecord]" = SimpleQueue()
+        root.addHandler(QueueHandler(records))
+        _listener = QueueListener(records, _stream_handler(), respect_handler_level=True)
+        _listener.start()
+        # Drain what is queued before the interpreter exits
+        atexit.register(_listener.stop)
 
 
 def get_logger(name: str) -> logging.Logger:
-    if not _LOGGING_CONFIGURED:
-        setup_logging()
+    global _default_handler
+    root = logging.getLogger()
+    if not _LOGGING_CONFIGURED and _default_handler is None and not root.handlers:
+        _default_handler = _stream_handler()
+        root.setLevel(_level())
+        root.addHandler(_default_handler)
     return logging.getLogger(name)
+
+
+class BatchLog:
+    """Hot-path logging for one batch of rows.
+
+    Per-row messages are %-style and only formatted when DEBUG is on; each message key
+    logs its first ``first`` occurrences and then every ``every``-th. Skips are tallied
+    by reason and reported once by ``summary``.
+    """
+
+    def __init__(self, logger: logging.Logger, first: int = 5, every: int = 1000) -> None:
+        self.logger = logger
+        self.first = first
+        self.every = every
+        self.debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        self.skips: Counter = Counter()
+        self._seen: Counter = Counter()
+
+    def debug(self, key: str, msg: str, *args: Any) -> None:
+        if not self.debug_enabled:
+            return
+        seen = self._seen[key] = self._seen[key] + 1
+        if seen <= self.first:
+            self.logger.debug(msg, *args)
+        elif seen % self.every == 0:
+            self.logger.debug(msg + " (%d %s messages so far)", *args, seen, key)
+
+    def skip(self, reason: str, msg: str, *args: Any) -> None:
+        self.skips[reason] += 1
+        self.debug(reason, msg, *args)
+
+    def summary(self, what: str) -> None:
+        if self.skips:
+            reasons = ", ".join(f"{reason}={count}" for reason, count in self.skips.most_common())
+            self.logger.info("%s: skipped %d rows (%s)", what, sum(self.skips.values()), reasons)
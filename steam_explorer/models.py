@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, Float, Boolean, DateTime, Index, UniqueConstraint
+from sqlalchemy import String, Integer, BigInteger, SmallInteger, Float, Boolean, DateTime, ForeignKey, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
 
@@ -13,6 +13,7 @@ class Game(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     is_free: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -45,3 +46,100 @@ class Ownership(Base):
     game_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     playtime_forever: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Sketch(Base):
+    __tablename__ = "sketches"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary(length=16_777_215), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class OwnershipHistory(Base):
+    """Append-only playtime deltas; ``period`` (YYYYMM) is the time partition key."""
+
+    __tablename__ = "ownership_history"
+    __table_args__ = (
+        Index("ix_ownership_history_steamid_recorded_at", "steamid", "recorded_at"),
+        Index("ix_ownership_history_period", "period"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    steamid: Mapped[str] = mapped_column(String(32), nullable=False)
+    appid: Mapped[int] = mapped_column(Integer, nullable=False)
+    playtime_delta: Mapped[int] = mapped_column(Integer, nullable=False)
+    baseline: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    period: Mapped[int] = mapped_column(Integer, nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class AchievementPercentSample(Base):
+    """Time series of global unlock rates; ``percent_q`` is the percent quantized to 0.01.
+
+    Rows reference ``achievements_global.id`` so each sample stays a few fixed-width integers.
+    """
+
+    __tablename__ = "achievement_percent_samples"
+    __table_args__ = (
+        Index("ix_achievement_percent_samples_achievement_id_sampled_at", "achievement_id", "sampled_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    achievement_id: Mapped[int] = mapped_column(Integer, ForeignKey("achievements_global.id", ondelete="CASCADE"), nullable=False)
+    percent_q: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    sampled_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class NegativeLookup(Base):
+    """Lookups that came back empty (delisted apps, apps without achievements) and when to retry them."""
+
+    __tablename__ = "negative_lookups"
+    __table_args__ = (
+        Index("ix_negative_lookups_kind_next_check_at", "kind", "next_check_at"),
+    )
+
+    kind: Mapped[str] = mapped_column(String(32), primary_key=True)
+    appid: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    reason: Mapped[str] = mapped_column(String(64), nullable=False)
+    failures: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_checked_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    next_check_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class RefreshJob(Base):
+    """One recurring refresh (owned games per steamid, appdetails/achievements per appid) for the daemon."""
+
+    __tablename__ = "refresh_jobs"
+    __table_args__ = (
+        UniqueConstraint("kind", "key", name="uq_refresh_jobs_kind_key"),
+        Index("ix_refresh_jobs_next_run_at", "next_run_at"),
+        Index("ix_refresh_jobs_kind_next_run_at", "kind", "next_run_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    key: Mapped[str] = mapped_column(String(32), nullable=False)
+    weight: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    failures: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_attempt_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_success_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Set while a worker holds the job; an expired lease makes the job claimable again
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class BackfillCheckpoint(Base):
+    """Progress of an online backfill (``steam_explorer/backfill.py``), so a restart resumes after the last batch."""
+
+    __tablename__ = "backfill_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_key: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rows_done: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
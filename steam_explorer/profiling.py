@@ -0,0 +1,178 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import io
+import re
+import threading
+import time
+
+from .logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+# A statement shape executed at least this often in one run is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = 20
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|:\w+|%\(\w+\)s)\s*,)+\s*(?:\?|%s|:\w+|%\(\w+\)s)\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ")
+
+
+def _brief(shape: str, width: int = 200) -> str:
+    # Column lists crowd out the FROM/WHERE that identify the query
+    return _SELECT_LIST.sub("SELECT ... FROM ", shape, count=1)[:width]
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize SQL so executions differing only in values or IN-list length compare equal."""
+    shape = _SPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _IN_LIST.sub("(?...)", shape)
+
+
+class SqlTimer:
+    """Times every cursor execution via SQLAlchemy engine events, grouped by statement shape."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.shapes: Dict[str, List[float]] = {}   # shape -> [count, total_seconds, max_seconds]
+        self.slowest: List[Tuple[float, str]] = []
+        self.keep_slowest = 15
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["profile_started"].pop()
+        elapsed = time.perf_counter() - started
+        shape = statement_shape(statement)
+        with self._lock:
+            entry = self.shapes.setdefault(shape, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+            if len(self.slowest) < self.keep_slowest or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, _SPACE.sub(" ", statement).strip()))
+                self.slowest.sort(key=lambda item: -item[0])
+                del self.slowest[self.keep_slowest:]
+
+    def install(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.listen(Engine, "before_cursor_execute", self._before)
+        event.listen(Engine, "after_cursor_execute", self._after)
+
+    def remove(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        event.remove(Engine, "before_cursor_execute", self._before)
+        event.remove(Engine, "after_cursor_execute", self._after)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int, float]]:
+        """(shape, count, total_seconds) for shapes run at least ``threshold`` times, most frequent first."""
+        rows = [(shape, int(count), total) for shape, (count, total, _max) in self.shapes.items() if count >= threshold]
+        return sorted(rows, key=lambda row: (-row[1], -row[2]))
+
+    def report(self) -> str:
+        out = io.StringIO()
+        total = sum(entry[1] for entry in self.shapes.values())
+        count = sum(int(entry[0]) for entry in self.shapes.values())
+        out.write(f"{count} statements, {total:.3f}s in the database\n\n")
+        out.write("Slowest statements:\n")
+        for elapsed, statement in self.slowest:
+            out.write(f"  {elapsed * 1000:9.2f} ms  {statement[:300]}\n")
+        out.write("\nBy statement shape (total time):\n")
+        for shape, (n, seconds, worst) in sorted(self.shapes.items(), key=lambda item: -item[1][1])[:25]:
+            out.write(f"  {int(n):7d} x  {seconds * 1000:10.2f} ms total  {worst * 1000:8.2f} ms max  {_brief(shape)}\n")
+        repeated = self.repeated()
+        out.write(f"\nPossible N+1 patterns (same shape >= {N_PLUS_ONE_THRESHOLD} times):\n")
+        if not repeated:
+            out.write("  none\n")
+        for shape, n, seconds in repeated:
+            out.write(f"  {n:7d} x  {seconds * 1000:10.2f} ms total  {_brief(shape)}\n")
+        return out.getvalue()
+
+
+def collapsed_stacks(stats: Any) -> List[str]:
+    """``caller;callee microseconds`` lines from pstats call edges, for flamegraph.pl / speedscope.
+
+    cProfile keeps one level of callers, so each line is a two-frame stack weighted by the
+    callee's time when called from that caller.
+    """
+    def label(func: Tuple[str, int, str]) -> str:
+        filename, lineno, name = func
+        return f"{name} ({filename.rsplit('/', 1)[-1]}:{lineno})" if lineno else name
+
+    lines = []
+    for callee, (_cc, _nc, tottime, _ct, callers) in stats.stats.items():
+        if not callers:
+            lines.append(f"{label(callee)} {int(tottime * 1e6)}")
+            continue
+        for caller, edge in callers.items():
+            edge_tottime = edge[2] if isinstance(edge, tuple) else tottime
+            micros = int(edge_tottime * 1e6)
+            if micros:
+                lines.append(f"{label(caller)};{label(callee)} {micros}")
+    return sorted(lines)
+
+
+@contextmanager
+def profiled(path: Optional[str], top: int = 40) -> Iterator[None]:
+    """Profile the block (CPU, allocations, SQL) and write one text report to ``path``.
+
+    A no-op without a path, so tools can wrap their work unconditionally.
+    """
+    if not path:
+        yield
+        return
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    sql = SqlTimer()
+    sql.install()
+    tracemalloc.start(10)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sql.remove()
+
+        out = io.StringIO()
+        out.write(f"# Profile report ({elapsed:.2f}s wall)\n\n")
+        out.write("## CPU (cProfile, by cumulative time)\n\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(top)
+        out.write("## CPU (by own time)\n\n")
+        stats.sort_stats("tottime").print_stats(top)
+        out.write(f"## Allocations (tracemalloc, current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB)\n\n")
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        for stat in snapshot.statistics("lineno")[:25]:
+            out.write(f"  {stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {stat.traceback[0]}\n")
+        out.write("\n## SQL\n\n")
+        out.write(sql.report())
+        out.write("\n## Collapsed call edges (caller;callee microseconds)\n\n")
+        out.write("\n".join(collapsed_stacks(stats)))
+        out.write("\n")
+        with open(path, "w") as f:
+            f.write(out.getvalue())
+        repeated = sql.repeated()
+        if repeated:
+            logger.warning(f"{len(repeated)} statement shapes look like N+1 queries; see {path}")
+        logger.info(f"Profile report written to {path}")
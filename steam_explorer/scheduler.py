@@ -0,0 +1,352 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+import heapq
+import itertools
+import math
+import signal
+import threading
+import time
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import metrics
+from .models import Game, NegativeLookup, Ownership, RefreshJob
+from .logging_utils import get_logger
+from .etl import negative_cache
+from .api.steam_client import appdetails_profile_for
+from .etl.pipeline import (
+    GAME_FIELDS,
+    transform_appdetails_to_games,
+    transform_global_achievements,
+    transform_owned_games,
+    upsert_achievements,
+    upsert_games,
+    upsert_ownerships,
+)
+from .etl.sketches import OwnershipSketches, save_sketches
+from .work_queue import default_worker_id, lease_job
+
+
+logger = get_logger(__name__)
+
+OWNED_GAMES = "owned_games"
+RECENTLY_PLAYED = "recently_played"
+APPDETAILS = "appdetails"
+ACHIEVEMENTS = "achievements"
+
+# How long a successful refresh stays fresh. Playtime is kept current by the cheap
+# recently-played refresh; the full library sync only picks up purchases/removals.
+REFRESH_INTERVALS: Dict[str, timedelta] = {
+    OWNED_GAMES: timedelta(days=7),
+    RECENTLY_PLAYED: timedelta(hours=1),
+    APPDETAILS: timedelta(days=30),
+    ACHIEVEMENTS: timedelta(days=1),
+}
+# Job kinds whose handlers record negative results; such jobs wait out the negative backoff
+NEGATIVE_KINDS: Dict[str, str] = {
+    APPDETAILS: negative_cache.APPDETAILS,
+    ACHIEVEMENTS: negative_cache.ACHIEVEMENTS,
+}
+FAILURE_BACKOFF_BASE = timedelta(minutes=5)
+FAILURE_BACKOFF_MAX = timedelta(hours=12)
+NEVER_FETCHED_STALENESS = 10.0
+
+QueuedJob = Tuple[int, str, str]  # (job id, kind, key)
+JobHandler = Callable[[object, Session, str], None]
+
+
+def job_priority(job: RefreshJob, now: datetime) -> float:
+    """Higher runs first: staleness relative to the kind's interval, boosted by playtime weight, damped by failures."""
+    if job.last_success_at is None:
+        staleness = NEVER_FETCHED_STALENESS
+    else:
+        staleness = (now - job.last_success_at).total_seconds() / REFRESH_INTERVALS[job.kind].total_seconds()
+    # Each failure halves the score, so a repeatedly failing job yields to healthy stale ones
+    return staleness * (1.0 + math.log1p(max(0.0, job.weight))) / (2 ** job.failures)
+
+
+def failure_backoff(failures: int) -> timedelta:
+    return min(FAILURE_BACKOFF_BASE * (2 ** max(0, failures - 1)), FAILURE_BACKOFF_MAX)
+
+
+def ensure_jobs(session: Session, kind: str, weights: Mapping[str, float]) -> int:
+    """Create missing jobs of ``kind`` and refresh weights of existing ones. Returns jobs created."""
+    existing = {job.key: job for job in session.query(RefreshJob).filter(RefreshJob.kind == kind)}
+    created = 0
+    for key, weight in weights.items():
+        job = existing.get(key)
+        if job is None:
+            session.add(RefreshJob(kind=kind, key=key, weight=weight, failures=0, next_run_at=datetime.utcnow()))
+            created += 1
+        elif job.weight != weight:
+            job.weight = weight
+    return created
+
+
+def enqueue_appdetails(session: Session, appids: Iterable[int], chunk_size: int = 500) -> int:
+    """Queue appdetails jobs for apps not queued yet (skipping negative-cached ones). Returns jobs created."""
+    due = negative_cache.filter_due(session, negative_cache.APPDETAILS, sorted(set(appids)))
+    now = datetime.utcnow()
+    created = 0
+    for i in range(0, len(due), chunk_size):
+        keys = [str(appid) for appid in due[i:i + chunk_size]]
+        queued = {key for (key,) in session.query(RefreshJob.key).filter(RefreshJob.kind == APPDETAILS, RefreshJob.key.in_(keys))}
+        for key in keys:
+            if key not in queued:
+                session.add(RefreshJob(kind=APPDETAILS, key=key, weight=0.0, failures=0, next_run_at=now))
+                created += 1
+    if created:
+        logger.info(f"Queued appdetails for {created} unknown apps")
+    return created
+
+
+def appdetails_missing(now: Optional[datetime] = None) -> List:
+    """``claim_jobs`` conditions for appdetails jobs whose app has no ``games`` row and no active negative entry.
+
+    Completed appdetails jobs come due again every 30 days for the daemon's refresh;
+    a worker that only fills gaps claims with these.
+    """
+    from sqlalchemy import String, cast, exists
+
+    now = now or datetime.utcnow()
+    return [
+        ~exists().where(cast(Game.appid, String) == RefreshJob.key),
+        ~exists().where(
+            NegativeLookup.kind == negative_cache.APPDETAILS,
+            cast(NegativeLookup.appid, String) == RefreshJob.key,
+            NegativeLookup.next_check_at > now,
+        ),
+    ]
+
+
+def seed_jobs(session: Session, steamids: Iterable[str]) -> int:
+    """Derive the job set from what we track: rostered users, owned apps and known games."""
+    hours_by_app = {
+        appid: (minutes or 0) / 60.0
+        for appid, minutes in session.query(Ownership.appid, func.sum(Ownership.playtime_forever)).group_by(Ownership.appid)
+    }
+    hours_by_user = {
+        steamid: (minutes or 0) / 60.0
+        for steamid, minutes in session.query(Ownership.steamid, func.sum(Ownership.playtime_forever)).group_by(Ownership.steamid)
+    }
+    for steamid in steamids:
+        hours_by_user.setdefault(steamid, 0.0)
+
+    known_games = {appid for (appid,) in session.query(Game.appid)}
+    missing = negative_cache.filter_due(session, negative_cache.APPDETAILS, sorted(set(hours_by_app) - known_games))
+    with_achievements = negative_cache.filter_due(
+        session, negative_cache.ACHIEVEMENTS,
+        [appid for (appid,) in session.query(Game.appid).filter((Game.type == "game") | Game.type.is_(None))],
+    )
+
+    created = ensure_jobs(session, OWNED_GAMES, hours_by_user)
+    created += ensure_jobs(session, RECENTLY_PLAYED, hours_by_user)
+    created += ensure_jobs(session, APPDETAILS, {str(appid): hours_by_app.get(appid, 0.0) for appid in missing})
+    created += ensure_jobs(session, ACHIEVEMENTS, {str(appid): hours_by_app.get(appid, 0.0) for appid in with_achievements})
+    logger.info(f"Seeded refresh jobs: {created} new")
+    return created
+
+
+def complete_job(session: Session, job_id: int, ok: bool, error: Optional[BaseException] = None, now: Optional[datetime] = None) -> None:
+    now = now or datetime.utcnow()
+    job = session.get(RefreshJob, job_id)
+    if job is None:
+        return
+    job.lease_owner = None
+    job.lease_expires_at = None
+    if ok:
+        job.failures = 0
+        job.last_error = None
+        job.last_success_at = now
+        job.next_run_at = now + REFRESH_INTERVALS[job.kind]
+        if job.kind in NEGATIVE_KINDS:
+            # A handler that recorded a miss (no achievements, delisted app) backs off for weeks, not a day
+            retry_at = negative_cache.next_check_at(session, NEGATIVE_KINDS[job.kind], int(job.key))
+            if retry_at is not None and retry_at > job.next_run_at:
+                job.next_run_at = retry_at
+    else:
+        job.failures += 1
+        job.last_error = str(error)[:255] if error else None
+        job.next_run_at = now + failure_backoff(job.failures)
+
+
+class RefreshScheduler:
+    """In-memory priority queue over due jobs, rebuilt from the refresh_jobs table."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, QueuedJob]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def load_due(self, session: Session, now: Optional[datetime] = None, limit: int = 1000) -> int:
+        now = now or datetime.utcnow()
+        jobs = session.query(RefreshJob).filter(
+            RefreshJob.next_run_at <= now,
+            or_(RefreshJob.lease_expires_at.is_(None), RefreshJob.lease_expires_at <= now),
+        ).order_by(RefreshJob.next_run_at).limit(limit).all()
+        self._heap = [(-job_priority(job, now), next(self._seq), (job.id, job.kind, job.key)) for job in jobs]
+        heapq.heapify(self._heap)
+        return len(self._heap)
+
+    def pop(self) -> Optional[QueuedJob]:
+        if not self._heap:
+            return None
+        return heapq.heappop(self._heap)[2]
+
+
+def refresh_owned_games(client, session: Session, key: str) -> None:
+    # Lean response: names come from the games table, unknown apps get appdetails jobs
+    rows = transform_owned_games(key, client.get_owned_games(key, include_appinfo=False), session=session)
+    enqueue_appdetails(session, [row.appid for row in rows if row.game_name is None])
+    sketches = OwnershipSketches()
+    upsert_ownerships(session, rows, sketches=sketches)
+    save_sketches(session, sketches)
+
+
+def refresh_recently_played(client, session: Session, key: str) -> None:
+    # Only games played in the last two weeks can have new playtime
+    rows = transform_owned_games(key, client.get_recently_played_games(key), session=session)
+    enqueue_appdetails(session, [row.appid for row in rows if row.game_name is None])
+    sketches = OwnershipSketches()
+    upsert_ownerships(session, rows, sketches=sketches)
+    save_sketches(session, sketches)
+
+
+def refresh_appdetails(client, session: Session, key: str) -> None:
+    appid = int(key)
+    appdetails = client.get_app_details([appid], batch_size=1, profile=appdetails_profile_for(GAME_FIELDS))
+    games = transform_appdetails_to_games(appdetails)
+    if games:
+        upsert_games(session, games)
+        negative_cache.clear_negative(session, negative_cache.APPDETAILS, [appid])
+    for miss in negative_cache.appdetails_misses([appid], appdetails):
+        negative_cache.record_negative(session, negative_cache.APPDETAILS, miss, "store_success_false")
+
+
+def refresh_achievements(client, session: Session, key: str) -> None:
+    import requests
+
+    appid = int(key)
+    try:
+        response = client.get_global_achievements_for_app(appid)
+    except requests.HTTPError as exc:
+        status = exc.response.status_code if exc.response is not None else None
+        if status not in (400, 403, 404):
+            raise
+        negative_cache.record_negative(session, negative_cache.ACHIEVEMENTS, appid, f"http_{status}")
+        return
+    rows = transform_global_achievements(appid, response)
+    if not rows:
+        negative_cache.record_negative(session, negative_cache.ACHIEVEMENTS, appid, "no_achievements")
+        return
+    negative_cache.clear_negative(session, negative_cache.ACHIEVEMENTS, [appid])
+    upsert_achievements(session, rows)
+
+
+DEFAULT_HANDLERS: Dict[str, JobHandler] = {
+    OWNED_GAMES: refresh_owned_games,
+    RECENTLY_PLAYED: refresh_recently_played,
+    APPDETAILS: refresh_appdetails,
+    ACHIEVEMENTS: refresh_achievements,
+}
+
+
+class RefreshDaemon:
+    """Runs refresh jobs back to back on one warm client and engine until asked to stop.
+
+    Each job's writes and its schedule update commit in one transaction, so a
+    shutdown (or crash) never loses a finished job or records an unfinished one.
+    """
+
+    def __init__(
+        self,
+        SessionLocal: sessionmaker,
+        client,
+        steamids: Iterable[str] = (),
+        idle_sleep: float = 30.0,
+        reseed_every: timedelta = timedelta(hours=1),
+        reload_every: timedelta = timedelta(minutes=5),
+        handlers: Optional[Mapping[str, JobHandler]] = None,
+    ) -> None:
+        self.SessionLocal = SessionLocal
+        self.client = client
+        self.steamids = list(steamids)
+        self.idle_sleep = idle_sleep
+        self.reseed_every = reseed_every
+        self.reload_every = reload_every
+        self.handlers = dict(handlers or DEFAULT_HANDLERS)
+        self.worker_id = default_worker_id()
+        self.scheduler = RefreshScheduler()
+        self._stop = threading.Event()
+        self._next_seed = datetime.min
+        self._next_reload = datetime.min
+
+    def request_stop(self, *_args) -> None:
+        if self._stop.is_set():
+            # Second signal: stop waiting for the in-flight job
+            raise KeyboardInterrupt
+        logger.info("Stop requested; finishing the in-flight job")
+        self._stop.set()
+
+    def install_signal_handlers(self) -> None:
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        processed = 0
+        while not self._stop.is_set():
+            now = datetime.utcnow()
+            if now >= self._next_seed:
+                with self.SessionLocal.begin() as session:
+                    seed_jobs(session, self.steamids)
+                self._next_seed = now + self.reseed_every
+            if not self.scheduler or now >= self._next_reload:
+                with self.SessionLocal() as session:
+                    self.scheduler.load_due(session, now)
+                self._next_reload = now + self.reload_every
+
+            item = self.scheduler.pop()
+            if item is None:
+                self._stop.wait(self.idle_sleep)
+                continue
+            self.run_job(item)
+            processed += 1
+            if max_jobs is not None and processed >= max_jobs:
+                break
+        logger.info(f"Refresh daemon stopped after {processed} jobs")
+        return processed
+
+    def run_job(self, item: QueuedJob) -> bool:
+        job_id, kind, key = item
+        handler = self.handlers[kind]
+        # Lease the job so other daemons and queue workers (tools/fetch_all_owned_games.py) leave it alone;
+        # the queue is loaded every few minutes, so the job may also have been run elsewhere since
+        with self.SessionLocal.begin() as session:
+            leased = lease_job(session, self.worker_id, job_id)
+        if not leased:
+            logger.debug(f"Skipping {kind} {key}: leased by another worker or no longer due")
+            metrics.inc("refresh_jobs_total", kind=kind, outcome="leased")
+            return False
+        started = time.perf_counter()
+        try:
+            with self.SessionLocal.begin() as session:
+                handler(self.client, session, key)
+                complete_job(session, job_id, ok=True)
+            logger.debug(f"Refreshed {kind} {key}")
+            metrics.inc("refresh_jobs_total", kind=kind, outcome="ok")
+            if kind in (OWNED_GAMES, RECENTLY_PLAYED):
+                # New ownerships may need appdetails/achievements jobs
+                self._next_seed = datetime.min
+            return True
+        except Exception as exc:
+            logger.warning(f"Refresh {kind} {key} failed: {exc}")
+            metrics.inc("refresh_jobs_total", kind=kind, outcome="error")
+            with self.SessionLocal.begin() as session:
+                complete_job(session, job_id, ok=False, error=exc)
+            return False
+        finally:
+            metrics.observe("refresh_job_seconds", time.perf_counter() - started, kind=kind)
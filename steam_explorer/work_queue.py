@@ -0,0 +1,180 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Any, Iterable, List, Optional, Sequence
+import os
+import socket
+import threading
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from .models import RefreshJob
+from .logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_LEASE = timedelta(minutes=5)
+
+# Dialects that support SELECT ... FOR UPDATE SKIP LOCKED
+SKIP_LOCKED_DIALECTS = ("postgresql", "mysql", "mariadb")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+def _claimable(kind: str, now: datetime):
+    return (
+        RefreshJob.kind == kind,
+        RefreshJob.next_run_at <= now,
+        or_(RefreshJob.lease_expires_at.is_(None), RefreshJob.lease_expires_at <= now),
+    )
+
+
+def claim_jobs(
+    session: Session,
+    worker_id: str,
+    kind: str,
+    limit: int = 10,
+    lease_for: timedelta = DEFAULT_LEASE,
+    now: Optional[datetime] = None,
+    where: Sequence[Any] = (),
+) -> List[RefreshJob]:
+    """Lease up to ``limit`` due jobs of ``kind`` for ``worker_id``, oldest first.
+
+    ``where`` narrows the claimable jobs further (SQL conditions on ``RefreshJob``).
+    Jobs whose lease expired (a worker died or stalled) are claimable again. On
+    Postgres/MySQL concurrent workers skip each other's locked rows; on SQLite the
+    claim is a single UPDATE, which the database-wide write lock makes atomic.
+    Commit the session to publish the lease.
+    """
+    now = now or datetime.utcnow()
+    # Whole seconds: MySQL DATETIME would round a fraction away and the read-back below must match
+    expires = (now + lease_for).replace(microsecond=0)
+    candidates = select(RefreshJob.id).where(*_claimable(kind, now), *where).order_by(RefreshJob.next_run_at).limit(limit)
+
+    if session.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+        ids = list(session.scalars(candidates.with_for_update(skip_locked=True)))
+        if not ids:
+            return []
+        session.query(RefreshJob).filter(RefreshJob.id.in_(ids)).update(
+            {RefreshJob.lease_owner: worker_id, RefreshJob.lease_expires_at: expires, RefreshJob.last_attempt_at: now},
+            synchronize_session=False,
+        )
+        leased = RefreshJob.id.in_(ids)
+    else:
+        session.query(RefreshJob).filter(RefreshJob.id.in_(candidates.scalar_subquery()), *_claimable(kind, now), *where).update(
+            {RefreshJob.lease_owner: worker_id, RefreshJob.lease_expires_at: expires, RefreshJob.last_attempt_at: now},
+            synchronize_session=False,
+        )
+        leased = RefreshJob.lease_expires_at == expires
+
+    jobs = session.query(RefreshJob).filter(
+        RefreshJob.kind == kind,
+        RefreshJob.lease_owner == worker_id,
+        leased,
+    ).order_by(RefreshJob.next_run_at).populate_existing().all()
+    if jobs:
+        logger.debug(f"{worker_id} leased {len(jobs)} {kind} jobs until {expires:%H:%M:%S}")
+    return jobs
+
+
+def lease_job(
+    session: Session,
+    worker_id: str,
+    job_id: int,
+    lease_for: timedelta = DEFAULT_LEASE,
+    now: Optional[datetime] = None,
+) -> bool:
+    """Lease one job if it is still due and no other worker holds it; False if it is taken or done.
+
+    A single conditional UPDATE, so of two concurrent claimants only one sees its row change.
+    """
+    now = now or datetime.utcnow()
+    return session.query(RefreshJob).filter(
+        RefreshJob.id == job_id,
+        RefreshJob.next_run_at <= now,
+        or_(
+            RefreshJob.lease_owner.is_(None),
+            RefreshJob.lease_owner == worker_id,
+            RefreshJob.lease_expires_at.is_(None),
+            RefreshJob.lease_expires_at <= now,
+        ),
+    ).update(
+        {RefreshJob.lease_owner: worker_id, RefreshJob.lease_expires_at: now + lease_for, RefreshJob.last_attempt_at: now},
+        synchronize_session=False,
+    ) == 1
+
+
+def heartbeat(
+    session: Session,
+    worker_id: str,
+    job_ids: Iterable[int],
+    lease_for: timedelta = DEFAULT_LEASE,
+    now: Optional[datetime] = None,
+) -> int:
+    """Extend this worker's leases; returns how many are still held (lost ones were reclaimed by others)."""
+    ids = list(job_ids)
+    if not ids:
+        return 0
+    now = now or datetime.utcnow()
+    return session.query(RefreshJob).filter(
+        RefreshJob.id.in_(ids),
+        RefreshJob.lease_owner == worker_id,
+    ).update({RefreshJob.lease_expires_at: now + lease_for}, synchronize_session=False)
+
+
+def release_jobs(session: Session, worker_id: str, job_ids: Iterable[int]) -> int:
+    """Give leases back without recording a result, e.g. on shutdown."""
+    ids = list(job_ids)
+    if not ids:
+        return 0
+    return session.query(RefreshJob).filter(
+        RefreshJob.id.in_(ids),
+        RefreshJob.lease_owner == worker_id,
+    ).update({RefreshJob.lease_owner: None, RefreshJob.lease_expires_at: None}, synchronize_session=False)
+
+
+class LeaseHeartbeat:
+    """Background thread that renews a set of leases while the owner works on them.
+
+        with LeaseHeartbeat(SessionLocal, worker_id, [job.id for job in jobs]):
+            ...  # network-bound work
+    """
+
+    def __init__(
+        self,
+        SessionLocal: sessionmaker,
+        worker_id: str,
+        job_ids: Iterable[int],
+        lease_for: timedelta = DEFAULT_LEASE,
+        interval: Optional[float] = None,
+    ) -> None:
+        self.SessionLocal = SessionLocal
+        self.worker_id = worker_id
+        self.job_ids = list(job_ids)
+        self.lease_for = lease_for
+        self.interval = interval if interval is not None else lease_for.total_seconds() / 3
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with self.SessionLocal.begin() as session:
+                    held = heartbeat(session, self.worker_id, self.job_ids, self.lease_for)
+                if held < len(self.job_ids):
+                    logger.warning(f"{self.worker_id} lost {len(self.job_ids) - held} leases")
+            except Exception as exc:
+                logger.warning(f"Lease heartbeat failed: {exc}")
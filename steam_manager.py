@@ -6,24 +6,36 @@ Main interface for managing your Steam data pipeline
 
 import sys
 import os
-import subprocess
+import importlib
+import time
 
 # Add the project root to Python path
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
+from steam_explorer.logging_utils import get_logger
+
+logger = get_logger("steam_manager")
+
 def run_tool(script_name, args=None):
-    """Run a tool script with optional arguments"""
+    """Run a tool's main() in this process with optional arguments.
+
+    Tools share this process's settings, database engine pool and Steam HTTP
+    session, so only the first action pays for imports and cold connections.
+    """
+    module_name = f"tools.{os.path.splitext(script_name)[0]}"
+    started = time.perf_counter()
     try:
-        cmd = [sys.executable, f"tools/{script_name}"]
-        if args:
-            cmd.extend(args)
-        
-        result = subprocess.run(cmd, cwd=project_root)
-        return result.returncode == 0
+        module = importlib.import_module(module_name)
+        result = module.main(args) if args else module.main()
+        return result is not False
+    except SystemExit as e:
+        return e.code in (None, 0)
     except Exception as e:
         print(f"Error running {script_name}: {e}")
         return False
+    finally:
+        logger.debug(f"{script_name} finished in {time.perf_counter() - started:.3f}s")
 
 def main_menu():
     """Display the main menu and handle user choices"""
@@ -190,7 +202,7 @@ def show_configuration():
         from steam_explorer.config import get_settings
         settings = get_settings()
         
-        print(f"Steam API Key: {'✅ Configured' if settings.steam_api_key else '❌ Missing'}")
+        print(f"Steam API Key: {f'✅ Configured ({len(settings.steam_api_keys)} keys)' if settings.steam_api_keys else '❌ Missing'}")
         print(f"Database URL: {settings.database_url}")
         print(f"Steam User ID: {'✅ Configured' if settings.steam_user_id64 else '❌ Not set'}")
         
@@ -207,6 +219,8 @@ def show_configuration():
         print("\nMake sure your .env file is properly configured!")
 
 if __name__ == "__main__":
+    # Tools resolve relative paths (e.g. sqlite:///steam.db) from the project root
+    os.chdir(project_root)
     try:
         main_menu()
     except KeyboardInterrupt:
@@ -31,6 +31,17 @@ def session(test_settings) -> Session:
         yield s
 
 
+@pytest.fixture()
+def db_session(tmp_path) -> Session:
+    # Fresh schema per test for anything that reads back what it wrote
+    from steam_explorer.models import Base
+    database_url = f"sqlite:///{tmp_path / 'steam_test.db'}"
+    Base.metadata.create_all(bind=get_engine(database_url))
+    SessionLocal = get_sessionmaker(database_url)
+    with SessionLocal.begin() as s:
+        yield s
+
+
 @pytest.fixture()
 def steam_client(test_settings) -> SteamClient:
     # Use a slow RPS for tests to avoid flakiness if real calls are used
@@ -0,0 +1,56 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from steam_explorer.backfill import backfill, format_eta
+from steam_explorer.db import get_engine
+from steam_explorer.models import BackfillCheckpoint, Base, Game, Ownership
+
+
+def _engine(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Game.__table__.insert(), [{"appid": a, "name": f"Game {a}", "created_at": now, "updated_at": now} for a in range(0, 50, 2)])
+        conn.execute(Ownership.__table__.insert(), [{"steamid": "1", "appid": a, "created_at": now} for a in range(50)])
+    return engine
+
+
+def _names(engine):
+    ownerships, games = Ownership.__table__, Game.__table__
+    return {
+        "values": {"game_name": select(games.c.name).where(games.c.appid == ownerships.c.appid).scalar_subquery()},
+        "where": ownerships.c.game_name.is_(None),
+    }
+
+
+def test_backfill_batches_and_skips_when_finished(tmp_path):
+    engine = _engine(tmp_path)
+    result = backfill(engine, "names", Ownership.__table__, batch_size=8, **_names(engine))
+    assert (result.rows, result.batches) == (50, 7)
+    with engine.connect() as conn:
+        rows = dict(conn.execute(select(Ownership.appid, Ownership.game_name)).all())
+    assert rows[2] == "Game 2" and rows[3] is None
+
+    assert backfill(engine, "names", Ownership.__table__, **_names(engine)).already_done
+    assert backfill(engine, "names", Ownership.__table__, restart=True, **_names(engine)).rows == 25
+
+
+def test_backfill_resumes_after_the_last_committed_batch(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        # As if an earlier run committed rows up to id 20 and was then killed
+        conn.execute(BackfillCheckpoint.__table__.insert().values(name="names", last_key=20, rows_done=20, updated_at=datetime.utcnow()))
+    result = backfill(engine, "names", Ownership.__table__, batch_size=100, **_names(engine))
+    assert (result.resumed_from, result.rows) == (20, 30)
+    with engine.connect() as conn:
+        untouched = conn.execute(select(Ownership.id).where(Ownership.game_name.is_(None), Ownership.appid % 2 == 0)).scalars().all()
+        checkpoint = conn.execute(BackfillCheckpoint.__table__.select()).one()
+    assert untouched and max(untouched) <= 20
+    assert checkpoint.rows_done == 50 and checkpoint.finished_at is not None
+    assert [format_eta(s) for s in (5, 125, 7260)] == ["5s", "2m05s", "2h01m"]
@@ -0,0 +1,33 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic
+from benchmarks.throughput import compare
+from steam_explorer.etl.pipeline import transform_appdetails_to_games, transform_global_achievements, transform_owned_games
+
+
+def test_generator_is_deterministic_and_transformable():
+    catalog = synthetic.app_ids(200, seed=7)
+    assert catalog == synthetic.app_ids(200, seed=7)
+    assert synthetic.appdetails(catalog[:50], seed=7) == synthetic.appdetails(catalog[:50], seed=7)
+
+    libraries = list(synthetic.iter_owned_games(500, catalog, seed=7))
+    assert sum(len(r["response"]["games"]) for _, r in libraries) == 500
+    steamid, response = libraries[0]
+    assert len(transform_owned_games(steamid, response)) == len(response["response"]["games"])
+
+    games = transform_appdetails_to_games(synthetic.appdetails(catalog[:50], seed=7, profile="basic"))
+    assert 40 <= len(games) <= 50
+    appid, achievements = next(synthetic.iter_achievements(100, catalog, seed=7))
+    assert transform_global_achievements(appid, achievements)
+
+
+def test_compare_flags_throughput_drops_only():
+    baseline = {"sqlite/1k": {"upsert_games_new": {"items": 100, "seconds": 1.0, "per_second": 100.0},
+                              "query_summary": {"items": 1, "seconds": 0.001, "per_second": 1000.0}}}
+    results = {"sqlite/1k": {"upsert_games_new": {"items": 100, "seconds": 2.0, "per_second": 50.0},
+                             "query_summary": {"items": 1, "seconds": 0.004, "per_second": 250.0}}}
+    assert compare(results, baseline, threshold=0.3, min_seconds=0.05) == [("sqlite/1k", "upsert_games_new", 50.0, 100.0)]
+    assert compare(baseline, baseline, threshold=0.3, min_seconds=0.05) == []
@@ -0,0 +1,69 @@
+import sys
+import os
+from collections import Counter
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from steam_explorer.etl.bulk_ingest import bulk_upsert_ownerships
+from steam_explorer.etl.pipeline import transform_owned_games, upsert_games, upsert_ownerships
+from steam_explorer.etl.records import GameRecord, OwnershipRecord
+from steam_explorer.models import Base, Ownership, OwnershipHistory
+
+
+def _database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session, session.begin():
+        upsert_games(session, [GameRecord(10, "Ten", "game", False), GameRecord(30, "Thirty", "game", True)])
+        session.flush()
+        upsert_ownerships(session, transform_owned_games("1", [
+            {"appid": 10, "playtime_forever": 5, "name": "Ten"},
+            {"appid": 20, "playtime_forever": 7},
+        ]))
+    with engine.begin() as conn:
+        # An ownership from before history tracking
+        conn.execute(Ownership.__table__.insert().values(steamid="2", appid=10, game_name="Ten", playtime_forever=3, created_at=datetime.utcnow()))
+    return engine
+
+
+def _state(engine):
+    with Session(engine) as session:
+        owned = sorted(session.query(Ownership.steamid, Ownership.appid, Ownership.game_name, Ownership.playtime_forever).all())
+        history = Counter(session.query(OwnershipHistory.steamid, OwnershipHistory.appid, OwnershipHistory.playtime_delta, OwnershipHistory.baseline).all())
+    return owned, history
+
+
+def test_bulk_ingest_matches_row_by_row_upserts(tmp_path):
+    batch = [
+        OwnershipRecord("1", 10, None, 5),      # unchanged, name kept
+        OwnershipRecord("1", 20, None, 12),     # playtime up
+        OwnershipRecord("1", 30, None, 1),      # new, named from games
+        OwnershipRecord("2", 10, "Ten", 8),     # predates history
+        OwnershipRecord("3", 40, "Forty", None),
+    ]
+    row_by_row = _database(tmp_path / "rows.db")
+    with Session(row_by_row) as session, session.begin():
+        # The merge names rows from games like transform_owned_games(..., session=...) does
+        rows = [r._replace(game_name=r.game_name or {10: "Ten", 30: "Thirty"}.get(r.appid)) for r in batch]
+        assert upsert_ownerships(session, rows) == 4
+
+    bulk = _database(tmp_path / "bulk.db")
+    with bulk.begin() as conn:
+        result = bulk_upsert_ownerships(conn, iter(batch), chunk_size=2)
+    assert (result.staged, result.written, result.path) == (5, 4, "executemany")
+    assert result.history_rows == 5
+    assert _state(bulk) == _state(row_by_row)
+
+
+def test_bulk_ingest_last_duplicate_wins(tmp_path):
+    engine = _database(tmp_path / "bulk.db")
+    with engine.begin() as conn:
+        result = bulk_upsert_ownerships(conn, [OwnershipRecord("9", 1, "a", 1), OwnershipRecord("9", 1, "b", 2)])
+    owned, history = _state(engine)
+    assert ("9", 1, "b", 2) in owned and ("9", 1, "a", 1) not in owned
+    # One baseline for the key, not one per staged duplicate
+    assert result.history_rows == 1 and history[("9", 1, 2, True)] == 1
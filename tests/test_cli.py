@@ -0,0 +1,17 @@
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.cli import add_commit_options, add_run_options, commit_policy
+
+
+def test_shared_options_build_a_commit_policy():
+    parser = argparse.ArgumentParser()
+    add_run_options(parser)
+    add_commit_options(parser, per_batch=False, scope="Name sync")
+    args = parser.parse_args(["--profile", "report.txt", "--commit-rows", "50"])
+    assert (args.profile, args.metrics_json) == ("report.txt", "")
+    policy = commit_policy(args)
+    assert (policy.rows, policy.seconds, policy.per_batch) == (50, 5.0, False)
@@ -3,8 +3,10 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pytest
+
 from steam_explorer.models import Base, Game
-from steam_explorer.db import get_engine
+from steam_explorer.db import ChunkedSession, CommitPolicy, get_engine, get_sessionmaker
 
 
 def test_create_tables_and_insert(engine):
@@ -17,3 +19,31 @@ def test_create_tables_and_insert(engine):
         res = conn.execute(Game.__table__.select().where(Game.__table__.c.appid == 1)).fetchone()
         assert res is not None
         assert res._mapping["name"] == "Test Game"
+
+
+def test_chunked_session_commits_by_policy(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'chunks.db'}"
+    Base.metadata.create_all(bind=get_engine(database_url))
+    SessionLocal = get_sessionmaker(database_url)
+
+    def committed():
+        with SessionLocal() as reader:
+            return reader.query(Game).count()
+
+    policy = CommitPolicy(rows=3, seconds=0)
+    assert [len(chunk) for chunk in policy.chunks(list(range(7)))] == [3, 3, 1]
+    with pytest.raises(RuntimeError):
+        with ChunkedSession(SessionLocal, policy) as tx:
+            for appid in range(1, 8):
+                tx.session.add(Game(appid=appid, name=f"Game {appid}"))
+                if tx.checkpoint(1):
+                    # Readers see each chunk as soon as it commits, and the identity map starts empty
+                    assert committed() == appid and not tx.session.identity_map
+            raise RuntimeError("fetch failed")
+    # Only the open chunk (game 7) is rolled back
+    assert committed() == 6 and tx.commits == 2
+
+    with ChunkedSession(SessionLocal, CommitPolicy(rows=0, seconds=0, per_batch=True)) as tx:
+        tx.session.add(Game(appid=8, name="Game 8"))
+        assert tx.checkpoint()
+    assert committed() == 7
@@ -0,0 +1,85 @@
+import sys
+import os
+import json
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from steam_explorer import bulk
+from steam_explorer.dbcopy import CopyError, copy_database
+from steam_explorer.models import AchievementGlobal, AchievementPercentSample, Base, Game, NegativeLookup, Ownership, Sketch
+
+
+def _source(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    Base.metadata.create_all(bind=engine)
+    now = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    with engine.begin() as conn:
+        conn.execute(Game.__table__.insert(), [
+            {"appid": a, "name": f"Game\t{a}\\n", "is_free": a % 2 == 0, "created_at": now, "updated_at": now} for a in range(1, 120)
+        ])
+        conn.execute(Ownership.__table__.insert(), [
+            {"steamid": str(s), "appid": a, "game_name": None if a % 5 else "x", "playtime_forever": a * s, "created_at": now}
+            for s in range(3) for a in range(1, 60)
+        ])
+        conn.execute(AchievementGlobal.__table__.insert(), [{"appid": 1, "name": f"a{i}", "percent": i / 3, "created_at": now} for i in range(30)])
+        conn.execute(AchievementPercentSample.__table__.insert(), [
+            {"achievement_id": i + 1, "percent_q": i, "sampled_at": now} for i in range(30)
+        ])
+        conn.execute(NegativeLookup.__table__.insert(), [
+            {"kind": k, "appid": a, "reason": "r", "next_check_at": now} for k in ("appdetails", "achievements") for a in range(25)
+        ])
+        conn.execute(Sketch.__table__.insert(), [{"name": "hll:1", "payload": bytes(range(256)), "updated_at": now}])
+    return engine
+
+
+def test_copy_database_copies_and_verifies(tmp_path):
+    source = _source(tmp_path)
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    state = str(tmp_path / "state.json")
+
+    results = copy_database(source, target, state, chunk_size=16)
+    assert all(r.verified for r in results), results
+    by_table = {r.table: r for r in results}
+    assert by_table["ownerships"].rows == 177 and by_table["ownerships"].path == "executemany"
+    with target.connect() as conn:
+        assert conn.execute(select(Sketch.payload)).scalar_one() == bytes(range(256))
+
+    with pytest.raises(CopyError, match="already has data"):
+        copy_database(source, target, state, restart=True)
+
+
+def test_copy_database_resumes_after_an_interrupted_chunk(tmp_path):
+    source = _source(tmp_path)
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    state_path = tmp_path / "state.json"
+    copy_database(source, target, str(state_path), chunk_size=16, verify=False)
+
+    # As if the run died after committing ownerships up to id 40 but saving progress only up to id 32
+    state = json.loads(state_path.read_text())
+    state["tables"]["ownerships"] = {"last_key": [32], "rows": 32}
+    state_path.write_text(json.dumps(state))
+    with target.begin() as conn:
+        conn.execute(Ownership.__table__.delete().where(Ownership.id > 40))
+
+    results = {r.table: r for r in copy_database(source, target, str(state_path), chunk_size=16)}
+    assert results["ownerships"].rows == 177 and all(r.verified for r in results.values())
+    with target.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Ownership.__table__)).scalar_one() == 177
+
+
+def test_checksum_detects_changed_values(tmp_path):
+    source = _source(tmp_path)
+    columns = list(Game.__table__.columns)
+    with source.connect() as conn:
+        before = bulk.table_checksum(conn, Game.__table__, columns, chunk_size=7)
+    with source.begin() as conn:
+        conn.execute(Game.__table__.update().where(Game.appid == 50).values(name="changed"))
+    with source.connect() as conn:
+        after = bulk.table_checksum(conn, Game.__table__, columns, chunk_size=7)
+    assert before[0] == after[0] == 119 and before[1] != after[1]
+    assert bulk._escape_text("a\tb\\c\n", "postgresql") == "a\\tb\\\\c\\n"
+    assert bulk._escape_text(b"\x00\xff", "postgresql") == "\\\\x00ff"
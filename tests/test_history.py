@@ -0,0 +1,50 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl.history import compact_history, library_at, playtime_gained, record_playtime_change
+from steam_explorer.etl.pipeline import transform_owned_games, upsert_ownerships
+from steam_explorer.models import OwnershipHistory
+
+
+def test_upsert_records_only_changes(db_session):
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 100}, {"appid": 730, "playtime_forever": 5}]}}
+    upsert_ownerships(db_session, transform_owned_games("1", resp))
+    db_session.flush()
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 160}, {"appid": 730, "playtime_forever": 5}]}}
+    upsert_ownerships(db_session, transform_owned_games("1", resp))
+    db_session.flush()
+
+    rows = db_session.query(OwnershipHistory).order_by(OwnershipHistory.id).all()
+    assert [(r.appid, r.playtime_delta, r.baseline) for r in rows] == [(570, 100, True), (730, 5, True), (570, 60, False)]
+
+
+def test_library_reconstruction_and_window_gain(db_session):
+    record_playtime_change(db_session, "1", 570, None, 100, at=datetime(2026, 1, 10))
+    record_playtime_change(db_session, "1", 570, 100, 150, at=datetime(2026, 2, 10))
+    record_playtime_change(db_session, "1", 440, None, 0, at=datetime(2026, 2, 15))
+    record_playtime_change(db_session, "1", 570, 150, 400, at=datetime(2026, 3, 10))
+    db_session.flush()
+
+    assert library_at(db_session, "1", datetime(2026, 1, 31)) == {570: 100}
+    assert library_at(db_session, "1", datetime(2026, 2, 28)) == {570: 150, 440: 0}
+    assert playtime_gained(db_session, "1", datetime(2026, 1, 1), datetime(2026, 3, 31)) == {570: 300}
+    assert playtime_gained(db_session, "1", datetime(2026, 2, 28), datetime(2026, 3, 31)) == {570: 250}
+
+    compact_history(db_session, before=datetime(2026, 3, 1))
+    db_session.flush()
+    assert library_at(db_session, "1", datetime(2026, 3, 31)) == {570: 400, 440: 0}
+
+
+def test_preexisting_ownership_gets_baseline(db_session):
+    from steam_explorer.models import Ownership
+    db_session.add(Ownership(steamid="1", appid=570, playtime_forever=1000))
+    db_session.flush()
+
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 1060}]}}
+    upsert_ownerships(db_session, transform_owned_games("1", resp))
+    db_session.flush()
+    assert library_at(db_session, "1", datetime.utcnow()) == {570: 1060}
+    assert playtime_gained(db_session, "1", datetime(2000, 1, 1), datetime.utcnow()) == {570: 60}
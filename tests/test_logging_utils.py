@@ -0,0 +1,49 @@
+import sys
+import os
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl.pipeline import transform_owned_games
+from steam_explorer.logging_utils import BatchLog
+
+
+def test_batch_log_samples_per_key_and_summarizes(caplog):
+    logger = logging.getLogger("test.batch_log")
+    with caplog.at_level(logging.DEBUG, logger="test.batch_log"):
+        log = BatchLog(logger, first=2, every=10)
+        for i in range(25):
+            log.skip("bad_row", "Skipping row %d", i)
+        log.skip("other", "Skipping other")
+        log.summary("batch")
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages[:2] == ["Skipping row 0", "Skipping row 1"]
+    assert "Skipping row 9 (10 bad_row messages so far)" in messages
+    assert "Skipping row 19 (20 bad_row messages so far)" in messages
+    assert "Skipping other" in messages
+    assert messages[-1] == "batch: skipped 26 rows (bad_row=25, other=1)"
+    assert len(messages) == 6
+
+
+def test_transform_reports_skip_reasons_once(caplog):
+    games = [{"appid": "x"}] * 3 + [{"playtime_forever": 5}] + [{"appid": 10, "playtime_forever": 1}]
+    with caplog.at_level(logging.INFO, logger="steam_explorer.etl.pipeline"):
+        rows = transform_owned_games("1", games)
+    assert len(rows) == 1
+    summaries = [r.getMessage() for r in caplog.records if "skipped" in r.getMessage()]
+    assert summaries == ["owned games for steamid=1: skipped 4 rows (invalid_appid=3, missing_appid=1)"]
+
+
+def test_setup_logging_keeps_an_existing_configuration(monkeypatch):
+    from steam_explorer import logging_utils
+
+    root = logging.getLogger()
+    configured = logging.StreamHandler()
+    monkeypatch.setattr(logging_utils, "_LOGGING_CONFIGURED", False)
+    monkeypatch.setattr(logging_utils, "_default_handler", None)
+    monkeypatch.setattr(root, "handlers", [configured])
+    logging_utils.get_logger("steam_explorer.test")
+    logging_utils.setup_logging()
+    # As under alembic's fileConfig: no second handler printing every line again
+    assert root.handlers == [configured]
@@ -0,0 +1,58 @@
+import sys
+import os
+import json
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer import metrics
+from steam_explorer.etl.pipeline import transform_global_achievements, upsert_achievements
+from steam_explorer.metrics import MetricsRegistry, start_http_server, write_run_summary
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    registry.inc("steam_requests_total", host="api.steampowered.com", status=200)
+    registry.inc("steam_requests_total", host="api.steampowered.com", status=200)
+    registry.observe("steam_request_seconds", 0.2, host="api.steampowered.com")
+    registry.observe("steam_request_seconds", 3.0, host="api.steampowered.com")
+
+    text = registry.render_prometheus()
+    assert "# TYPE steam_requests_total counter" in text
+    assert 'steam_requests_total{host="api.steampowered.com",status="200"} 2' in text
+    assert 'steam_request_seconds_bucket{host="api.steampowered.com",le="0.25"} 1' in text
+    assert 'steam_request_seconds_bucket{host="api.steampowered.com",le="+Inf"} 2' in text
+    assert 'steam_request_seconds_count{host="api.steampowered.com"} 2' in text
+
+
+def test_run_summary_and_http_endpoint(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc("refresh_jobs_total", kind="appdetails", outcome="ok")
+    path = tmp_path / "run.json"
+    write_run_summary(str(path), extra={"client": {"hosts": {}}}, registry=registry)
+    summary = json.loads(path.read_text())
+    assert summary["counters"]["refresh_jobs_total"] == [{"labels": {"kind": "appdetails", "outcome": "ok"}, "value": 1.0}]
+    assert summary["client"] == {"hosts": {}}
+
+    server = start_http_server(0, registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            body = response.read().decode("utf-8")
+        assert 'refresh_jobs_total{kind="appdetails",outcome="ok"} 1' in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pipeline_counts_rows(db_session):
+    metrics.REGISTRY.reset()
+    response = {"achievementpercentages": {"achievements": [
+        {"name": "A", "percent": 10.0},
+        {"name": "B", "percent": 150.0},
+    ]}}
+    rows = transform_global_achievements(10, response)
+    upsert_achievements(db_session, rows)
+    assert metrics.REGISTRY.counter_value("etl_rows_total", transform="achievements", outcome="ok") == 1
+    assert metrics.REGISTRY.counter_value("etl_rows_total", transform="achievements", outcome="skipped") == 1
+    assert metrics.REGISTRY.counter_value("etl_rows_written_total", table="achievements_global") == 1
+    assert metrics.REGISTRY.snapshot()["histograms"]["etl_upsert_seconds"][0]["count"] == 1
@@ -0,0 +1,67 @@
+import sys
+import os
+import json
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_steam import MockConfig, MockSteam, url_of
+from steam_explorer.api.steam_client import SteamClient
+from steam_explorer.etl.pipeline import transform_appdetails_to_games, transform_owned_games
+
+
+@pytest.fixture()
+def mock_steam():
+    def start(**config):
+        mock = MockSteam(MockConfig(apps=500, library_size=50, **config))
+        servers = [mock.serve(), mock.serve(store=True)]
+        started.append(servers)
+        return mock, servers
+
+    started = []
+    yield start
+    for servers in started:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def _client(servers, **kwargs):
+    api, store = servers
+    return SteamClient(api_key="k1", requests_per_second=1000.0, max_rps=1000.0,
+                       base_url=url_of(api), store_url=url_of(store), **kwargs)
+
+
+def test_client_fetches_every_endpoint_from_the_mock(mock_steam):
+    mock, servers = mock_steam()
+    client = _client(servers)
+
+    owned = client.get_owned_games("76561197960265728")
+    rows = transform_owned_games("76561197960265728", owned)
+    assert rows and all(row.game_name for row in rows)
+    streamed = list(client.iter_owned_games("76561197960265728"))
+    assert streamed == owned["response"]["games"]
+
+    appids = [row.appid for row in rows[:5]]
+    games = transform_appdetails_to_games(client.get_app_details(appids, profile="basic"))
+    assert {g.appid for g in games} <= set(appids)
+    assert client.get_global_achievements_for_app(mock.catalog[0])["achievementpercentages"] is not None
+    assert len(list(client.iter_app_list())) == 500
+
+    with urllib.request.urlopen(f"{url_of(servers[0])}/__stats") as response:
+        stats = json.loads(response.read())
+    assert stats["/IPlayerService/GetOwnedGames/v1/"] == {"200": 2}
+    assert stats["/api/appdetails"] == {"200": 1}
+
+
+def test_client_retries_through_mock_throttling(mock_steam):
+    mock, servers = mock_steam(throttle_rate=0.3, retry_after=None, seed=3)
+    client = _client(servers, max_retries=10, backoff_factor=0.001)
+
+    for appid in mock.catalog[:20]:
+        client.get_global_achievements_for_app(appid)
+
+    statuses = mock.stats["/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"]
+    assert statuses["200"] == 20 and statuses.get("429", 0) > 0
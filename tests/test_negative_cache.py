@@ -0,0 +1,30 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl import negative_cache
+
+
+def test_appdetails_misses():
+    appdetails = {"570": {"success": True, "data": {"name": "Dota 2"}}, "730": {"success": False}}
+    assert negative_cache.appdetails_misses([570, 730, 440], appdetails) == [730, 440]
+
+
+def test_backoff_doubles_and_expires(db_session):
+    now = datetime(2026, 1, 1)
+    negative_cache.record_negative(db_session, negative_cache.APPDETAILS, 730, "store_success_false", now=now)
+    db_session.flush()
+    assert negative_cache.filter_due(db_session, negative_cache.APPDETAILS, [570, 730], now=now) == [570]
+    assert negative_cache.filter_due(db_session, negative_cache.ACHIEVEMENTS, [570, 730], now=now) == [570, 730]
+
+    retry_at = now + timedelta(days=8)
+    assert negative_cache.filter_due(db_session, negative_cache.APPDETAILS, [730], now=retry_at) == [730]
+    row = negative_cache.record_negative(db_session, negative_cache.APPDETAILS, 730, "store_success_false", now=retry_at)
+    assert row.failures == 2
+    assert row.next_check_at == retry_at + timedelta(days=14)
+
+    negative_cache.clear_negative(db_session, negative_cache.APPDETAILS, [730])
+    db_session.flush()
+    assert negative_cache.filter_due(db_session, negative_cache.APPDETAILS, [730], now=retry_at) == [730]
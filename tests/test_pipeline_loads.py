@@ -0,0 +1,58 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl.pipeline import (
+    transform_appdetails_to_games,
+    transform_owned_games,
+    upsert_games,
+    upsert_ownerships,
+)
+from steam_explorer.models import Game, Ownership
+from steam_explorer.scheduler import enqueue_appdetails
+
+
+APPDETAILS = {
+    "570": {"success": True, "data": {"name": "Dota 2", "type": "game", "is_free": True}},
+    "730": {"success": True, "data": {"name": "CS2", "type": "game", "is_free": True}},
+}
+
+
+def test_upsert_games_skips_unchanged_rows(db_session):
+    assert upsert_games(db_session, transform_appdetails_to_games(APPDETAILS)) == 2
+    db_session.flush()
+    stamp = db_session.get(Game, 570).updated_at
+
+    refreshed = dict(APPDETAILS, **{"730": {"success": True, "data": {"name": "Counter-Strike 2", "type": "game", "is_free": True}}})
+    assert upsert_games(db_session, transform_appdetails_to_games(refreshed)) == 1
+    db_session.flush()
+    assert db_session.get(Game, 730).name == "Counter-Strike 2"
+    assert db_session.get(Game, 570).updated_at == stamp
+
+
+def test_upsert_ownerships_counts_only_changes(db_session):
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 100}, {"appid": 730, "playtime_forever": 5}]}}
+    assert upsert_ownerships(db_session, transform_owned_games("1", resp)) == 2
+    db_session.flush()
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 101}, {"appid": 730, "playtime_forever": 5}]}}
+    assert upsert_ownerships(db_session, transform_owned_games("1", resp)) == 1
+
+
+def test_lean_owned_games_resolve_names_and_queue_unknown(db_session):
+    db_session.add_all([Game(appid=570, name="Dota 2"), Ownership(steamid="1", appid=730, game_name="CS2", playtime_forever=5)])
+    db_session.flush()
+    resp = {"response": {"games": [
+        {"appid": 570, "playtime_forever": 10},
+        {"appid": 730, "playtime_forever": 6},
+        {"appid": 440, "playtime_forever": 1},
+    ]}}
+    rows = transform_owned_games("1", resp, session=db_session)
+    assert {r.appid: r.game_name for r in rows} == {570: "Dota 2", 730: None, 440: None}
+
+    assert enqueue_appdetails(db_session, [r.appid for r in rows if r.game_name is None]) == 2
+    db_session.flush()
+    assert enqueue_appdetails(db_session, [440]) == 0
+    upsert_ownerships(db_session, rows)
+    db_session.flush()
+    assert db_session.query(Ownership).filter_by(appid=730).one().game_name == "CS2"
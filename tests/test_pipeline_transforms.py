@@ -41,3 +41,39 @@ def test_transform_owned_games_basic():
     out = transform_owned_games("123", resp)
     assert any(o.appid == 570 and o.playtime_forever == 100 for o in out)
     assert all(o.appid != "bad" for o in out)
+
+
+def test_transforms_return_records_and_models_on_request():
+    from steam_explorer.etl.records import OwnershipRecord
+    from steam_explorer.models import Ownership
+
+    games = [
+        {"appid": "570", "playtime_forever": -5, "name": "x" * 300},
+        {"appid": 730, "playtime_forever": "lots"},
+        {"appid": None},
+    ]
+    rows = transform_owned_games("123", games)
+    assert rows == [OwnershipRecord("123", 570, "x" * 255, 0), OwnershipRecord("123", 730, None, None)]
+    assert not hasattr(rows[0], "__dict__")
+
+    models = transform_owned_games("123", games, as_models=True)
+    assert all(isinstance(m, Ownership) for m in models)
+    assert [(m.appid, m.playtime_forever) for m in models] == [(570, 0), (730, None)]
+
+    ach = transform_global_achievements(570, {"achievementpercentages": {"achievements": [
+        {"name": "a", "percent": "12.5"}, {"name": "b", "percent": "n/a"}, {"name": "c", "percent": 100.5},
+    ]}})
+    assert [(a.name, a.percent) for a in ach] == [("a", 12.5)]
+
+
+def test_upserts_accept_records(db_session):
+    from steam_explorer.etl.pipeline import upsert_games, upsert_ownerships
+    from steam_explorer.models import Game, Ownership
+
+    games = transform_appdetails_to_games({"570": {"success": True, "data": {"name": " Dota 2 ", "type": "game"}}})
+    assert upsert_games(db_session, games) == 1
+    db_session.flush()
+    assert upsert_ownerships(db_session, transform_owned_games("1", {"response": {"games": [{"appid": 570, "playtime_forever": 3}]}}, session=db_session)) == 1
+    db_session.flush()
+    assert db_session.get(Game, 570).name == "Dota 2"
+    assert db_session.query(Ownership.game_name, Ownership.playtime_forever).one() == ("Dota 2", 3)
@@ -0,0 +1,28 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.models import Game
+from steam_explorer.profiling import profiled, statement_shape
+
+
+def test_statement_shape_ignores_values_and_in_list_length():
+    a = statement_shape("SELECT * FROM games WHERE appid IN (?, ?, ?) AND name = 'x'")
+    b = statement_shape("SELECT *  FROM games\nWHERE appid IN (?, ?) AND name = 'y'")
+    assert a == b == "SELECT * FROM games WHERE appid IN (?...) AND name = ?"
+
+
+def test_profiled_report_flags_repeated_statements(db_session, tmp_path):
+    db_session.add_all([Game(appid=appid, name=f"Game {appid}") for appid in range(30)])
+    db_session.flush()
+    report = tmp_path / "profile.txt"
+    with profiled(str(report)):
+        for appid in range(30):
+            db_session.query(Game).filter(Game.appid == appid).first()
+
+    text = report.read_text()
+    for section in ("## CPU (cProfile", "## Allocations", "## SQL", "## Collapsed call edges"):
+        assert section in text
+    n_plus_one = text.split("Possible N+1 patterns")[1].split("##")[0]
+    assert "30 x" in n_plus_one and "FROM games" in n_plus_one
@@ -0,0 +1,117 @@
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.db import get_sessionmaker
+from steam_explorer.models import Base, Game, Ownership, RefreshJob
+from steam_explorer.db import get_engine
+from steam_explorer.scheduler import (
+    ACHIEVEMENTS,
+    DEFAULT_HANDLERS,
+    APPDETAILS,
+    OWNED_GAMES,
+    RECENTLY_PLAYED,
+    RefreshDaemon,
+    RefreshScheduler,
+    complete_job,
+    job_priority,
+    refresh_achievements,
+    seed_jobs,
+)
+
+
+def _job(kind, **kwargs):
+    fields = dict(kind=kind, key="1", weight=0.0, failures=0, last_success_at=None)
+    fields.update(kwargs)
+    return RefreshJob(**fields)
+
+
+def test_priority_prefers_stale_heavy_and_healthy_jobs():
+    now = datetime(2026, 1, 2)
+    fresh = _job(ACHIEVEMENTS, last_success_at=now - timedelta(hours=1))
+    stale = _job(ACHIEVEMENTS, last_success_at=now - timedelta(days=2))
+    heavy = _job(ACHIEVEMENTS, last_success_at=now - timedelta(days=2), weight=500.0)
+    failing = _job(ACHIEVEMENTS, last_success_at=now - timedelta(days=2), weight=500.0, failures=3)
+    ranked = sorted([fresh, stale, heavy, failing], key=lambda j: job_priority(j, now), reverse=True)
+    assert ranked == [heavy, stale, failing, fresh]
+
+
+def test_seed_and_queue_order(db_session):
+    db_session.add_all([
+        Ownership(steamid="1", appid=570, playtime_forever=6000),
+        Ownership(steamid="1", appid=730, playtime_forever=60),
+        Game(appid=730, name="CS2", type="game"),
+    ])
+    db_session.flush()
+    seed_jobs(db_session, ["1"])
+    db_session.flush()
+    kinds = {(j.kind, j.key) for j in db_session.query(RefreshJob)}
+    assert kinds == {(OWNED_GAMES, "1"), (RECENTLY_PLAYED, "1"), (APPDETAILS, "570"), (ACHIEVEMENTS, "730")}
+
+    scheduler = RefreshScheduler()
+    assert scheduler.load_due(db_session) == 4
+    assert scheduler.pop()[1:] == (OWNED_GAMES, "1")  # 101 hours of playtime outweighs 1 hour
+
+
+def test_failures_back_off(db_session):
+    job = _job(APPDETAILS, next_run_at=datetime(2026, 1, 1))
+    db_session.add(job)
+    db_session.flush()
+    now = datetime(2026, 1, 1)
+    complete_job(db_session, job.id, ok=False, error=RuntimeError("boom"), now=now)
+    complete_job(db_session, job.id, ok=False, error=RuntimeError("boom"), now=now)
+    assert job.failures == 2 and job.next_run_at == now + timedelta(minutes=10)
+    complete_job(db_session, job.id, ok=True, now=now)
+    assert job.failures == 0 and job.next_run_at == now + timedelta(days=30)
+
+
+def test_negative_result_defers_the_job(db_session):
+    job = _job(ACHIEVEMENTS, key="440", next_run_at=datetime(2026, 1, 1))
+    db_session.add(job)
+    db_session.flush()
+    client = MagicMock()
+    client.get_global_achievements_for_app.return_value = {"achievementpercentages": {"achievements": []}}
+    refresh_achievements(client, db_session, "440")
+    now = datetime.utcnow()
+    complete_job(db_session, job.id, ok=True, now=now)
+    # "no_achievements" is rechecked after 30 days, not with the daily achievements refresh
+    assert job.next_run_at >= now + timedelta(days=29)
+
+
+def test_daemon_runs_jobs_and_checkpoints(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'daemon.db'}"
+    Base.metadata.create_all(bind=get_engine(database_url))
+    SessionLocal = get_sessionmaker(database_url)
+    client = MagicMock()
+    client.get_owned_games.return_value = {"response": {"games": [{"appid": 570, "playtime_forever": 10}]}}
+    client.get_app_details.return_value = {"570": {"success": True, "data": {"name": "Dota 2", "type": "game"}}}
+
+    client.get_recently_played_games.return_value = {"response": {"total_count": 0}}
+
+    daemon = RefreshDaemon(SessionLocal, client, steamids=["1"], idle_sleep=0)
+    assert daemon.run(max_jobs=3) == 3
+
+    with SessionLocal() as session:
+        assert session.get(Game, 570).name == "Dota 2"
+        done = session.query(RefreshJob).filter(RefreshJob.last_success_at.is_not(None)).count()
+        assert done == 3
+
+
+def test_recently_played_refresh_touches_only_recent_rows(db_session):
+    db_session.add_all([
+        Ownership(steamid="1", appid=570, game_name="Dota 2", playtime_forever=100),
+        Ownership(steamid="1", appid=730, game_name="CS2", playtime_forever=50),
+    ])
+    db_session.flush()
+    client = MagicMock()
+    client.get_recently_played_games.return_value = {"response": {"total_count": 1, "games": [
+        {"appid": 570, "name": "Dota 2", "playtime_2weeks": 30, "playtime_forever": 130},
+    ]}}
+    DEFAULT_HANDLERS[RECENTLY_PLAYED](client, db_session, "1")
+    db_session.flush()
+    playtime = {o.appid: o.playtime_forever for o in db_session.query(Ownership)}
+    assert playtime == {570: 130, 730: 50}
+    client.get_owned_games.assert_not_called()
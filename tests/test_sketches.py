@@ -0,0 +1,89 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl.pipeline import transform_owned_games, upsert_ownerships
+from steam_explorer.etl.sketches import HyperLogLog, OwnershipSketches, load_sketches, save_sketches
+
+
+def test_hyperloglog_estimate_within_error_and_mergeable():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(6000):
+        a.add(f"user{i}")
+    for i in range(4000, 10000):
+        b.add(f"user{i}")
+    a.merge(b)
+    assert abs(a.count() - 10000) / 10000 < 0.05
+    assert HyperLogLog.from_bytes(a.to_bytes()).count() == a.count()
+
+
+def test_upsert_feeds_deltas_not_totals(db_session):
+    first = OwnershipSketches()
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 100}, {"appid": 730, "playtime_forever": 5}]}}
+    upsert_ownerships(db_session, transform_owned_games("1", resp), sketches=first)
+    db_session.flush()
+
+    # Re-ingesting the same user only contributes the playtime gained since last time
+    second = OwnershipSketches()
+    resp = {"response": {"games": [{"appid": 570, "playtime_forever": 130}]}}
+    upsert_ownerships(db_session, transform_owned_games("1", resp), sketches=second)
+    assert second.estimate_playtime(570) == 30
+    assert second.top_apps_by_owners() == []
+
+
+def test_save_merges_runs(db_session):
+    run_a, run_b = OwnershipSketches(), OwnershipSketches()
+    run_a.observe("1", 570, playtime_delta=100, new_owner=True)
+    run_b.observe("2", 570, playtime_delta=50, new_owner=True)
+    run_b.observe("2", 730, playtime_delta=500, new_owner=True)
+    save_sketches(db_session, run_a)
+    db_session.flush()
+    save_sketches(db_session, run_b)
+    db_session.flush()
+
+    stored = load_sketches(db_session)
+    assert stored.estimate_owners(570) == 2
+    assert stored.top_apps_by_playtime(1)[0][:2] == (730, 500)
+    assert stored.top_apps_by_owners(1)[0][:2] == (570, 2)
+    assert set(load_sketches(db_session, appids=[730]).owners) == {730}
+
+
+def test_space_saving_merge_never_underestimates():
+    from steam_explorer.etl.sketches import SpaceSaving
+    a, b = SpaceSaving(capacity=2), SpaceSaving(capacity=2)
+    for key, amount in ((1, 10), (2, 5), (3, 4)):
+        a.add(key, amount)
+    for key, amount in ((2, 7), (4, 6)):
+        b.add(key, amount)
+    a.merge(b)
+    counts = {key: count for key, count, _error in a.top(2)}
+    # True totals: 1 -> 10, 2 -> 12; both must be covered by the merged counts
+    assert counts[2] >= 12 and counts[1] >= 10
+
+
+def test_save_touches_only_this_runs_rows(db_session):
+    from steam_explorer.models import Sketch
+    first = OwnershipSketches()
+    first.observe("1", 570, playtime_delta=10, new_owner=True)
+    save_sketches(db_session, first)
+    db_session.flush()
+    stamp = db_session.get(Sketch, "hll:owners:570").payload
+
+    second = OwnershipSketches()
+    second.observe("2", 730, playtime_delta=10, new_owner=True)
+    assert save_sketches(db_session, second) == 4  # 730's HLL plus the three global summaries
+    assert db_session.get(Sketch, "hll:owners:570").payload == stamp
+
+
+def test_rebuild_backfills_existing_ownerships(db_session):
+    from steam_explorer.etl.sketches import rebuild_sketches
+    from steam_explorer.models import Ownership
+    db_session.add_all([Ownership(steamid=str(i), appid=570, playtime_forever=60) for i in range(5)])
+    db_session.flush()
+    assert rebuild_sketches(db_session) == 5
+    db_session.flush()
+    stored = load_sketches(db_session)
+    assert stored.estimate_owners(570) == 5
+    assert stored.top_apps_by_owners(1)[0][:2] == (570, 5)
+    assert stored.estimate_playtime(570) >= 300
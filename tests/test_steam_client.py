@@ -1,20 +1,133 @@
 import sys
 import os
-from unittest.mock import patch
+import json
+from unittest.mock import MagicMock, patch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from steam_explorer.api.steam_client import SteamClient
+from steam_explorer.api.key_pool import KeyPool
+from steam_explorer.api.rate_control import AimdRateLimiter, CircuitBreaker, parse_retry_after
+from steam_explorer.api.steam_client import SteamClient, appdetails_profile_for
+from steam_explorer.api.decoding import DecodeStats, get_decoder, iter_json_array
+from steam_explorer.etl.pipeline import GAME_FIELDS, transform_owned_games
 
 
 def test_get_app_details_batching(steam_client: SteamClient):
     with patch.object(steam_client.session, "get") as mock_get:
         # Mock two batches
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.side_effect = [
-            {"570": {"success": True, "data": {"name": "Dota 2"}}},
-            {"730": {"success": True, "data": {"name": "CS2"}}},
-        ]
+        first, second = MagicMock(status_code=200), MagicMock(status_code=200)
+        first.content = b'{"570": {"success": true, "data": {"name": "Dota 2"}}}'
+        second.content = b'{"730": {"success": true, "data": {"name": "CS2"}}}'
+        mock_get.side_effect = [first, second]
         result = steam_client.get_app_details([570, 730], batch_size=1)
         assert "570" in result and "730" in result
         assert mock_get.call_count == 2
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_key_pool_spreads_load_and_rests_throttled_keys():
+    clock = _FakeClock()
+    pool = KeyPool(["aaaa1111", "bbbb2222"], requests_per_second=1.0, clock=clock, sleep=clock.sleep)
+    used = [pool.acquire().key for _ in range(4)]
+    # Two keys at 1 rps each: four requests take one second, not three
+    assert used == ["aaaa1111", "bbbb2222", "aaaa1111", "bbbb2222"]
+    assert clock.now == 1.0
+
+    pool.report(pool.keys[0], 429)
+    assert pool.healthy() == 1
+    assert [pool.acquire().key for _ in range(3)] == ["bbbb2222"] * 3
+
+
+def test_owned_games_moves_to_next_key_on_429():
+    client = SteamClient(api_key="aaaa1111", api_keys=["bbbb2222"], requests_per_second=100.0)
+    throttled = MagicMock(status_code=429, headers={})
+    ok = MagicMock(status_code=200, headers={})
+    ok.content = b'{"response": {"games": []}}'
+    with patch.object(client.session, "get", side_effect=[throttled, ok]) as mock_get:
+        assert client.get_owned_games("1") == {"response": {"games": []}}
+    keys = [call.kwargs["params"]["key"] for call in mock_get.call_args_list]
+    assert keys == ["aaaa1111", "bbbb2222"]
+    assert [s["throttled"] for s in client.key_pool.stats()] == [1, 0]
+
+
+def test_aimd_rate_ramps_up_and_halves_on_throttle():
+    clock = _FakeClock()
+    limiter = AimdRateLimiter("test", requests_per_second=2.0, increase=0.5, clock=clock)
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.rate > 3.0
+    ramped = limiter.rate
+    limiter.on_throttle(pause=parse_retry_after("7"))
+    assert limiter.rate == ramped / 2
+    assert limiter.ready_at() == 7.0
+
+
+def test_circuit_opens_after_repeated_failures_and_probe_doubles_cooldown():
+    clock = _FakeClock()
+    breaker = CircuitBreaker("store", threshold=3, cooldown=10.0, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.delay() == 10.0
+    clock.now = 10.0
+    assert breaker.delay() == 0.0
+    breaker.record_failure()  # failed half-open probe
+    assert breaker.delay() == 20.0
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def test_store_request_retries_5xx_honoring_retry_after():
+    client = SteamClient(api_key="k", requests_per_second=100.0)
+    busy = MagicMock(status_code=503, headers={"Retry-After": "0"})
+    ok = MagicMock(status_code=200, headers={})
+    ok.content = b'{"570": {"success": true}}'
+    with patch.object(client.session, "get", side_effect=[busy, ok]) as mock_get:
+        assert client.get_app_details([570]) == {"570": {"success": True}}
+    assert mock_get.call_count == 2
+    assert client.rate_stats()["hosts"]["store.steampowered.com"]["rps"] < 100.0
+
+
+def test_app_details_profile_sends_filters(steam_client: SteamClient):
+    assert appdetails_profile_for(GAME_FIELDS) == "basic"
+    assert appdetails_profile_for(["screenshots"]) == "full"
+    with patch.object(steam_client.session, "get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b'{"570": {"success": true, "data": {"name": "Dota 2"}}}'
+        steam_client.get_app_details([570], profile="basic")
+        steam_client.get_app_details([570], profile="full")
+    sent = [call.kwargs["params"] for call in mock_get.call_args_list]
+    assert sent == [{"appids": "570", "filters": "basic"}, {"appids": "570"}]
+
+
+def test_incremental_array_parsing_across_chunk_boundaries():
+    body = json.dumps({"response": {"game_count": 3, "note": "a \\\"games\\\" [trap]", "games": [
+        {"appid": 570, "name": "Dota \u00e9 2", "playtime_forever": 10},
+        {"appid": 730, "name": "CS2 ]}", "playtime_forever": 20},
+        {"appid": 440, "playtime_forever": 0},
+    ]}}).encode("utf-8")
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    stats = DecodeStats()
+    games = list(iter_json_array(chunks, ("response", "games"), stats=stats))
+    assert [g["appid"] for g in games] == [570, 730, 440]
+    assert games[0]["name"] == "Dota \u00e9 2" and stats.items == 3 and stats.bytes == len(body)
+    assert list(iter_json_array([b'{"response": {}}'], ("response", "games"))) == []
+
+
+def test_streamed_owned_games_feed_the_transform():
+    client = SteamClient(api_key="k", requests_per_second=100.0)
+    response = MagicMock(status_code=200, headers={})
+    response.iter_content.return_value = [b'{"response": {"games": [{"appid": 5', b'70, "playtime_forever": 3}]}}']
+    with patch.object(client.session, "get", return_value=response):
+        rows = transform_owned_games("1", client.iter_owned_games("1"))
+    assert [(r.appid, r.playtime_forever) for r in rows] == [(570, 3)]
+    assert get_decoder("json")[0] == "json"
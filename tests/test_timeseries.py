@@ -0,0 +1,60 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.models import AchievementGlobal
+from steam_explorer.etl.pipeline import transform_global_achievements, upsert_achievements
+from steam_explorer.etl.timeseries import (
+    achievement_series,
+    decode_series,
+    downsample_samples,
+    encode_series,
+    record_percent_sample,
+)
+
+
+def _resp(percent):
+    return {"achievementpercentages": {"achievements": [{"name": "ach1", "percent": percent}]}}
+
+
+def test_upsert_skips_unchanged_points(db_session):
+    for percent in (10.0, 10.001, 12.5):
+        upsert_achievements(db_session, transform_global_achievements(570, _resp(percent)))
+        db_session.flush()
+    assert [p for _, p in achievement_series(db_session, 570, "ach1")] == [10.0, 12.5]
+
+
+def test_downsample_keeps_last_point_per_bucket(db_session):
+    now = datetime(2026, 10, 1)
+    achievement = AchievementGlobal(appid=570, name="ach1", percent=0.0)
+    db_session.add(achievement)
+    db_session.flush()
+    for day in range(200):
+        record_percent_sample(db_session, achievement.id, None, day / 10, at=now - timedelta(days=day))
+    db_session.flush()
+
+    deleted = downsample_samples(db_session, retention=((90, 7),), now=now)
+    db_session.flush()
+    series = achievement_series(db_session, 570, "ach1")
+    old = [ts for ts, _ in series if ts < now - timedelta(days=90)]
+    assert deleted > 0
+    assert len(old) <= 110 // 7 + 2
+    assert len(series) - len(old) == 91
+    assert achievement_series(db_session, 570, "ach1", start=now - timedelta(days=5)) == series[-6:]
+
+
+def test_preexisting_achievement_series_continues(db_session):
+    db_session.add(AchievementGlobal(appid=570, name="ach1", percent=10.0))
+    db_session.flush()
+    upsert_achievements(db_session, transform_global_achievements(570, _resp(15.0)))
+    db_session.flush()
+    assert [p for _, p in achievement_series(db_session, 570, "ach1")] == [15.0]
+
+
+def test_series_encoding_round_trip():
+    points = [(datetime(2026, 1, d), p) for d, p in ((1, 0.5), (2, 0.75), (3, 0.6), (10, 42.01))]
+    encoded = encode_series(points)
+    assert decode_series(encoded) == points
+    assert len(encoded) < 4 * 8
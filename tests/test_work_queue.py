@@ -0,0 +1,80 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steam_explorer.etl import negative_cache
+from steam_explorer.models import Game, NegativeLookup, RefreshJob
+from steam_explorer.scheduler import APPDETAILS, appdetails_missing, complete_job
+from steam_explorer.work_queue import claim_jobs, heartbeat, lease_job, release_jobs
+
+
+NOW = datetime(2026, 1, 1)
+
+
+def _seed(db_session, count):
+    db_session.add_all([
+        RefreshJob(kind=APPDETAILS, key=str(appid), weight=0.0, failures=0, next_run_at=NOW - timedelta(minutes=appid))
+        for appid in range(count)
+    ])
+    db_session.flush()
+
+
+def test_workers_claim_disjoint_chunks(db_session):
+    _seed(db_session, 5)
+    first = claim_jobs(db_session, "a", APPDETAILS, limit=3, now=NOW)
+    second = claim_jobs(db_session, "b", APPDETAILS, limit=3, now=NOW)
+    assert [j.key for j in first] == ["4", "3", "2"]
+    assert [j.key for j in second] == ["1", "0"]
+    assert claim_jobs(db_session, "c", APPDETAILS, limit=3, now=NOW) == []
+
+
+def test_expired_lease_is_reclaimed_and_heartbeat_keeps_it(db_session):
+    _seed(db_session, 2)
+    held = claim_jobs(db_session, "a", APPDETAILS, limit=2, lease_for=timedelta(minutes=5), now=NOW)
+    later = NOW + timedelta(minutes=4)
+    assert heartbeat(db_session, "a", [held[0].id], lease_for=timedelta(minutes=5), now=later) == 1
+
+    # Job 1's lease ran out at NOW+5m; job 0 was renewed until NOW+9m
+    reclaimed = claim_jobs(db_session, "b", APPDETAILS, limit=2, now=NOW + timedelta(minutes=6))
+    assert [j.id for j in reclaimed] == [held[1].id]
+    assert heartbeat(db_session, "a", [j.id for j in held], now=NOW + timedelta(minutes=6)) == 1
+
+
+def test_complete_and_release_clear_the_lease(db_session):
+    _seed(db_session, 2)
+    first, second = claim_jobs(db_session, "a", APPDETAILS, limit=2, now=NOW)
+    complete_job(db_session, first.id, ok=True, now=NOW)
+    release_jobs(db_session, "a", [second.id])
+    db_session.flush()
+    assert first.lease_owner is None and first.next_run_at == NOW + timedelta(days=30)
+    assert [j.id for j in claim_jobs(db_session, "b", APPDETAILS, limit=2, now=NOW)] == [second.id]
+
+
+def test_lease_job_admits_one_claimant(db_session):
+    _seed(db_session, 2)
+    # A fractional "now" still leases whole seconds, which MySQL DATETIME can store exactly
+    (claimed,) = claim_jobs(db_session, "a", APPDETAILS, limit=1, now=NOW + timedelta(microseconds=500))
+    assert claimed.lease_expires_at.microsecond == 0
+    other = db_session.query(RefreshJob).filter(RefreshJob.id != claimed.id).one()
+
+    assert not lease_job(db_session, "daemon", claimed.id, now=NOW)
+    assert lease_job(db_session, "daemon", other.id, now=NOW)
+    assert not lease_job(db_session, "b", other.id, now=NOW)
+    complete_job(db_session, other.id, ok=True, now=NOW)
+    db_session.flush()
+    # Finished elsewhere since the daemon loaded its queue: no longer due
+    assert not lease_job(db_session, "daemon", other.id, now=NOW)
+
+
+def test_fill_gaps_claims_skip_known_and_delisted_apps(db_session):
+    _seed(db_session, 3)
+    db_session.add_all([
+        Game(appid=0, name="Known"),
+        NegativeLookup(kind=negative_cache.APPDETAILS, appid=1, reason="store_success_false",
+                       first_seen_at=NOW, last_checked_at=NOW, next_check_at=NOW + timedelta(days=60)),
+    ])
+    db_session.flush()
+    claimed = claim_jobs(db_session, "a", APPDETAILS, limit=3, now=NOW, where=appdetails_missing(NOW))
+    assert [j.key for j in claimed] == ["2"]
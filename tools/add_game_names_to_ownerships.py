@@ -1,73 +1,92 @@
 #!/usr/bin/env python3
-"""Add game_name column to ownerships table and populate it"""
+"""Add game_name column to ownerships table and populate it
+
+Same change as migration 0009 (``alembic upgrade head``); use this on databases not
+managed by Alembic, or to finish a backfill deferred with ``alembic -x backfill=skip``.
+Names are filled in small committed batches, so the table stays writable meanwhile,
+and an interrupted run picks up after its last batch.
+"""
 
 import sys
 import os
+import argparse
 
 # Add the project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from sqlalchemy import inspect, select, text
+
+from steam_explorer.backfill import backfill
 from steam_explorer.config import get_settings
-from steam_explorer.db import get_sessionmaker
-from steam_explorer.models import Ownership, Game
-from sqlalchemy import text
+from steam_explorer.db import get_engine, get_sessionmaker
+from steam_explorer.logging_utils import setup_logging
+from steam_explorer.models import BackfillCheckpoint, Ownership, Game
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Add ownerships.game_name and fill it from the games table in online batches")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per committed batch (default 1000)")
+    parser.add_argument("--rows-per-second", type=float, default=0.0, help="Throttle the backfill to this rate (default: unthrottled)")
+    parser.add_argument("--restart", action="store_true", help="Start over instead of resuming or skipping a finished backfill")
+    return parser.parse_args(argv)
 
-def add_game_name_column():
+def add_game_name_column(args):
     settings = get_settings()
+    engine = get_engine(settings.database_url)
+
+    # A nullable column without a default is a metadata-only change on Postgres and MySQL 8
+    if "game_name" in {column["name"] for column in inspect(engine).get_columns("ownerships")}:
+        print("ℹ️  game_name column already exists")
+    else:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE ownerships ADD COLUMN game_name VARCHAR(255)"))
+        print("✅ Added game_name column to ownerships table")
+    BackfillCheckpoint.__table__.create(engine, checkfirst=True)
+
+    print("🔄 Updating ownership records with game names...")
+    ownerships = Ownership.__table__
+    games = Game.__table__
+    result = backfill(
+        engine,
+        "ownerships.game_name",
+        ownerships,
+        {"game_name": select(games.c.name).where(games.c.appid == ownerships.c.appid).scalar_subquery()},
+        where=ownerships.c.game_name.is_(None),
+        batch_size=max(1, args.batch_size),
+        rows_per_second=args.rows_per_second,
+        restart=args.restart,
+    )
+    if result.already_done:
+        print("ℹ️  Backfill already finished earlier (use --restart to run it again)")
+    else:
+        print(f"✅ Processed {result.rows} ownership records in {result.batches} batches ({result.seconds:.1f}s)")
+
     SessionLocal = get_sessionmaker(settings.database_url)
-    
     with SessionLocal() as session:
-        try:
-            # Add the column (will fail if it already exists)
-            session.execute(text("ALTER TABLE ownerships ADD COLUMN game_name VARCHAR(255)"))
-            print("✅ Added game_name column to ownerships table")
-        except Exception as e:
-            if "Duplicate column name" in str(e) or "already exists" in str(e):
-                print("ℹ️  game_name column already exists")
-            else:
-                print(f"Error adding column: {e}")
-                return
-        
-        # Update existing records with game names
-        print("🔄 Updating ownership records with game names...")
-        
-        # Get all ownerships that don't have game names
-        ownerships = session.query(Ownership).filter(
-            (Ownership.game_name.is_(None)) | (Ownership.game_name == '')
-        ).all()
-        
-        updated_count = 0
-        for ownership in ownerships:
-            # Find the corresponding game
-            game = session.query(Game).filter(Game.appid == ownership.appid).first()
-            
-            if game:
-                ownership.game_name = game.name
-                updated_count += 1
-            else:
-                ownership.game_name = f"Unknown Game ({ownership.appid})"
-        
-        session.commit()
-        print(f"✅ Updated {updated_count} ownership records with game names")
-        
+        unnamed = session.query(Ownership).filter(Ownership.game_name.is_(None)).count()
+        if unnamed:
+            print(f"ℹ️  {unnamed} ownerships have no game in the games table yet; tools/fetch_all_owned_games.py fetches them")
+
         # Show sample data
         sample_ownerships = session.query(Ownership).filter(
             Ownership.playtime_forever > 0
         ).order_by(Ownership.playtime_forever.desc()).limit(5).all()
-        
+
         print(f"\n=== Sample Updated Data ===")
         print(f"{'Game Name':<40} {'Hours':<8} {'Minutes'}")
         print("-" * 60)
-        
+
         for ownership in sample_ownerships:
-            game_name = ownership.game_name[:37] + "..." if len(ownership.game_name) > 40 else ownership.game_name
+            name = ownership.game_name or f"Unknown Game ({ownership.appid})"
+            game_name = name[:37] + "..." if len(name) > 40 else name
             hours = round(ownership.playtime_forever / 60, 1) if ownership.playtime_forever else 0
             minutes = ownership.playtime_forever or 0
             print(f"{game_name:<40} {hours:<8} {minutes}")
 
-def main():
-    add_game_name_column()
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    add_game_name_column(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,21 +3,44 @@
 
 import sys
 import os
+import argparse
+from datetime import timedelta
 
 # Add the project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from sqlalchemy.exc import IntegrityError
+
+from steam_explorer import metrics
+from steam_explorer.cli import add_commit_options, add_run_options, commit_policy, running
 from steam_explorer.config import get_settings
-from steam_explorer.db import get_sessionmaker
+from steam_explorer.db import ChunkedSession, CommitPolicy, get_sessionmaker
 from steam_explorer.models import Ownership, Game
-from steam_explorer.api.steam_client import SteamClient
-from steam_explorer.etl.pipeline import transform_appdetails_to_games, upsert_games
+from steam_explorer.api.steam_client import APPDETAILS_PROFILES, appdetails_profile_for, get_shared_client
+from steam_explorer.etl.pipeline import GAME_FIELDS, game_names, transform_appdetails_to_games, upsert_games
+from steam_explorer.etl import negative_cache
+from steam_explorer.scheduler import APPDETAILS, appdetails_missing, complete_job, ensure_jobs
+from steam_explorer.work_queue import LeaseHeartbeat, claim_jobs, default_worker_id, release_jobs
 
-def fetch_missing_game_details():
-    settings = get_settings()
-    SessionLocal = get_sessionmaker(settings.database_url)
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fetch details for owned games missing from the games table. "
+                    "Run several copies (on one or more hosts, ideally each with its own API key) to split the work."
+    )
+    parser.add_argument("--worker-id", type=str, default="", help="Lease owner name (default: hostname:pid)")
+    parser.add_argument("--chunk-size", type=int, default=10, help="Apps leased per claim (default 10)")
+    parser.add_argument("--lease-seconds", type=int, default=300, help="Lease length; heartbeats renew it while working (default 300)")
+    parser.add_argument("--details-profile", choices=sorted(APPDETAILS_PROFILES), default=appdetails_profile_for(GAME_FIELDS),
+                        help="Store appdetails payload: the default fetches only what the games table stores; 'full' downloads everything")
+    parser.add_argument("--rps", type=float, default=1.5, help="Starting requests per second for this worker, adapted to 429s/5xx (default 1.5)")
+    add_run_options(parser)
+    # Fetched details always commit per leased chunk; these size the ownership name sync afterwards
+    add_commit_options(parser, per_batch=False, scope="Name sync")
+    return parser.parse_args(argv)
+
+def enqueue_missing(SessionLocal):
+    """Queue an appdetails job for every owned app without details. Returns the number of apps missing."""
     with SessionLocal() as session:
         # Find all owned games that don't have details in the games table
         owned_appids = session.query(Ownership.appid).distinct().all()
@@ -26,76 +49,138 @@ def fetch_missing_game_details():
         owned_set = {appid[0] for appid in owned_appids}
         existing_set = {appid[0] for appid in existing_game_appids}
         
-        missing_appids = list(owned_set - existing_set)
+        missing_set = owned_set - existing_set
+        missing_appids = negative_cache.filter_due(session, negative_cache.APPDETAILS, sorted(missing_set))
         
         print(f"You own {len(owned_set)} games")
         print(f"You have details for {len(existing_set)} games")
-        print(f"Missing details for {len(missing_appids)} games")
-        
-        if not missing_appids:
-            print("✅ All your owned games already have details!")
-            return
-        
-        print(f"\nFetching details for {len(missing_appids)} games...")
-        print("This will take a few minutes due to rate limiting...")
-        
-        # Fetch details in small batches
-        client = SteamClient(api_key=settings.steam_api_key, requests_per_second=1.5)
-        
-        batch_size = 10
+        print(f"Missing details for {len(missing_set)} games")
+        if len(missing_appids) < len(missing_set):
+            print(f"Skipping {len(missing_set) - len(missing_appids)} delisted/unavailable games until their next retry date")
+
+    if missing_appids:
+        try:
+            with SessionLocal.begin() as session:
+                ensure_jobs(session, APPDETAILS, {str(appid): 0.0 for appid in missing_appids})
+        except IntegrityError:
+            # Another worker queued the same apps first; its jobs are just as good
+            pass
+    return len(missing_appids)
+
+def fetch_missing_game_details(args):
+    settings = get_settings()
+    SessionLocal = get_sessionmaker(settings.database_url)
+    worker_id = args.worker_id or default_worker_id()
+    lease_for = timedelta(seconds=args.lease_seconds)
+
+    missing = enqueue_missing(SessionLocal)
+    if not missing:
+        print("✅ All your owned games already have details!")
+        return
+
+    print(f"\nFetching details for up to {missing} games as worker {worker_id}...")
+    print("This will take a few minutes due to rate limiting...")
+    
+    client = get_shared_client(
+        settings.steam_api_key, requests_per_second=args.rps, api_keys=settings.steam_api_keys,
+        base_url=settings.steam_api_base_url, store_url=settings.steam_store_url,
+    )
+    with metrics.run_summary(args.metrics_json, extra=lambda: {"client": client.rate_stats()}):
         total_fetched = 0
-        
-        for i in range(0, len(missing_appids), batch_size):
-            batch = missing_appids[i:i+batch_size]
-            print(f"\nFetching batch {i//batch_size + 1}/{(len(missing_appids) + batch_size - 1)//batch_size}")
+        chunk_number = 0
+
+        while True:
+            # Each claim leases a disjoint chunk; other workers skip it until done or the lease expires.
+            # Only apps still missing: jobs for fetched or delisted apps are left to the daemon's refresh
+            with SessionLocal.begin() as session:
+                jobs = claim_jobs(session, worker_id, APPDETAILS, args.chunk_size, lease_for, where=appdetails_missing())
+                claimed = [(job.id, int(job.key)) for job in jobs]
+            if not claimed:
+                break
+            chunk_number += 1
+            batch = [appid for _, appid in claimed]
+            print(f"\nFetching chunk {chunk_number}")
             print(f"App IDs: {batch}")
-            
+
             try:
-                appdetails = client.get_app_details(batch, batch_size=1)  # Fetch one at a time
+                with LeaseHeartbeat(SessionLocal, worker_id, [job_id for job_id, _ in claimed], lease_for):
+                    appdetails = client.get_app_details(batch, batch_size=1, profile=args.details_profile)  # Fetch one at a time
                 games = transform_appdetails_to_games(appdetails)
-                
-                if games:
-                    with SessionLocal.begin() as batch_session:
+                misses = negative_cache.appdetails_misses(batch, appdetails)
+
+                with SessionLocal.begin() as batch_session:
+                    if games:
                         upserted = upsert_games(batch_session, games)
                         total_fetched += upserted
                         print(f"✅ Added {upserted} games to database")
-                
+                        negative_cache.clear_negative(batch_session, negative_cache.APPDETAILS, [g.appid for g in games])
+                    for appid in misses:
+                        negative_cache.record_negative(batch_session, negative_cache.APPDETAILS, appid, "store_success_false")
+                    if misses:
+                        print(f"ℹ️  {len(misses)} games unavailable in the store, will retry later")
+                    for job_id, _ in claimed:
+                        complete_job(batch_session, job_id, ok=True)
+
+            except KeyboardInterrupt:
+                with SessionLocal.begin() as session:
+                    release_jobs(session, worker_id, [job_id for job_id, _ in claimed])
+                raise
             except Exception as e:
-                print(f"❌ Error fetching batch: {e}")
+                print(f"❌ Error fetching chunk: {e}")
+                with SessionLocal.begin() as session:
+                    for job_id, _ in claimed:
+                        complete_job(session, job_id, ok=False, error=e)
                 continue
-        
+    
         print(f"\n🎉 Finished! Fetched details for {total_fetched} games")
-        
+        print(f"Settled store rate: {client.rate_stats()['hosts']}")
+    
         # Now update ownership records with game names
         print("\n🔄 Updating ownership records with game names...")
-        update_ownership_names()
+        update_ownership_names(commit_policy(args))
 
-def update_ownership_names():
+def update_ownership_names(policy=None):
     settings = get_settings()
     SessionLocal = get_sessionmaker(settings.database_url)
-    
-    with SessionLocal.begin() as session:
-        # Update ownerships that don't have game names or have "Unknown Game"
-        ownerships = session.query(Ownership).filter(
-            (Ownership.game_name.is_(None)) | 
-            (Ownership.game_name == '') |
-            (Ownership.game_name.like('Unknown Game%'))
-        ).all()
-        
-        updated_count = 0
-        for ownership in ownerships:
-            game = session.query(Game).filter(Game.appid == ownership.appid).first()
-            
-            if game:
-                ownership.game_name = game.name
-                updated_count += 1
-            else:
-                ownership.game_name = f"Unknown Game ({ownership.appid})"
-        
-        print(f"✅ Updated {updated_count} ownership records with game names")
+    policy = policy or CommitPolicy()
+    batch_size = policy.rows if policy.rows > 0 else 1000
+
+    # Ownerships that don't have game names or have "Unknown Game", walked in id order
+    needs_name = (
+        (Ownership.game_name.is_(None)) |
+        (Ownership.game_name == '') |
+        (Ownership.game_name.like('Unknown Game%'))
+    )
+    updated_count = 0
+    last_id = 0
+    with ChunkedSession(SessionLocal, policy) as tx:
+        session = tx.session
+        while True:
+            ownerships = (
+                session.query(Ownership)
+                .filter(needs_name, Ownership.id > last_id)
+                .order_by(Ownership.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not ownerships:
+                break
+            last_id = ownerships[-1].id
+            names = game_names(session, [ownership.appid for ownership in ownerships])
+            for ownership in ownerships:
+                if ownership.appid in names:
+                    ownership.game_name = names[ownership.appid]
+                    updated_count += 1
+                else:
+                    ownership.game_name = f"Unknown Game ({ownership.appid})"
+            tx.checkpoint(len(ownerships))
+
+    print(f"✅ Updated {updated_count} ownership records with game names")
 
-def main():
-    fetch_missing_game_details()
+def main(argv=None):
+    args = parse_args(argv)
+    with running(args):
+        fetch_missing_game_details(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
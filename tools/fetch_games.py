@@ -9,10 +9,11 @@ import argparse
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
+from steam_explorer.cli import add_commit_options, add_run_options, commit_policy, running
 from steam_explorer.config import get_settings
-from steam_explorer.api.steam_client import SteamClient
-from steam_explorer.db import get_sessionmaker
+from steam_explorer.api.steam_client import APPDETAILS_PROFILES, appdetails_profile_for, get_shared_client
 from steam_explorer.etl.pipeline import (
+    GAME_FIELDS,
     transform_appdetails_to_games,
     transform_global_achievements,
     transform_owned_games,
@@ -20,29 +21,51 @@ from steam_explorer.etl.pipeline import (
     upsert_achievements,
     upsert_ownerships,
 )
-from steam_explorer.logging_utils import get_logger, setup_logging
+from steam_explorer.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch data from Steam API and load into DB")
     parser.add_argument("--apps", type=str, default="", help="Comma-separated appids to fetch app details and global achievements")
     parser.add_argument("--owned", action="store_true", help="Fetch owned games for a steam user id")
+    parser.add_argument("--recent", action="store_true", help="With --owned: only refresh games played in the last two weeks (one small request)")
+    parser.add_argument("--lean", action="store_true", help="Fetch owned games without appinfo; names come from the games table and unknown apps are queued for appdetails")
     parser.add_argument("--steamid", type=str, default="", help="SteamID64; falls back to STEAM_USER_ID64 if empty")
-    parser.add_argument("--rps", type=float, default=2.0, help="Requests per second limit (default 2.0)")
+    parser.add_argument("--rps", type=float, default=2.0, help="Starting requests per second, adapted to 429s/5xx; keyed Web API calls get this per key (default 2.0)")
+    parser.add_argument("--details-profile", choices=sorted(APPDETAILS_PROFILES), default=appdetails_profile_for(GAME_FIELDS),
+                        help="Store appdetails payload: the default fetches only what the games table stores; 'full' downloads everything")
     parser.add_argument("--batch-size", type=int, default=50, help="Batch size for appdetails (default 50)")
-    return parser.parse_args()
+    add_run_options(parser)
+    add_commit_options(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with running(args):
+        run(args)
+
+def run(args):
+    # Database and HTTP stacks load only once there is work to do, keeping --help fast
+    import requests
+    from steam_explorer import metrics
+    from steam_explorer.db import ChunkedSession, get_sessionmaker
+    from steam_explorer.etl.sketches import OwnershipSketches, save_sketches
+    from steam_explorer.etl import negative_cache
 
-def main():
-    setup_logging()
-    args = parse_args()
     settings = get_settings()
-    client = SteamClient(api_key=settings.steam_api_key, requests_per_second=args.rps)
+    client = get_shared_client(
+        settings.steam_api_key, requests_per_second=args.rps, api_keys=settings.steam_api_keys,
+        base_url=settings.steam_api_base_url, store_url=settings.steam_store_url,
+    )
     SessionLocal = get_sessionmaker(settings.database_url)
 
     steamid = args.steamid or (settings.steam_user_id64 or "")
+    policy = commit_policy(args)
 
-    with SessionLocal.begin() as session:
+    # Commits follow the policy, so readers see progress and no transaction spans the whole run
+    with metrics.run_summary(args.metrics_json, extra=lambda: {"client": client.rate_stats()}), ChunkedSession(SessionLocal, policy) as tx:
+        session = tx.session
         # Apps ETL
         appids = []
         if args.apps:
@@ -52,18 +75,46 @@ def main():
                 logger.error("--apps must be a comma-separated list of integers")
                 raise SystemExit(2)
         if appids:
-            logger.info(f"Fetching details for {len(appids)} apps")
-            appdetails = client.get_app_details(appids, batch_size=max(1, args.batch_size))
-            games = transform_appdetails_to_games(appdetails)
-            upserted = upsert_games(session, games)
-            logger.info(f"Upserted {upserted} games")
+            detail_appids = negative_cache.filter_due(session, negative_cache.APPDETAILS, appids)
+            if len(detail_appids) < len(appids):
+                logger.info(f"Skipping details for {len(appids) - len(detail_appids)} apps the store recently had no data for")
+            if detail_appids:
+                logger.info(f"Fetching details for {len(detail_appids)} apps")
+                appdetails = client.get_app_details(detail_appids, batch_size=max(1, args.batch_size), profile=args.details_profile)
+                games = transform_appdetails_to_games(appdetails)
+                upserted = 0
+                for chunk in policy.chunks(games):
+                    upserted += upsert_games(session, chunk)
+                    negative_cache.clear_negative(session, negative_cache.APPDETAILS, [g.appid for g in chunk])
+                    tx.checkpoint(len(chunk))
+                logger.info(f"Upserted {upserted} games")
+                for appid in negative_cache.appdetails_misses(detail_appids, appdetails):
+                    negative_cache.record_negative(session, negative_cache.APPDETAILS, appid, "store_success_false")
+                tx.checkpoint()
 
-            # Global achievements per app
+            # Global achievements per app, skipping apps known to have none
             total_ach_rows = 0
-            for appid in appids:
-                ach_resp = client.get_global_achievements_for_app(appid)
+            ach_appids = negative_cache.filter_due(session, negative_cache.ACHIEVEMENTS, appids)
+            if len(ach_appids) < len(appids):
+                logger.info(f"Skipping achievements for {len(appids) - len(ach_appids)} apps without achievements")
+            for appid in ach_appids:
+                try:
+                    ach_resp = client.get_global_achievements_for_app(appid)
+                except requests.HTTPError as exc:
+                    status = exc.response.status_code if exc.response is not None else None
+                    if status not in (400, 403, 404):
+                        raise
+                    negative_cache.record_negative(session, negative_cache.ACHIEVEMENTS, appid, f"http_{status}")
+                    tx.checkpoint()
+                    continue
                 ach_rows = transform_global_achievements(appid, ach_resp)
+                if not ach_rows:
+                    negative_cache.record_negative(session, negative_cache.ACHIEVEMENTS, appid, "no_achievements")
+                    tx.checkpoint()
+                    continue
+                negative_cache.clear_negative(session, negative_cache.ACHIEVEMENTS, [appid])
                 total_ach_rows += upsert_achievements(session, ach_rows)
+                tx.checkpoint(len(ach_rows))
             logger.info(f"Upserted {total_ach_rows} global achievement rows")
 
         # Owned games ETL
@@ -72,9 +123,25 @@ def main():
                 logger.error("Provide --steamid or set STEAM_USER_ID64 in environment")
                 raise SystemExit(2)
             logger.info(f"Fetching owned games for steamid={steamid}")
-            owned_resp = client.get_owned_games(steamid)
-            ownership_rows = transform_owned_games(steamid, owned_resp)
-            inserted = upsert_ownerships(session, ownership_rows)
+            if args.recent:
+                owned_resp = client.get_recently_played_games(steamid)
+            else:
+                owned_resp = client.get_owned_games(steamid, include_appinfo=not args.lean)
+            ownership_rows = transform_owned_games(steamid, owned_resp, session=session)
+            if args.lean or args.recent:
+                from steam_explorer.scheduler import enqueue_appdetails
+
+                queued = enqueue_appdetails(session, [row.appid for row in ownership_rows if row.game_name is None])
+                if queued:
+                    logger.info(f"Queued {queued} unknown apps; tools/fetch_all_owned_games.py or the refresh daemon will fetch them")
+                tx.checkpoint()
+            inserted = 0
+            for chunk in policy.chunks(ownership_rows):
+                # Sketch deltas are saved with the ownerships they came from, in the same commit
+                sketches = OwnershipSketches()
+                inserted += upsert_ownerships(session, chunk, sketches=sketches)
+                save_sketches(session, sketches)
+                tx.checkpoint(len(chunk))
             logger.info(f"Upserted {inserted} ownership rows")
 
 if __name__ == "__main__":
@@ -3,8 +3,6 @@
 
 import sys
 import os
-import requests
-import json
 from typing import List, Dict
 
 # Add the project root to Python path
@@ -13,6 +11,8 @@ sys.path.insert(0, project_root)
 
 def get_all_steam_apps() -> List[Dict]:
     """Fetch all Steam apps from the API"""
+    import requests  # deferred so the search prompt appears without loading the HTTP stack
+
     print("Fetching all Steam apps... (this may take a moment)")
     url = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
     response = requests.get(url)
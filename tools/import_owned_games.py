@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Bulk-import owned games from saved GetOwnedGames payloads"""
+
+import sys
+import os
+import argparse
+import json
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from steam_explorer.cli import add_run_options, running
+from steam_explorer.config import get_settings
+from steam_explorer.etl.pipeline import transform_owned_games
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load saved GetOwnedGames payloads through a staging table and one set-based merge. "
+                    "Meant for initial roster imports and replays; fetch_games.py --owned is faster for a few users."
+    )
+    parser.add_argument("paths", nargs="+",
+                        help="<steamid>.json files holding a raw GetOwnedGames response, or .jsonl files "
+                             "with one {\"steamid\": ..., \"response\": ...} object per line")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per staging write (default 50000)")
+    parser.add_argument("--no-history", action="store_true", help="Do not append playtime changes to ownership_history")
+    add_run_options(parser)
+    return parser.parse_args(argv)
+
+def iter_payloads(paths):
+    """(steamid, GetOwnedGames response) pairs from the given files, read one at a time."""
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        yield str(item["steamid"]), item
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                yield os.path.splitext(os.path.basename(path))[0], json.load(f)
+
+def iter_ownerships(paths):
+    for steamid, payload in iter_payloads(paths):
+        yield from transform_owned_games(steamid, payload)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with running(args):
+        run(args)
+
+def run(args):
+    from steam_explorer import bulk, metrics
+    from steam_explorer.etl.bulk_ingest import bulk_upsert_ownerships
+
+    engine = bulk.bulk_engine(get_settings().database_url)
+    with metrics.run_summary(args.metrics_json), engine.begin() as conn:
+        result = bulk_upsert_ownerships(
+            conn, iter_ownerships(args.paths), chunk_size=max(1, args.chunk_size), record_history=not args.no_history,
+        )
+    print(f"✅ Staged {result.staged} ownership rows via {result.path or '-'} in {result.stage_seconds:.2f}s")
+    print(f"✅ Merged in {result.merge_seconds:.2f}s: {result.written} rows written, {result.history_rows} history rows")
+    print("ℹ️  Run tools/rebuild_sketches.py to bring the ownership sketches up to date")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Rebuild the ownership sketches from the ownerships table"""
+
+import sys
+import os
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from steam_explorer.config import get_settings
+from steam_explorer.db import get_sessionmaker
+from steam_explorer.etl.sketches import rebuild_sketches
+
+def main():
+    settings = get_settings()
+    SessionLocal = get_sessionmaker(settings.database_url)
+
+    with SessionLocal.begin() as session:
+        observed = rebuild_sketches(session)
+    print(f"✅ Rebuilt sketches from {observed} ownership records")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Keep Steam data fresh continuously using a prioritized job queue"""
+
+import sys
+import os
+import argparse
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from steam_explorer.cli import add_run_options, running
+from steam_explorer.config import get_settings
+from steam_explorer.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run refresh jobs continuously until interrupted (Ctrl+C / SIGTERM)")
+    parser.add_argument("--steamids", type=str, default="", help="Comma-separated SteamID64s to keep refreshed; STEAM_USER_ID64 is always included")
+    parser.add_argument("--rps", type=float, default=1.5, help="Starting requests per second, adapted to 429s/5xx; keyed Web API calls get this per key (default 1.5)")
+    parser.add_argument("--idle-sleep", type=float, default=30.0, help="Seconds to wait when no job is due (default 30)")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Stop after this many jobs (default: run forever)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port at /metrics (default: off)")
+    parser.add_argument("--metrics-host", type=str, default="127.0.0.1", help="Interface for --metrics-port (default 127.0.0.1)")
+    add_run_options(parser, scope="the daemon")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with running(args):
+        run(args)
+
+def run(args):
+    from steam_explorer import metrics
+    from steam_explorer.api.steam_client import get_shared_client
+    from steam_explorer.db import get_sessionmaker
+    from steam_explorer.scheduler import RefreshDaemon
+
+    settings = get_settings()
+    steamids = [s.strip() for s in args.steamids.split(",") if s.strip()]
+    if settings.steam_user_id64 and settings.steam_user_id64 not in steamids:
+        steamids.append(settings.steam_user_id64)
+
+    client = get_shared_client(
+        settings.steam_api_key, requests_per_second=args.rps, api_keys=settings.steam_api_keys,
+        base_url=settings.steam_api_base_url, store_url=settings.steam_store_url,
+    )
+    daemon = RefreshDaemon(
+        get_sessionmaker(settings.database_url),
+        client,
+        steamids=steamids,
+        idle_sleep=args.idle_sleep,
+    )
+    daemon.install_signal_handlers()
+    if args.metrics_port is not None:
+        from steam_explorer.metrics import start_http_server
+
+        start_http_server(args.metrics_port, host=args.metrics_host)
+    logger.info(f"Refresh daemon started for {len(steamids)} steamids at {args.rps} rps")
+    with metrics.run_summary(args.metrics_json, extra=lambda: {"client": client.rate_stats()}):
+        daemon.run(max_jobs=args.max_jobs)
+    logger.info(f"Settled rates: {client.rate_stats()}")
+
+if __name__ == "__main__":
+    main()
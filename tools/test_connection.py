@@ -44,7 +44,7 @@ def test_connection():
         return False
 
 def main():
-    test_connection()
+    return test_connection()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
@@ -11,6 +11,7 @@ sys.path.insert(0, project_root)
 from steam_explorer.config import get_settings
 from steam_explorer.db import get_sessionmaker
 from steam_explorer.models import Game, Ownership, AchievementGlobal
+from steam_explorer.etl.sketches import load_sketches
 from sqlalchemy import func
 
 def main():
@@ -77,6 +78,18 @@ def main():
             print("-" * 70)
             print(f"🎯 TOTAL PLAYTIME: {total_hours:,} hours ({total_minutes:,} minutes)")
         
+        sketches = load_sketches(session, appids=[])
+        top_playtime = sketches.top_apps_by_playtime(5)
+        if top_playtime:
+            top_appids = [appid for appid, _minutes, _error in top_playtime]
+            sketches = load_sketches(session, appids=top_appids)
+            print(f"\n📈 APPROXIMATE TOTALS (sketches, all tracked users):")
+            print("-" * 70)
+            names = dict(session.query(Game.appid, Game.name).filter(Game.appid.in_(top_appids)).all())
+            for appid, minutes, _error in top_playtime:
+                game_name = names.get(appid, f"Unknown ({appid})")
+                print(f"   • {game_name[:35]:<35} ~{round(minutes / 60):,} hours, ~{sketches.estimate_owners(appid):,} owners")
+
         if game_count > 0:
             print(f"\n📚 SAMPLE GAMES IN DATABASE:")
             print("-" * 70)